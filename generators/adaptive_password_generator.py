@@ -1,6 +1,46 @@
 # generators/adaptive_password_generator.py
 import concurrent.futures
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
 import threading
+import numpy as np
+from models.base_password_model import PROCESS_START_METHOD, format_candidates, unpack_candidates
+from hashcat.cracked_index import HEX_PREFIX
+
+# Генератор выборки модели (см. BasePasswordModel.sampler), переданный рабочему процессу при его запуске
+_worker_model = None
+
+
+def _init_worker(sampler):
+    """
+    Инициализирует рабочий процесс: сохраняет генератор выборки, переданный один раз.
+
+    :param sampler: Объект с методами reseed и generate_batch (см. BasePasswordModel.sampler).
+    """
+    global _worker_model
+    _worker_model = sampler
+
+
+def _generate_shard(shard_file, seed, count, length, chunk_size):
+    """
+    Генерирует пароли в рабочем процессе и записывает их в собственный файл.
+
+    :param shard_file: Путь к файлу части.
+    :param seed: numpy.random.SeedSequence рабочего процесса.
+    :param count: Количество паролей.
+    :param length: Длина генерируемых паролей.
+    :param chunk_size: Количество паролей за один вызов generate_batch.
+    :return: Количество записанных паролей.
+    """
+    _worker_model.reseed(seed)
+    with open(shard_file, 'w') as f:
+        for start in range(0, count, chunk_size):
+            f.write(format_candidates(_worker_model.generate_batch(min(chunk_size, count - start), length)))
+    return count
 
 
 class AdaptivePasswordGenerator:
@@ -8,7 +48,8 @@ class AdaptivePasswordGenerator:
     Генератор паролей с адаптивной стратегией на основе производительности модели.
     """
 
-    def __init__(self, model, output_file, batch_size, logger, success_threshold=5):
+    def __init__(self, model, output_file, batch_size, logger, success_threshold=5, chunk_size=65536,
+                 dedup_filter=None, feedback_weight=10, cancel_token=None):
         """
         Инициализирует генератор паролей.
 
@@ -17,73 +58,316 @@ class AdaptivePasswordGenerator:
         :param batch_size: Размер партии паролей.
         :param logger: Экземпляр Logger для логирования.
         :param success_threshold: Порог успешных попыток для адаптации стратегии.
+        :param chunk_size: Количество паролей, генерируемых моделью за один вызов generate_batch.
+        :param dedup_filter: Фильтр (например, BloomFilter) для отбрасывания повторяющихся паролей.
+        :param feedback_weight: Вес взломанных паролей при дообучении модели между партиями.
+        :param cancel_token: Признак отмены (например, CancelToken) со свойством cancelled и
+                             методом check, прерывающим генерацию между кусками, или None.
         """
         self.model = model
         self.output_file = output_file
         self.batch_size = batch_size
         self.logger = logger
         self.success_threshold = success_threshold
+        self.chunk_size = chunk_size
         self.successful_attempts = 0
         self.lock = threading.Lock()
+        self.enumerator = None
+        self.dedup_filter = dedup_filter
+        self.dedup_lock = threading.Lock()
+        self.duplicates_skipped = 0
+        self.feedback_weight = feedback_weight
+        self.history = []
+        self.cracked_passwords = []
+        self.cancel_token = cancel_token
 
-    def adapt_strategy(self):
+    def check_cancelled(self):
         """
-        Адаптирует стратегию генерации паролей на основе успешных попыток.
+        Прерывает генерацию, если задание отменено (см. cancel_token).
         """
-        with self.lock:
-            if self.successful_attempts < self.success_threshold and hasattr(self.model, 'n'):
-                self.model.n = min(self.model.n + 1, 10)
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+
+    def adapt_strategy(self, cracked_passwords):
+        """
+        Адаптирует модель к атакуемому набору хешей: взломанные пароли
+        добавляются в модель с весом feedback_weight, и следующие партии
+        смещаются к сработавшим шаблонам.
+
+        :param cracked_passwords: Список взломанных открытых текстов.
+        """
+        if not cracked_passwords:
+            return
+        self.model.reinforce(cracked_passwords, self.feedback_weight)
+        # Позиция перебора относится к прежним вероятностям модели
+        self.enumerator = None
+
+    def deduplicate(self, passwords):
+        """
+        Отбрасывает пароли, уже прошедшие через фильтр повторов.
+
+        :param passwords: Список паролей.
+        :return: Список новых паролей (без изменений, если фильтр не задан).
+        """
+        if self.dedup_filter is None:
+            return passwords
+        with self.dedup_lock:
+            fresh = self.dedup_filter.filter_new(passwords)
+            self.duplicates_skipped += len(passwords) - len(fresh)
+        return fresh
+
+    def _format_batch(self, buffer):
+        """
+        Форматирует буфер кандидатов как текст, пропуская повторы.
+
+        :param buffer: Буфер кодов символов, возвращённый generate_batch.
+        :return: Строка с паролями, разделёнными переводом строки.
+        """
+        if self.dedup_filter is None:
+            return format_candidates(buffer)
+        passwords = self.deduplicate(unpack_candidates(buffer))
+        return '\n'.join(passwords) + '\n' if passwords else ''
 
     def generate_password_batch(self, length):
         """
         Генерирует пароли и сохраняет их в файл.
 
         :param length: Длина генерируемых паролей.
+        :return: Количество записанных паролей.
+        """
+        written = 0
+        with open(self.output_file, 'a') as f:
+            for start in range(0, self.batch_size, self.chunk_size):
+                self.check_cancelled()
+                count = min(self.chunk_size, self.batch_size - start)
+                try:
+                    text = self._format_batch(self.model.generate_batch(count, length))
+                except Exception as e:
+                    self.logger.log_failed_attempts(1)
+                    raise IOError(f"Не удалось сгенерировать пароли: {e}")
+                f.write(text)
+                written += text.count('\n')
+        return written
+
+    def iter_password_chunks(self, length, total=None):
+        """
+        Лениво генерирует пароли кусками для потоковой передачи в Hashcat.
+
+        :param length: Длина генерируемых паролей.
+        :param total: Общее количество паролей; по умолчанию — размер партии.
+        :return: Итератор текстовых кусков (пароли через перевод строки).
+        """
+        total = self.batch_size if total is None else total
+        for start in range(0, total, self.chunk_size):
+            self.check_cancelled()
+            count = min(self.chunk_size, total - start)
+            try:
+                yield self._format_batch(self.model.generate_batch(count, length))
+            except Exception as e:
+                self.logger.log_failed_attempts(1)
+                raise IOError(f"Не удалось сгенерировать пароли: {e}")
+
+    def generate_enumerated_batch(self, length, checkpoint_file=None):
         """
+        Записывает следующую партию паролей в порядке убывания вероятности модели.
+
+        Перебор продолжается с места, где остановилась предыдущая партия; при
+        указании checkpoint_file позиция сохраняется на диск и восстанавливается
+        при следующем запуске.
+
+        :param length: Длина генерируемых паролей.
+        :param checkpoint_file: Путь к JSON-файлу контрольной точки перебора.
+        :return: Количество записанных паролей.
+        """
+        if not hasattr(self.model, 'enumerate_passwords'):
+            raise ValueError("Модель не поддерживает перебор по вероятности.")
+        self.check_cancelled()
         try:
+            if self.enumerator is None or self.enumerator.length != length:
+                checkpoint = None
+                if checkpoint_file and os.path.exists(checkpoint_file):
+                    with open(checkpoint_file, 'r') as f:
+                        checkpoint = json.load(f)
+                    if checkpoint.get('length') != length:
+                        checkpoint = None
+                self.enumerator = self.model.enumerate_passwords(length=length, checkpoint=checkpoint)
+
+            written = 0
             with open(self.output_file, 'a') as f:
-                for _ in range(self.batch_size):
-                    password = self.model.generate_password(length=length)
-                    f.write(password + '\n')
+                batch = self.deduplicate(list(itertools.islice(self.enumerator, self.batch_size)))
+                if batch:
+                    f.write('\n'.join(batch) + '\n')
+                written = len(batch)
+
+            if checkpoint_file:
+                with open(checkpoint_file, 'w') as f:
+                    json.dump(self.enumerator.checkpoint(), f)
+            return written
         except Exception as e:
             self.logger.log_failed_attempts(1)
             raise IOError(f"Не удалось сгенерировать пароли: {e}")
 
-    def generate_password_batch_parallel(self, length, num_threads=4):
+    def generate_password_batch_processes(self, length, num_workers=None, seed=None):
         """
-        Генерирует пароли параллельно с использованием нескольких потоков.
+        Генерирует партию паролей в пуле процессов.
+
+        Каждому процессу один раз при запуске передаётся только то, что нужно
+        для выборки (model.sampler(): для марковской модели — скомпилированные
+        таблицы, а для модели из бинарного файла — путь к нему, который процесс
+        отображает в память); процессы запускаются способом PROCESS_START_METHOD. Каждый процесс
+        получает собственный поток зёрен (SeedSequence.spawn) и пишет в свой
+        файл-часть; по завершении части дописываются в output_file по порядку
+        (с отбрасыванием повторов, если задан фильтр). Размер партии делится
+        между процессами.
 
         :param length: Длина генерируемых паролей.
-        :param num_threads: Количество потоков.
+        :param num_workers: Количество процессов; по умолчанию — число ядер.
+        :param seed: Зерно для воспроизводимой генерации.
+        :return: Количество записанных паролей.
         """
-        with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
-            futures = [executor.submit(self.generate_password_batch, length) for _ in range(num_threads)]
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    self.logger.log_failed_attempts(1)
-                    print(f"Ошибка при генерации паролей: {e}")
+        self.check_cancelled()
+        num_workers = num_workers or os.cpu_count() or 1
+        seeds = np.random.SeedSequence(seed).spawn(num_workers)
+        counts = [self.batch_size // num_workers + (1 if i < self.batch_size % num_workers else 0)
+                  for i in range(num_workers)]
+        shard_files = [f"{self.output_file}.part{i}" for i in range(num_workers)]
+        generated = 0
+        written = 0
 
-    def generate_hashcat_rules(self, rules_file):
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                                        initargs=(self.model.sampler(),),
+                                                        mp_context=multiprocessing.get_context(
+                                                            PROCESS_START_METHOD)) as executor:
+                futures = [executor.submit(_generate_shard, shard_file, shard_seed, count, length, self.chunk_size)
+                           for shard_file, shard_seed, count in zip(shard_files, seeds, counts) if count]
+                for future in concurrent.futures.as_completed(futures):
+                    if self.cancel_token is not None and self.cancel_token.cancelled:
+                        # Ещё не начатые части не запускаются; выполняющиеся дописываются
+                        for pending in futures:
+                            pending.cancel()
+                        break
+                    try:
+                        generated += future.result()
+                    except Exception as e:
+                        self.logger.log_failed_attempts(1)
+                        logging.error(f"Ошибка при генерации паролей: {e}")
+            self.check_cancelled()
+
+            with open(self.output_file, 'a') as output:
+                for shard_file in shard_files:
+                    if os.path.exists(shard_file):
+                        with open(shard_file, 'r') as shard:
+                            if self.dedup_filter is None:
+                                shutil.copyfileobj(shard, output)
+                                continue
+                            while True:
+                                lines = list(itertools.islice(shard, self.chunk_size))
+                                if not lines:
+                                    break
+                                fresh = self.deduplicate([line.rstrip('\n') for line in lines])
+                                written += len(fresh)
+                                if fresh:
+                                    output.write('\n'.join(fresh) + '\n')
+        finally:
+            for shard_file in shard_files:
+                if os.path.exists(shard_file):
+                    os.remove(shard_file)
+        return generated if self.dedup_filter is None else written
+
+    def generate_hashcat_rules(self, rules_file, base_words=None, max_rules=1000):
         """
         Генерирует правила для Hashcat с использованием модели.
 
+        Если в ходе атаки уже взломаны пароли, правила извлекаются из них,
+        иначе — из выборки паролей модели.
+
         :param rules_file: Путь к файлу для сохранения правил.
+        :param base_words: Базовые слова (словарь атаки) или None.
+        :param max_rules: Максимальное количество правил.
+        :return: Список кортежей (правило, количество попаданий, доля попаданий).
         """
         try:
-            self.model.generate_hashcat_rules(rules_file)
+            return self.model.generate_hashcat_rules(rules_file, self.cracked_passwords or None, base_words, max_rules)
         except Exception as e:
             self.logger.log_failed_attempts(1)
             raise IOError(f"Не удалось сгенерировать правила Hashcat: {e}")
 
-    def register_success(self, successful_attempts):
+    def register_success(self, successful_attempts, cracked_passwords=None, candidates=None):
         """
-        Регистрирует количество успешных попыток и адаптирует стратегию.
+        Регистрирует результат партии и адаптирует модель по взломанным паролям.
 
-        :param successful_attempts: Количество успешных попыток.
+        Открытые тексты, оставшиеся в виде $HEX[...] (не UTF-8), не
+        учитываются: модель и правила выучили бы саму обёртку.
+
+        :param successful_attempts: Количество взломанных хешей.
+        :param cracked_passwords: Список взломанных открытых текстов или None.
+        :param candidates: Количество кандидатов, переданных Hashcat в партии.
+        :return: Словарь со статистикой партии.
         """
+        cracked_passwords = [password for password in cracked_passwords or []
+                             if not password.startswith(HEX_PREFIX)]
         with self.lock:
             self.successful_attempts = successful_attempts
-            self.logger.log_successful_attempts(successful_attempts)
-            self.adapt_strategy()
+            stats = {
+                "batch": len(self.history) + 1,
+                "successful_attempts": successful_attempts,
+                "candidates": candidates,
+                "crack_rate": successful_attempts / candidates if candidates else None,
+            }
+            self.history.append(stats)
+            if cracked_passwords:
+                self.cracked_passwords.extend(cracked_passwords)
+            self.logger.log_results(stats)
+            self.adapt_strategy(cracked_passwords)
+            return stats
+
+    def run_feedback_loop(self, runner, length, rounds, stream=False, num_workers=None, round_callback=None):
+        """
+        Выполняет атаку партиями с обратной связью: после каждой партии
+        взломанные пароли добавляются в модель, и следующая партия
+        генерируется уже по обновлённой модели.
+
+        Для получения открытых текстов runner должен использовать индекс
+        взломанных хешей (HashcatRunner с cracked_index); без него модель не
+        меняется, но доля взломов всё равно учитывается.
+
+        :param runner: Экземпляр HashcatRunner.
+        :param length: Длина генерируемых паролей.
+        :param rounds: Количество партий.
+        :param stream: Передавать кандидатов в Hashcat через stdin вместо файла.
+        :param num_workers: Количество процессов генерации (для режима с файлом); при 1 партия
+                            генерируется в текущем процессе.
+        :param round_callback: Функция, принимающая словарь статистики после каждой партии.
+        :return: Список словарей статистики партий.
+        """
+        results = []
+        for _ in range(rounds):
+            self.check_cancelled()
+            if stream:
+                candidates = 0
+
+                def counted_chunks():
+                    nonlocal candidates
+                    for chunk in self.iter_password_chunks(length):
+                        candidates += chunk.count('\n')
+                        yield chunk
+
+                successful_attempts = runner.run_hashcat_stream(counted_chunks())
+            else:
+                # Файл партии содержит только новых кандидатов, иначе Hashcat повторял бы прошлые
+                open(self.output_file, 'w').close()
+                if num_workers == 1:
+                    candidates = self.generate_password_batch(length)
+                else:
+                    candidates = self.generate_password_batch_processes(length, num_workers)
+                successful_attempts = runner.run_hashcat(self.output_file)
+
+            cracked = list(runner.last_cracked.values())
+            stats = self.register_success(successful_attempts, cracked, candidates)
+            results.append(stats)
+            if round_callback is not None:
+                round_callback(stats)
+            if runner.nothing_to_crack:
+                break
+        return results
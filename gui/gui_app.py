@@ -3,12 +3,17 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from models.markov_model import MarkovModel
 from models.ml_password_model import MLPasswordModel
+from models.context_ml_model import ContextMLPasswordModel
 from generators.adaptive_password_generator import AdaptivePasswordGenerator
 from hashcat.hashcat_runner import HashcatRunner
+from hashcat.cracked_index import CrackedHashIndex
 from utils.logger import Logger
 from utils.database import Database
 from utils.queue_manager import QueueManager
+from utils.bloom_filter import BloomFilter
+from utils.wordlist import count_lines
 import numpy as np
+import os
 import threading
 
 
@@ -36,16 +41,22 @@ class GUIApp:
         self.model_type_var = tk.StringVar(value='MarkovModel')
         self.rules_file_var = tk.StringVar(value='hashcat_rules.txt')
         self.model_file_var = tk.StringVar()
+        self.stream_var = tk.BooleanVar(value=False)
+        self.dedup_var = tk.BooleanVar(value=False)
+        self.rounds_var = tk.StringVar(value='1')
+        self.dedup_filter_file = 'dedup_filter.bin'
 
         # Инициализация компонентов
         self.build_gui()
 
         self.password_model = None
+        self.training = False
         self.password_generator = None
         self.hashcat_runner = None
         self.logger = Logger()
         self.db = Database()
-        self.queue_manager = QueueManager(self.db)
+        # Очередь заданий обслуживает веб-сервер; интерфейс не перезапускает его незавершённые задания
+        self.queue_manager = QueueManager(self.db, logger=self.logger, resume=False)
 
     def build_gui(self):
         """
@@ -72,11 +83,8 @@ class GUIApp:
         model_frame.grid(row=1, column=0, padx=10, pady=10, sticky='ew')
 
         ttk.Label(model_frame, text="Тип модели:").grid(row=0, column=0, sticky='e', padx=5, pady=5)
-        ttk.OptionMenu(model_frame, self.model_type_var, "MarkovModel", "MarkovModel", "MLPasswordModel").grid(row=0,
-                                                                                                               column=1,
-                                                                                                               sticky='w',
-                                                                                                               padx=5,
-                                                                                                               pady=5)
+        ttk.OptionMenu(model_frame, self.model_type_var, "MarkovModel", "MarkovModel", "MLPasswordModel",
+                       "ContextMLPasswordModel").grid(row=0, column=1, sticky='w', padx=5, pady=5)
 
         ttk.Label(model_frame, text="Длина пароля:").grid(row=1, column=0, sticky='e', padx=5, pady=5)
         ttk.Entry(model_frame, textvariable=self.length_var).grid(row=1, column=1, sticky='w', padx=5, pady=5)
@@ -119,6 +127,13 @@ class GUIApp:
 
         ttk.Button(attack_frame, text="Начать атаку", command=self.start_async_generation).grid(row=0, column=0, padx=5,
                                                                                                 pady=10)
+        ttk.Checkbutton(attack_frame, text="Потоковая передача в Hashcat (stdin)",
+                        variable=self.stream_var).grid(row=0, column=1, sticky='w', padx=5, pady=10)
+        ttk.Checkbutton(attack_frame, text="Исключать повторы (фильтр Блума)",
+                        variable=self.dedup_var).grid(row=0, column=2, sticky='w', padx=5, pady=10)
+        ttk.Label(attack_frame, text="Раунды с дообучением:").grid(row=1, column=0, sticky='e', padx=5, pady=5)
+        ttk.Entry(attack_frame, textvariable=self.rounds_var, width=8).grid(row=1, column=1, sticky='w', padx=5,
+                                                                            pady=5)
 
         # Фрейм для отображения логов и прогресса
         log_frame = ttk.LabelFrame(self.root, text="Логи и Прогресс")
@@ -173,28 +188,81 @@ class GUIApp:
     def load_model(self):
         """
         Загружает модель на основе выбранного типа и данных.
+
+        Обучение выполняется в рабочем потоке, чтобы окно отвечало на ввод;
+        прогресс и итог передаются в главный поток через root.after.
         """
-        model_type = self.model_type_var.get()
-        passwords = self.load_passwords(self.password_file_var.get())
-        if not passwords:
+        if self.training:
+            self.log("Ошибка: Обучение модели уже выполняется!")
             return
+        model_type = self.model_type_var.get()
+        password_file = self.password_file_var.get()
 
         try:
             if model_type == "MarkovModel":
-                n = int(self.ngram_var.get())
-                self.password_model = MarkovModel(passwords, n)
-                self.log("Марковская модель успешно загружена!")
+                model = MarkovModel(n=int(self.ngram_var.get()))
+                options = {"num_workers": os.cpu_count() or 1}
+                message = "Марковская модель успешно загружена!"
             elif model_type == "MLPasswordModel":
-                # Реализуйте загрузку и предварительную обработку реальных данных
-                X, y = self.preprocess_passwords(passwords)
-                self.password_model = MLPasswordModel((X, y))
-                self.log("ML модель успешно загружена!")
+                model, options, message = MLPasswordModel(), {}, "ML модель успешно загружена!"
+            elif model_type == "ContextMLPasswordModel":
+                # Размер N-граммы задаёт длину контекста: N-1 предыдущих символов
+                context_size = max(int(self.ngram_var.get()) - 1, 1)
+                model = ContextMLPasswordModel(context_size=context_size)
+                options, message = {}, "Контекстная ML модель успешно загружена!"
             else:
                 self.log("Ошибка: Неизвестный тип модели!")
+                return
         except ValueError as ve:
             self.log(f"Ошибка: {ve}")
+            return
+
+        self.training = True
+        self.log("Начато обучение модели...")
+        threading.Thread(target=self.train_model, args=(model, password_file, options, message),
+                         daemon=True).start()
+
+    def train_model(self, model, password_file, options, message):
+        """
+        Обучает модель на словаре (выполняется в рабочем потоке).
+
+        :param model: Экземпляр модели.
+        :param password_file: Путь к файлу словаря.
+        :param options: Дополнительные параметры train_from_file.
+        :param message: Сообщение об успешной загрузке.
+        """
+        try:
+            model.train_from_file(password_file, progress_callback=self.log_training_progress, **options)
+        except FileNotFoundError:
+            self.root.after(0, self.finish_training, None, "Ошибка: Файл не найден!")
+        except ValueError as ve:
+            self.root.after(0, self.finish_training, None, f"Ошибка: {ve}")
         except Exception as e:
-            self.log(f"Ошибка при загрузке модели: {e}")
+            self.root.after(0, self.finish_training, None, f"Ошибка при загрузке модели: {e}")
+        else:
+            self.root.after(0, self.finish_training, model, message)
+
+    def finish_training(self, model, message):
+        """
+        Устанавливает обученную модель и выводит итог обучения (в главном потоке).
+
+        :param model: Обученная модель или None при ошибке.
+        :param message: Сообщение для лога.
+        """
+        self.training = False
+        if model is not None:
+            self.password_model = model
+        self.log(message)
+
+    def log_training_progress(self, stats):
+        """
+        Выводит прогресс обучения модели в лог (вызывается из рабочего потока).
+
+        :param stats: Словарь со статистикой чтения словаря.
+        """
+        self.root.after(0, self.log, f"Обучение: {stats['percent']:.1f}% ({stats['lines']} строк, "
+                                     f"{stats['lines_per_second']:.0f} строк/с, "
+                                     f"{stats['megabytes_per_second']:.1f} МБ/с)")
 
     def preprocess_passwords(self, passwords):
         """
@@ -203,14 +271,12 @@ class GUIApp:
         :param passwords: Список паролей.
         :return: Кортеж (X, y) для обучения модели.
         """
-        X = []
-        y = []
-        for pwd in passwords:
-            for i in range(len(pwd) - 1):
-                X.append(ord(pwd[i]))
-                y.append(ord(pwd[i + 1]))
-        X = np.array(X).reshape(-1, 1)
-        y = np.array(y)
+        # Пароли склеиваются через перевод строки; пары, задевающие его, отбрасываются
+        codes = np.frombuffer('\n'.join(passwords).encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        codes = codes.astype(np.int64)
+        keep = (codes[:-1] != ord('\n')) & (codes[1:] != ord('\n'))
+        X = codes[:-1][keep].reshape(-1, 1)
+        y = codes[1:][keep]
         return X, y
 
     def update_model(self):
@@ -233,6 +299,9 @@ class GUIApp:
                 new_data = self.preprocess_passwords(new_passwords)
                 self.password_model.update_model(new_data)
                 self.log("ML модель успешно дообучена!")
+            elif isinstance(self.password_model, ContextMLPasswordModel):
+                self.password_model.update_model(new_passwords)
+                self.log("Контекстная ML модель успешно дообучена!")
             else:
                 self.log("Ошибка: Тип модели не поддерживает дообучение!")
         except Exception as e:
@@ -248,8 +317,8 @@ class GUIApp:
 
         rules_file = self.rules_file_var.get()
         try:
-            self.password_model.generate_hashcat_rules(rules_file)
-            self.log(f"Правила сохранены в файл: {rules_file}")
+            rules = self.password_model.generate_hashcat_rules(rules_file)
+            self.log(f"Правила ({len(rules)}) сохранены в файл: {rules_file}")
         except Exception as e:
             self.log(f"Ошибка при генерации правил: {e}")
 
@@ -262,7 +331,9 @@ class GUIApp:
             return
 
         file_path = filedialog.asksaveasfilename(defaultextension=".pkl",
-                                                 filetypes=[("Pickle Files", "*.pkl"), ("All Files", "*.*")])
+                                                 filetypes=[("Pickle Files", "*.pkl"),
+                                                            ("Binary Markov Model", "*.lqm"),
+                                                            ("All Files", "*.*")])
         if not file_path:
             return
 
@@ -283,7 +354,9 @@ class GUIApp:
         """
         Загружает модель из файла и обновляет интерфейс.
         """
-        file_path = filedialog.askopenfilename(filetypes=[("Pickle Files", "*.pkl"), ("All Files", "*.*")])
+        file_path = filedialog.askopenfilename(filetypes=[("Pickle Files", "*.pkl"),
+                                                          ("Binary Markov Model", "*.lqm"),
+                                                          ("All Files", "*.*")])
         if not file_path:
             return
 
@@ -294,6 +367,8 @@ class GUIApp:
                 self.password_model = MarkovModel()
             elif model_type == "MLPasswordModel":
                 self.password_model = MLPasswordModel()
+            elif model_type == "ContextMLPasswordModel":
+                self.password_model = ContextMLPasswordModel()
             else:
                 self.log("Ошибка: Неизвестный тип модели!")
                 return
@@ -327,27 +402,97 @@ class GUIApp:
         try:
             length = int(self.length_var.get())
             batch_size = int(self.batch_size_var.get())
+            rounds = int(self.rounds_var.get())
         except ValueError:
-            self.log("Ошибка: Длина пароля и размер партии должны быть целыми числами!")
+            self.log("Ошибка: Длина пароля, размер партии и число раундов должны быть целыми числами!")
             return
 
         output_file = 'generated_passwords.txt'
 
+        try:
+            self.hashcat_runner = HashcatRunner(
+                self.hash_file_var.get(),
+                self.hashcat_options_var.get(),
+                self.update_progress,
+                self.logger
+            )
+        except ValueError as e:
+            self.log(f"Ошибка в опциях Hashcat: {e}")
+            return
+        # Индекс взломанных хешей ведётся для режима хеша, заданного в опциях (-m)
+        cracked_index = CrackedHashIndex(self.db, self.hashcat_runner.hash_mode)
+        self.hashcat_runner.cracked_index = cracked_index
+
+        dedup_filter = None
+        if self.dedup_var.get():
+            # Одиночная атака генерирует одну партию
+            dedup_filter = self.load_dedup_filter(output_file, cracked_index, batch_size * max(rounds, 1))
+
         self.password_generator = AdaptivePasswordGenerator(
             self.password_model,
             output_file,
             batch_size,
-            self.logger
-        )
-        self.hashcat_runner = HashcatRunner(
-            self.hash_file_var.get(),
-            self.hashcat_options_var.get(),
-            self.update_progress,
-            self.logger
+            self.logger,
+            dedup_filter=dedup_filter
         )
 
         # Запуск в отдельном потоке
-        threading.Thread(target=self.run_attack, args=(length, output_file), daemon=True).start()
+        if rounds > 1:
+            threading.Thread(target=self.run_feedback_attack, args=(length, rounds), daemon=True).start()
+        elif self.stream_var.get():
+            threading.Thread(target=self.run_stream_attack, args=(length,), daemon=True).start()
+        else:
+            threading.Thread(target=self.run_attack, args=(length, output_file), daemon=True).start()
+
+    def load_dedup_filter(self, output_file, cracked_index, candidates):
+        """
+        Загружает фильтр повторов с диска или создаёт новый, заполняя его
+        паролями из ранее сгенерированного словаря. В фильтр также
+        добавляются уже взломанные пароли из индекса, чтобы они не
+        генерировались повторно.
+
+        Ёмкость фильтра, как и в конвейере заданий, рассчитывается на
+        генерируемых кандидатов и взломанные пароли (и на ранее
+        сгенерированный словарь); сохранённый фильтр, которому её не
+        хватает, создаётся заново.
+
+        :param output_file: Путь к файлу сгенерированных паролей.
+        :param cracked_index: Экземпляр CrackedHashIndex.
+        :param candidates: Количество кандидатов, которые будут сгенерированы.
+        :return: Экземпляр BloomFilter.
+        """
+        plaintexts = cracked_index.plaintexts()
+        dedup_filter = None
+        if os.path.exists(self.dedup_filter_file):
+            try:
+                dedup_filter = BloomFilter.load(self.dedup_filter_file)
+            except (ValueError, IOError) as e:
+                self.log(f"Ошибка при загрузке фильтра повторов: {e}")
+        if dedup_filter is not None and dedup_filter.count + candidates + len(plaintexts) > dedup_filter.capacity:
+            self.log("Ёмкости сохранённого фильтра повторов недостаточно, фильтр создаётся заново.")
+            dedup_filter = None
+        if dedup_filter is None:
+            previous = count_lines(output_file) if os.path.exists(output_file) else 0
+            dedup_filter = BloomFilter(capacity=candidates + len(plaintexts) + previous or 1, error_rate=0.001)
+            if previous:
+                added = dedup_filter.preload_file(output_file)
+                self.log(f"В фильтр повторов загружено паролей: {added}")
+        added = dedup_filter.preload(plaintexts)
+        self.log(f"В фильтр повторов загружено взломанных паролей: {added}")
+        return dedup_filter
+
+    def save_dedup_filter(self):
+        """
+        Сохраняет фильтр повторов текущего генератора на диск.
+        """
+        dedup_filter = self.password_generator.dedup_filter
+        if dedup_filter is None:
+            return
+        try:
+            dedup_filter.save(self.dedup_filter_file)
+            self.log(f"Пропущено повторов: {self.password_generator.duplicates_skipped}")
+        except IOError as e:
+            self.log(f"Ошибка при сохранении фильтра повторов: {e}")
 
     def run_attack(self, length, output_file):
         """
@@ -358,22 +503,77 @@ class GUIApp:
         """
         try:
             self.log("Начата генерация паролей...")
-            self.password_generator.generate_password_batch_parallel(length)
+            self.password_generator.generate_password_batch_processes(length)
+            self.save_dedup_filter()
             self.log("Генерация паролей завершена.")
             self.log("Запуск Hashcat...")
             successful_attempts = self.hashcat_runner.run_hashcat(output_file)
-            self.password_generator.register_success(successful_attempts)
+            self.log_cracked()
+            self.password_generator.register_success(successful_attempts,
+                                                     list(self.hashcat_runner.last_cracked.values()))
+            self.log("Атака завершена!")
+        except Exception as e:
+            self.log(f"Ошибка во время атаки: {e}")
+
+    def run_stream_attack(self, length):
+        """
+        Выполняет атаку, передавая сгенерированные пароли в Hashcat через stdin
+        без промежуточного файла.
+
+        :param length: Длина генерируемых паролей.
+        """
+        try:
+            self.log("Запуск потоковой атаки Hashcat...")
+            successful_attempts = self.hashcat_runner.run_hashcat_stream(
+                self.password_generator.iter_password_chunks(length)
+            )
+            self.log_cracked()
+            self.save_dedup_filter()
+            self.password_generator.register_success(successful_attempts,
+                                                     list(self.hashcat_runner.last_cracked.values()))
+            self.log("Атака завершена!")
+        except Exception as e:
+            self.log(f"Ошибка во время атаки: {e}")
+
+    def run_feedback_attack(self, length, rounds):
+        """
+        Выполняет атаку несколькими партиями, дообучая модель взломанными
+        паролями после каждой партии.
+
+        :param length: Длина генерируемых паролей.
+        :param rounds: Количество партий.
+        """
+        def log_round(stats):
+            self.log_cracked()
+            rate = f"{stats['crack_rate']:.2e}" if stats['crack_rate'] is not None else "—"
+            self.log(f"Партия {stats['batch']}: кандидатов {stats['candidates']}, "
+                     f"взломано {stats['successful_attempts']}, доля взломов {rate}")
+
+        try:
+            self.log(f"Запуск атаки с обратной связью ({rounds} партий)...")
+            self.password_generator.run_feedback_loop(self.hashcat_runner, length, rounds,
+                                                      stream=self.stream_var.get(), round_callback=log_round)
+            self.save_dedup_filter()
             self.log("Атака завершена!")
         except Exception as e:
             self.log(f"Ошибка во время атаки: {e}")
 
-    def update_progress(self, message):
+    def log_cracked(self):
+        """
+        Выводит в лог хеши, взломанные последним запуском Hashcat.
+        """
+        cracked = self.hashcat_runner.last_cracked
+        self.log(f"Взломано хешей за запуск: {len(cracked)}")
+        for hash_value, plaintext in list(cracked.items())[:20]:
+            self.log(f"  {hash_value}:{plaintext}")
+
+    def update_progress(self, status):
         """
         Обновляет прогресс атаки в логах.
 
-        :param message: Строка сообщения прогресса.
+        :param status: Экземпляр HashcatStatus (частота вызовов ограничена HashcatRunner).
         """
-        self.log(f"Прогресс: {message}")
+        self.log(f"Прогресс: {status}")
 
     def log(self, message):
         """
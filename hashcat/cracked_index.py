@@ -0,0 +1,189 @@
+# hashcat/cracked_index.py
+import os
+
+HEX_PREFIX = '$HEX['
+# Расположение potfile по умолчанию в Hashcat 6 (XDG) и в более ранних версиях
+DEFAULT_POTFILES = (
+    os.path.join('~', '.local', 'share', 'hashcat', 'hashcat.potfile'),
+    os.path.join('~', '.hashcat', 'hashcat.potfile'),
+)
+
+
+def normalize_hash(value):
+    """
+    Приводит хеш к каноническому виду: Hashcat записывает шестнадцатеричные
+    хеши в potfile строчными буквами.
+
+    :param value: Строка хеша.
+    :return: Нормализованная строка хеша.
+    """
+    value = value.strip()
+    if value and all(c in '0123456789abcdefABCDEF' for c in value):
+        return value.lower()
+    return value
+
+
+def decode_plaintext(text):
+    """
+    Раскодирует открытый текст из записи $HEX[...], если он является корректным UTF-8.
+
+    Тексты, не являющиеся UTF-8, остаются в виде $HEX[...], чтобы не терять байты.
+
+    :param text: Открытый текст из potfile или outfile.
+    :return: Строка открытого текста.
+    """
+    if text.startswith(HEX_PREFIX) and text.endswith(']'):
+        try:
+            return bytes.fromhex(text[len(HEX_PREFIX):-1]).decode('utf-8')
+        except ValueError:
+            return text
+    return text
+
+
+def parse_result_line(line, known_hashes=None):
+    """
+    Разбирает строку potfile или outfile в формате «хеш:открытый текст».
+
+    Двоеточие может встречаться и в хеше (соль), и в пароле, поэтому при
+    известном наборе хешей выбирается первое разбиение, левая часть которого
+    входит в набор; иначе строка делится по первому двоеточию.
+
+    :param line: Строка файла.
+    :param known_hashes: Множество нормализованных хешей или None.
+    :return: Кортеж (хеш, открытый текст) или None.
+    """
+    line = line.rstrip('\r\n')
+    position = line.find(':')
+    while position > 0:
+        hash_value = normalize_hash(line[:position])
+        if known_hashes is None or hash_value in known_hashes:
+            return hash_value, decode_plaintext(line[position + 1:])
+        position = line.find(':', position + 1)
+    return None
+
+
+def find_potfile():
+    """
+    Ищет potfile Hashcat в расположениях по умолчанию.
+
+    :return: Путь к potfile или None.
+    """
+    for path in DEFAULT_POTFILES:
+        path = os.path.expanduser(path)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_hash_file(hash_file):
+    """
+    Читает хеши из файла, пропуская пустые строки и повторы.
+
+    :param hash_file: Путь к файлу хешей.
+    :return: Список нормализованных хешей в исходном порядке.
+    """
+    with open(hash_file, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        return list(dict.fromkeys(h for h in (normalize_hash(line) for line in f) if h))
+
+
+class CrackedHashIndex:
+    """
+    Постоянный индекс взломанных хешей поверх таблицы cracked_hashes.
+
+    После запуска Hashcat индекс пополняется из outfile или potfile, а перед
+    запуском из файла хешей удаляются уже взломанные, так что объём работы
+    сокращается по мере продвижения аудита.
+    """
+
+    def __init__(self, db, hash_mode=0):
+        """
+        Инициализирует индекс.
+
+        :param db: Экземпляр Database.
+        :param hash_mode: Режим хеша Hashcat (-m).
+        """
+        self.db = db
+        self.hash_mode = hash_mode
+
+    def read_results(self, file_path, hashes=None):
+        """
+        Читает пары «хеш — открытый текст» из potfile или outfile.
+
+        :param file_path: Путь к файлу результатов.
+        :param hashes: Набор хешей атакуемого файла или None — принимать все строки.
+        :return: Словарь {хеш: открытый текст}.
+        """
+        known = {normalize_hash(h) for h in hashes} if hashes is not None else None
+        results = {}
+        if not os.path.exists(file_path):
+            return results
+        with open(file_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            for line in f:
+                pair = parse_result_line(line, known)
+                if pair is not None:
+                    results.setdefault(pair[0], pair[1])
+        return results
+
+    def record(self, results):
+        """
+        Сохраняет взломанные хеши в базе данных.
+
+        Тексты с байтами, не являющимися UTF-8, сохраняются в виде $HEX[...].
+
+        :param results: Словарь {хеш: открытый текст}.
+        :return: Количество новых записей.
+        """
+        def encodable(text):
+            try:
+                text.encode('utf-8')
+                return text
+            except UnicodeEncodeError:
+                return f"{HEX_PREFIX}{text.encode('utf-8', 'surrogateescape').hex()}]"
+
+        return self.db.add_cracked_hashes(((h, encodable(p)) for h, p in results.items()), self.hash_mode)
+
+    def import_file(self, file_path, hashes=None):
+        """
+        Пополняет индекс из potfile или outfile.
+
+        :param file_path: Путь к файлу результатов.
+        :param hashes: Набор хешей атакуемого файла или None.
+        :return: Кортеж (словарь прочитанных результатов, количество новых записей).
+        """
+        results = self.read_results(file_path, hashes)
+        return results, self.record(results)
+
+    def lookup(self, hashes):
+        """
+        Находит открытые тексты для хешей.
+
+        :param hashes: Итерируемое хешей.
+        :return: Словарь {хеш: открытый текст} для взломанных хешей.
+        """
+        return self.db.get_cracked_hashes((normalize_hash(h) for h in hashes), self.hash_mode)
+
+    def plaintexts(self):
+        """
+        Возвращает открытые тексты хешей, взломанных в режиме hash_mode
+        (например, для заполнения фильтра повторов кандидатов).
+
+        :return: Список открытых текстов.
+        """
+        return [row[2] for row in self.db.list_cracked_hashes(self.hash_mode)]
+
+    def prune_hash_file(self, hash_file, output_file):
+        """
+        Записывает в output_file только хеши, которых ещё нет в индексе.
+
+        :param hash_file: Путь к исходному файлу хешей.
+        :param output_file: Путь к файлу невзломанных хешей.
+        :return: Кортеж (количество невзломанных, количество уже взломанных хешей).
+        """
+        hashes = read_hash_file(hash_file)
+        cracked = self.lookup(hashes)
+        remaining = [h for h in hashes if h not in cracked]
+        temp_path = f"{output_file}.tmp{os.getpid()}"
+        with open(temp_path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            f.writelines(f"{h}\n" for h in remaining)
+        os.replace(temp_path, output_file)
+        return len(remaining), len(cracked)
@@ -1,6 +1,12 @@
 # hashcat/hashcat_runner.py
+import asyncio
+import os
+import queue
 import subprocess
 import threading
+from .status import HashcatOutputParser, STATUS_OPTIONS
+from .cracked_index import find_potfile, read_hash_file
+from .masks import MASK_ATTACK_MODES, write_hcmask
 
 
 class HashcatRunner:
@@ -8,19 +14,116 @@ class HashcatRunner:
     Класс для управления запуском Hashcat и обработки его вывода.
     """
 
-    def __init__(self, hash_file, hashcat_options, progress_callback, logger):
+    def __init__(self, hash_file, hashcat_options, progress_callback, logger, status_timer=5, status_interval=1.0,
+                 hash_mode=None, cracked_index=None, cancel_token=None):
         """
         Инициализирует HashcatRunner.
 
         :param hash_file: Путь к файлу с хешами.
         :param hashcat_options: Опции командной строки для Hashcat.
-        :param progress_callback: Функция обратного вызова для обновления прогресса.
+        :param progress_callback: Функция обратного вызова, принимающая HashcatStatus.
         :param logger: Экземпляр Logger для логирования.
+        :param status_timer: Период вывода статуса Hashcat в секундах (--status-timer).
+        :param status_interval: Минимальный интервал между вызовами progress_callback в секундах.
+        :param hash_mode: Режим хеша Hashcat (-m) или None — из опции -m в hashcat_options, иначе 0.
+        :param cracked_index: Экземпляр CrackedHashIndex; если задан, перед запуском из файла
+                              хешей удаляются уже взломанные, а после запуска индекс
+                              пополняется из outfile и potfile.
+        :param cancel_token: Признак отмены (например, CancelToken) с методами check и
+                             add_callback; после отмены новые запуски не начинаются
+                             (check прерывает их), а выполняющийся процесс завершается.
         """
         self.hash_file = hash_file
         self.hashcat_options = hashcat_options
         self.progress_callback = progress_callback
         self.logger = logger
+        self.status_timer = status_timer
+        self.status_interval = status_interval
+        options_hash_modes = _split_option(hashcat_options.split(), '-m', '--hash-type')[1]
+        if hash_mode is None:
+            hash_mode = int(options_hash_modes[-1]) if options_hash_modes else 0
+        if any(value != str(hash_mode) for value in options_hash_modes):
+            raise ValueError(f"Режим хеша в опциях Hashcat ({', '.join(options_hash_modes)}) "
+                             f"не совпадает с hash_mode={hash_mode}.")
+        self.hash_mode = hash_mode
+        self.cracked_index = cracked_index
+        self.last_status = None
+        self.last_messages = []
+        self.last_cracked = {}
+        self.nothing_to_crack = False
+        self.cancel_token = cancel_token
+        self._process = None
+        self._process_lock = threading.Lock()
+        if cancel_token is not None:
+            cancel_token.add_callback(self.terminate)
+
+    @property
+    def outfile(self):
+        """
+        Путь к outfile Hashcat: заданный в опциях или собственный, если используется индекс взломанных хешей.
+        """
+        user_outfile = _option_value(self.hashcat_options.split(), '-o', '--outfile')
+        if user_outfile is not None or self.cracked_index is None:
+            return user_outfile
+        return f"{self.hash_file}.out"
+
+    @property
+    def potfile(self):
+        """
+        Путь к potfile Hashcat или None, если он отключён или не найден.
+        """
+        options = self.hashcat_options.split()
+        if '--potfile-disable' in options:
+            return None
+        return _option_value(options, '--potfile-path') or find_potfile()
+
+    def build_command(self, *inputs, hash_file=None, attack_mode=None):
+        """
+        Собирает команду запуска Hashcat с машиночитаемым выводом статуса.
+
+        Режим хеша и заданный режим атаки указываются раннером; опции -m и
+        -a (--hash-type, --attack-mode) из hashcat_options отбрасываются,
+        иначе Hashcat применил бы последнее значение.
+
+        :param inputs: Источники кандидатов (словари, маски, файлы .hcmask); без них Hashcat читает stdin.
+        :param hash_file: Атакуемый файл хешей; по умолчанию — hash_file раннера.
+        :param attack_mode: Режим атаки Hashcat (-a) или None — режим по умолчанию (словарь).
+        :return: Команда в виде списка аргументов.
+        """
+        options = _split_option(self.hashcat_options.split(), '-m', '--hash-type')[0]
+        command = ['hashcat', '-m', str(self.hash_mode)]
+        if attack_mode is not None:
+            options = _split_option(options, '-a', '--attack-mode')[0]
+            command += ['-a', str(attack_mode)]
+        command += [hash_file or self.hash_file, *inputs] + options
+        command += [option for option in STATUS_OPTIONS if option not in options]
+        if not any(option.startswith('--status-timer') for option in options):
+            command.append(f'--status-timer={self.status_timer}')
+        if self.cracked_index is not None and _option_value(options, '-o', '--outfile') is None:
+            command += ['--outfile', self.outfile, '--outfile-format=1,2']
+        return command
+
+    def prepare_hash_file(self):
+        """
+        Готовит файл хешей к запуску: при наличии индекса взломанных хешей
+        записывает рядом файл только с невзломанными хешами.
+
+        :return: Путь к атакуемому файлу хешей или None, если взламывать нечего.
+        """
+        self.last_cracked = {}
+        self.nothing_to_crack = False
+        if self.cracked_index is None:
+            return self.hash_file
+        target = f"{self.hash_file}.uncracked"
+        remaining, cracked = self.cracked_index.prune_hash_file(self.hash_file, target)
+        self.logger.log_results({"hash_file": self.hash_file, "uncracked": remaining, "already_cracked": cracked})
+        if not remaining:
+            return None
+        outfile = self.outfile
+        if outfile == f"{self.hash_file}.out" and os.path.exists(outfile):
+            # Собственный outfile содержит только результаты текущего запуска
+            os.remove(outfile)
+        return target
 
     def run_hashcat(self, password_file):
         """
@@ -29,46 +132,341 @@ class HashcatRunner:
         :param password_file: Путь к файлу с паролями.
         :return: Количество успешных попыток.
         """
-        hashcat_command = ['hashcat', '-m', '0', self.hash_file, password_file] + self.hashcat_options.split()
+        return self._run(password_file)
+
+    def _run(self, *inputs, attack_mode=None):
+        """
+        Выполняет один запуск Hashcat до завершения.
+
+        :param inputs: Источники кандидатов.
+        :param attack_mode: Режим атаки Hashcat (-a) или None.
+        :return: Количество успешных попыток.
+        """
+        hash_file = self.prepare_hash_file()
+        if hash_file is None:
+            return self._skip_run()
+        process = self._start_process(self.build_command(*inputs, hash_file=hash_file, attack_mode=attack_mode))
+        parser = self._collect_output(process)
+        return self._finish_run(process.returncode, parser, hash_file)
+
+    async def run_hashcat_async(self, password_file):
+        """
+        Запускает Hashcat в цикле событий asyncio и разбирает его вывод.
+
+        При отмене задачи процесс Hashcat завершается.
+
+        :param password_file: Путь к файлу с паролями.
+        :return: Количество успешных попыток.
+        """
+        hash_file = self.prepare_hash_file()
+        if hash_file is None:
+            return self._skip_run()
+        command = self.build_command(password_file, hash_file=hash_file)
+        self._check_cancelled()
         try:
-            process = subprocess.Popen(
-                hashcat_command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
             )
         except FileNotFoundError:
             raise RuntimeError("Hashcat не найден. Убедитесь, что Hashcat установлен и доступен в PATH.")
         except Exception as e:
             raise RuntimeError(f"Не удалось запустить Hashcat: {e}")
 
-        successful_attempts = 0
+        parser = self._new_parser()
+
+        async def read_output(stream, feed):
+            while True:
+                line = await stream.readline()
+                if not line:
+                    break
+                feed(line.decode('utf-8', 'replace'))
+
+        try:
+            await asyncio.gather(read_output(process.stdout, parser.feed_stdout),
+                                 read_output(process.stderr, parser.feed_stderr))
+            await process.wait()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            raise
+        return self._finish_run(process.returncode, parser, hash_file)
+
+    def run_hashcat_stream(self, candidate_chunks, buffer_chunks=8):
+        """
+        Запускает Hashcat, передавая кандидатов через stdin по мере их генерации.
+
+        Генерация выполняется в отдельном потоке и складывается в ограниченную
+        очередь; поток записи передаёт куски в stdin Hashcat. Когда Hashcat не
+        успевает, запись в канал блокируется, очередь заполняется и генератор
+        приостанавливается.
 
-        def read_output(pipe):
-            nonlocal successful_attempts
+        :param candidate_chunks: Итератор текстовых кусков (пароли через перевод строки).
+        :param buffer_chunks: Максимальное количество кусков в очереди.
+        :return: Количество успешных попыток.
+        """
+        hash_file = self.prepare_hash_file()
+        if hash_file is None:
+            return self._skip_run()
+        process = self._start_process(self.build_command(hash_file=hash_file), stdin=subprocess.PIPE)
+
+        chunks = queue.Queue(maxsize=buffer_chunks)
+        stop = threading.Event()
+        errors = []
+
+        def produce():
+            try:
+                for chunk in candidate_chunks:
+                    while not stop.is_set():
+                        try:
+                            chunks.put(chunk, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        break
+            except Exception as e:
+                errors.append(e)
+            finally:
+                chunks.put(None)
+
+        def feed():
+            try:
+                while True:
+                    chunk = chunks.get()
+                    if chunk is None:
+                        break
+                    process.stdin.write(chunk)
+            except (BrokenPipeError, OSError):
+                # Hashcat завершился раньше (например, все хеши взломаны)
+                stop.set()
+                while chunks.get() is not None:
+                    pass
+            finally:
+                try:
+                    process.stdin.close()
+                except (BrokenPipeError, OSError):
+                    pass
+
+        producer_thread = threading.Thread(target=produce, daemon=True)
+        feeder_thread = threading.Thread(target=feed, daemon=True)
+        producer_thread.start()
+        feeder_thread.start()
+        parser = self._collect_output(process)
+        stop.set()
+        producer_thread.join()
+        feeder_thread.join()
+
+        if errors:
+            self._check_cancelled()
+            raise RuntimeError(f"Ошибка при генерации кандидатов: {errors[0]}")
+        return self._finish_run(process.returncode, parser, hash_file)
+
+    def _start_process(self, hashcat_command, stdin=None):
+        """
+        Запускает процесс Hashcat.
+
+        :param hashcat_command: Команда запуска в виде списка аргументов.
+        :param stdin: Источник стандартного ввода (например, subprocess.PIPE).
+        :return: Экземпляр subprocess.Popen.
+        """
+        # Проверка отмены и запуск выполняются под блокировкой, которую берёт и
+        # terminate: отмена между ними завершит только что запущенный процесс
+        with self._process_lock:
+            self._check_cancelled()
+            try:
+                self._process = subprocess.Popen(
+                    hashcat_command,
+                    stdin=stdin,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True
+                )
+                return self._process
+            except FileNotFoundError:
+                raise RuntimeError("Hashcat не найден. Убедитесь, что Hashcat установлен и доступен в PATH.")
+            except Exception as e:
+                raise RuntimeError(f"Не удалось запустить Hashcat: {e}")
+
+    def _check_cancelled(self):
+        """
+        Прерывает запуск, если задание отменено (см. cancel_token).
+        """
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+
+    def terminate(self):
+        """
+        Завершает текущий процесс Hashcat, если он запущен (run_hashcat_async
+        вместо этого останавливается отменой задачи asyncio).
+
+        :return: True, если процессу отправлен сигнал завершения.
+        """
+        with self._process_lock:
+            process = self._process
+            if process is None or process.poll() is not None:
+                return False
+            process.terminate()
+            return True
+
+    def _new_parser(self):
+        """
+        Создаёт разбор вывода для очередного запуска.
+
+        :return: Экземпляр HashcatOutputParser.
+        """
+        return HashcatOutputParser(self.progress_callback, self.status_interval)
+
+    def _collect_output(self, process):
+        """
+        Читает вывод Hashcat до завершения процесса.
+
+        :param process: Запущенный процесс Hashcat.
+        :return: Экземпляр HashcatOutputParser с результатами разбора.
+        """
+        parser = self._new_parser()
+
+        def read_output(pipe, feed):
             for line in iter(pipe.readline, ''):
-                self.progress_callback(line.strip())
-                if "Recovered" in line:
-                    successful_attempts += 1
+                feed(line)
             pipe.close()
 
-        stdout_thread = threading.Thread(target=read_output, args=(process.stdout,))
-        stderr_thread = threading.Thread(target=read_output, args=(process.stderr,))
+        stdout_thread = threading.Thread(target=read_output, args=(process.stdout, parser.feed_stdout))
+        stderr_thread = threading.Thread(target=read_output, args=(process.stderr, parser.feed_stderr))
         stdout_thread.start()
         stderr_thread.start()
         stdout_thread.join()
         stderr_thread.join()
         process.wait()
+        return parser
 
+    def _finish_run(self, returncode, parser, hash_file):
+        """
+        Завершает обработку запуска: передаёт последний статус, проверяет код
+        возврата, пополняет индекс взломанных хешей и логирует результат.
+
+        Коды 0–4 означают штатное завершение (взломано, исчерпано, прервано);
+        отрицательные — завершение сигналом. Остальные коды считаются ошибкой.
+
+        :param returncode: Код возврата процесса Hashcat.
+        :param parser: Экземпляр HashcatOutputParser.
+        :param hash_file: Атакованный файл хешей.
+        :return: Количество хешей, взломанных за запуск (без индекса — по последнему статусу).
+        """
+        parser.finish()
+        self.last_status = parser.last_status
+        self.last_messages = parser.messages
+        if returncode is not None and returncode > 4:
+            details = parser.errors[-1] if parser.errors else (parser.messages[-1] if parser.messages else "")
+            raise RuntimeError(f"Hashcat завершился с ошибкой (код {returncode}): {details}")
+        if self.cracked_index is not None:
+            successful_attempts = self._record_cracked(hash_file)
+        else:
+            successful_attempts = parser.recovered
         self.logger.log_successful_attempts(successful_attempts)
         return successful_attempts
 
-    def run_hashcat_with_masks(self, password_file, masks):
+    def _record_cracked(self, hash_file):
         """
-        Запускает Hashcat с использованием масок.
+        Пополняет индекс взломанных хешей из outfile и potfile.
 
-        :param password_file: Путь к файлу с паролями.
-        :param masks: Список масок для атаки.
+        Учитываются только хеши атакованного файла, то есть взломанные за этот запуск.
+
+        :param hash_file: Атакованный файл невзломанных хешей.
+        :return: Количество хешей, взломанных за запуск.
         """
-        for mask in masks:
-            self.run_hashcat(password_file)
+        targets = set(read_hash_file(hash_file))
+        cracked = {}
+        for results_file in (self.outfile, self.potfile):
+            if results_file:
+                for hash_value, plaintext in self.cracked_index.read_results(results_file, targets).items():
+                    cracked.setdefault(hash_value, plaintext)
+        self.cracked_index.record(cracked)
+        self.last_cracked = cracked
+        return len(cracked)
+
+    def _skip_run(self):
+        """
+        Обрабатывает случай, когда все хеши уже взломаны и запуск не нужен.
+
+        :return: 0 — за пропущенный запуск ничего не взломано.
+        """
+        self.last_status = None
+        self.nothing_to_crack = True
+        self.logger.log_successful_attempts(0)
+        return 0
+
+    def run_hashcat_with_masks(self, password_file, masks, attack_mode=3, mask_file=None):
+        """
+        Запускает атаку по маскам одним процессом Hashcat.
+
+        Все маски записываются в файл .hcmask в переданном порядке (например,
+        по убыванию ожидаемой доли взломов из rank_masks), поэтому запуск и
+        компиляция ядер выполняются один раз на весь набор масок.
+
+        :param password_file: Путь к словарю для гибридных атак (для режима 3 не используется).
+        :param masks: Список масок или кортежей ранжирования (маска первым элементом).
+        :param attack_mode: 3 — только маски, 6 — словарь + маска, 7 — маска + словарь.
+        :param mask_file: Путь к файлу .hcmask; по умолчанию — рядом с файлом хешей.
+        :return: Количество успешных попыток.
+        """
+        if attack_mode not in MASK_ATTACK_MODES:
+            raise ValueError(f"Режим атаки {attack_mode} не использует маски (допустимо: 3, 6, 7).")
+        if attack_mode != 3 and not password_file:
+            raise ValueError("Для гибридной атаки необходим словарь.")
+        mask_file = mask_file or f"{self.hash_file}.hcmask"
+        if not write_hcmask(masks, mask_file):
+            raise ValueError("Список масок пуст.")
+
+        if attack_mode == 3:
+            inputs = (mask_file,)
+        elif attack_mode == 6:
+            inputs = (password_file, mask_file)
+        else:
+            inputs = (mask_file, password_file)
+        return self._run(*inputs, attack_mode=attack_mode)
+
+
+def _option_value(options, *names):
+    """
+    Находит значение опции командной строки в формах «-o путь» и «--outfile=путь».
+
+    :param options: Список аргументов.
+    :param names: Имена опции.
+    :return: Значение опции или None.
+    """
+    for index, option in enumerate(options):
+        for name in names:
+            if option == name and index + 1 < len(options):
+                return options[index + 1]
+            if name.startswith('--') and option.startswith(name + '='):
+                return option[len(name) + 1:]
+    return None
+
+
+def _split_option(options, short_name, long_name):
+    """
+    Отделяет опцию командной строки в формах «-a 3», «-a3», «--attack-mode 3»
+    и «--attack-mode=3» от остальных аргументов.
+
+    :param options: Список аргументов.
+    :param short_name: Короткое имя опции (например, '-a').
+    :param long_name: Длинное имя опции (например, '--attack-mode').
+    :return: Кортеж (остальные аргументы, список значений опции).
+    """
+    remaining, values = [], []
+    index = 0
+    while index < len(options):
+        option = options[index]
+        if option in (short_name, long_name) and index + 1 < len(options):
+            values.append(options[index + 1])
+            index += 2
+            continue
+        if option.startswith(long_name + '='):
+            values.append(option[len(long_name) + 1:])
+        elif option.startswith(short_name) and not option.startswith('--') and len(option) > len(short_name):
+            values.append(option[len(short_name):])
+        else:
+            remaining.append(option)
+        index += 1
+    return remaining, values
@@ -0,0 +1,154 @@
+# hashcat/masks.py
+import string
+from collections import Counter
+from models.base_password_model import unpack_candidates
+
+# Встроенные наборы символов Hashcat и их размеры
+CHARSETS = {
+    'l': string.ascii_lowercase,
+    'u': string.ascii_uppercase,
+    'd': string.digits,
+    's': ' ' + string.punctuation,
+}
+CHARSET_SIZES = {'l': 26, 'u': 26, 'd': 10, 's': 33, 'a': 95, 'h': 16, 'H': 16, 'b': 256}
+# Режимы атаки Hashcat, использующие маски: маска, словарь + маска, маска + словарь
+MASK_ATTACK_MODES = (3, 6, 7)
+
+
+def char_to_token(char):
+    """
+    Возвращает элемент маски для символа: встроенный набор или сам символ.
+
+    :param char: Символ пароля.
+    :return: Строка вида '?l' или сам символ, если он не входит во встроенные наборы.
+    """
+    for name, charset in CHARSETS.items():
+        if char in charset:
+            return f'?{name}'
+    return char
+
+
+def password_to_mask(password):
+    """
+    Строит маску Hashcat, описывающую структуру пароля.
+
+    :param password: Пароль.
+    :return: Маска, например '?u?l?l?l?d?d' для 'Pass12'.
+    """
+    return ''.join(char_to_token(char) for char in password)
+
+
+def split_mask(mask):
+    """
+    Разбивает маску на элементы (наборы '?x' и литералы).
+
+    :param mask: Маска Hashcat.
+    :return: Список элементов.
+    """
+    tokens = []
+    position = 0
+    while position < len(mask):
+        if mask[position] == '?' and position + 1 < len(mask):
+            tokens.append(mask[position:position + 2])
+            position += 2
+        else:
+            tokens.append(mask[position])
+            position += 1
+    return tokens
+
+
+def mask_keyspace(mask):
+    """
+    Вычисляет количество кандидатов, порождаемых маской.
+
+    :param mask: Маска Hashcat со встроенными наборами символов.
+    :return: Размер пространства перебора.
+    """
+    keyspace = 1
+    for token in split_mask(mask):
+        if len(token) == 2 and token[0] == '?':
+            keyspace *= CHARSET_SIZES.get(token[1], 1)
+    return keyspace
+
+
+def rank_masks(passwords, min_count=1, max_keyspace=None):
+    """
+    Ранжирует маски паролей по ожидаемой доле взломов на кандидата.
+
+    Частота маски среди паролей оценивает вероятность того, что
+    неизвестный пароль имеет эту структуру, поэтому отношение частоты к
+    размеру пространства перебора — ожидаемое количество взломов на
+    проверенного кандидата. Маски упорядочиваются по убыванию этой оценки.
+
+    :param passwords: Итерируемое паролей (обучающий словарь или выборка из модели).
+    :param min_count: Минимальное количество паролей с маской.
+    :param max_keyspace: Максимальный размер пространства перебора маски или None.
+    :return: Список кортежей (маска, количество, размер пространства, оценка).
+    """
+    counts = Counter(password_to_mask(password) for password in passwords if password)
+    total = sum(counts.values())
+    ranked = []
+    for mask, count in counts.items():
+        keyspace = mask_keyspace(mask)
+        if count < min_count or (max_keyspace is not None and keyspace > max_keyspace):
+            continue
+        ranked.append((mask, count, keyspace, count / total / keyspace))
+    ranked.sort(key=lambda item: (-item[3], item[0]))
+    return ranked
+
+
+def derive_masks(model, lengths=range(6, 13), samples_per_length=20000, min_count=2, max_keyspace=None):
+    """
+    Выводит маски из распределения модели: генерирует выборку паролей
+    каждой длины и ранжирует их маски (см. rank_masks).
+
+    :param model: Модель паролей с методом generate_batch.
+    :param lengths: Длины генерируемых паролей.
+    :param samples_per_length: Размер выборки для каждой длины.
+    :param min_count: Минимальное количество паролей выборки с маской.
+    :param max_keyspace: Максимальный размер пространства перебора маски или None.
+    :return: Список кортежей (маска, количество, размер пространства, оценка).
+    """
+    samples = []
+    for length in lengths:
+        samples.extend(unpack_candidates(model.generate_batch(samples_per_length, length)))
+    return rank_masks(samples, min_count, max_keyspace)
+
+
+def budget_masks(ranked, max_candidates):
+    """
+    Отбирает маски по порядку ранжирования, пока суммарный объём перебора
+    не превысит бюджет.
+
+    :param ranked: Результат rank_masks или derive_masks.
+    :param max_candidates: Бюджет количества кандидатов.
+    :return: Список масок.
+    """
+    selected, spent = [], 0
+    for mask, _, keyspace, _ in ranked:
+        if spent + keyspace > max_candidates:
+            continue
+        selected.append(mask)
+        spent += keyspace
+    return selected
+
+
+def write_hcmask(masks, file_path):
+    """
+    Записывает маски в файл .hcmask (по одной на строку, в порядке перебора).
+
+    Запятая в файле .hcmask разделяет пользовательские наборы символов,
+    поэтому литеральные запятые экранируются.
+
+    :param masks: Список масок или кортежей ранжирования (маска первым элементом).
+    :param file_path: Путь к файлу.
+    :return: Количество записанных масок.
+    """
+    lines = []
+    for mask in masks:
+        if isinstance(mask, tuple):
+            mask = mask[0]
+        lines.append(mask.replace(',', '\\,') + '\n')
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    return len(lines)
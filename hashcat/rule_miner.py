@@ -0,0 +1,341 @@
+# hashcat/rule_miner.py
+import bisect
+from collections import Counter
+from models.base_password_model import unpack_candidates
+
+# Обратные замены leetspeak: символ пароля -> буквы, которые он может заменять
+LEET_REVERSE = {
+    '4': 'a', '@': 'a', '8': 'b', '(': 'c', '3': 'e', '6': 'g', '9': 'g', '#': 'h',
+    '1': 'il', '!': 'i', '0': 'o', '5': 's', '$': 's', '7': 't', '+': 't', '2': 'z',
+}
+# Количество аргументов функций правил Hashcat, поддерживаемых apply_rule
+RULE_ARITY = {
+    ':': 0, 'l': 0, 'u': 0, 'c': 0, 'C': 0, 't': 0, 'r': 0, 'd': 0, 'f': 0, '{': 0, '}': 0,
+    '[': 0, ']': 0, 'q': 0, 'T': 1, 'D': 1, "'": 1, 'z': 1, 'Z': 1, '$': 1, '^': 1, '@': 1, 's': 2,
+}
+POSITIONS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# Максимальное количество переключений регистра TN в одном правиле
+MAX_TOGGLES = 3
+
+
+def position_code(position):
+    """
+    Кодирует позицию символа для правил Hashcat (0–9, затем A–Z).
+
+    :param position: Позиция от 0 до 35.
+    :return: Символ позиции.
+    """
+    return POSITIONS[position]
+
+
+def parse_rule(rule):
+    """
+    Разбирает правило Hashcat на функции.
+
+    :param rule: Строка правила, например 'c $1 $2'.
+    :return: Список кортежей (функция, аргументы).
+    """
+    functions = []
+    position = 0
+    while position < len(rule):
+        name = rule[position]
+        if name == ' ':
+            position += 1
+            continue
+        if name not in RULE_ARITY:
+            raise ValueError(f"Неподдерживаемая функция правила: {name!r} в {rule!r}")
+        arity = RULE_ARITY[name]
+        args = rule[position + 1:position + 1 + arity]
+        if len(args) != arity:
+            raise ValueError(f"Недостаточно аргументов функции {name!r} в {rule!r}")
+        functions.append((name, args))
+        position += 1 + arity
+    return functions
+
+
+def _position(code):
+    position = POSITIONS.find(code)
+    if position < 0:
+        raise ValueError(f"Некорректная позиция в правиле: {code!r}")
+    return position
+
+
+def apply_rule(word, rule):
+    """
+    Применяет правило Hashcat к слову (подмножество функций, см. RULE_ARITY).
+
+    :param word: Исходное слово.
+    :param rule: Строка правила или результат parse_rule.
+    :return: Преобразованное слово.
+    """
+    functions = parse_rule(rule) if isinstance(rule, str) else rule
+    for name, args in functions:
+        if name == 'l':
+            word = word.lower()
+        elif name == 'u':
+            word = word.upper()
+        elif name == 'c':
+            word = word[:1].upper() + word[1:].lower()
+        elif name == 'C':
+            word = word[:1].lower() + word[1:].upper()
+        elif name == 't':
+            word = word.swapcase()
+        elif name == 'T':
+            n = _position(args)
+            if n < len(word):
+                word = word[:n] + word[n].swapcase() + word[n + 1:]
+        elif name == 'r':
+            word = word[::-1]
+        elif name == 'd':
+            word = word + word
+        elif name == 'f':
+            word = word + word[::-1]
+        elif name == '{':
+            word = word[1:] + word[:1]
+        elif name == '}':
+            word = word[-1:] + word[:-1]
+        elif name == '[':
+            word = word[1:]
+        elif name == ']':
+            word = word[:-1]
+        elif name == 'q':
+            word = ''.join(char * 2 for char in word)
+        elif name == 'D':
+            n = _position(args)
+            word = word[:n] + word[n + 1:]
+        elif name == "'":
+            word = word[:_position(args)]
+        elif name == 'z':
+            word = word[:1] * _position(args) + word
+        elif name == 'Z':
+            word = word + word[-1:] * _position(args)
+        elif name == '$':
+            word = word + args
+        elif name == '^':
+            word = args + word
+        elif name == '@':
+            word = word.replace(args, '')
+        elif name == 's':
+            word = word.replace(args[0], args[1])
+    return word
+
+
+def _case_functions(base, target):
+    """
+    Подбирает функции регистра, превращающие base в target (без учёта регистра они равны).
+
+    :return: Список строк функций или None.
+    """
+    if target == base:
+        return []
+    for name, converted in (('l', base.lower()), ('u', base.upper()),
+                            ('c', base[:1].upper() + base[1:].lower()),
+                            ('C', base[:1].lower() + base[1:].upper()), ('t', base.swapcase())):
+        if converted == target:
+            return [name]
+    toggles = [i for i, (a, b) in enumerate(zip(base, target)) if a != b]
+    if len(toggles) <= MAX_TOGGLES and toggles[-1] < len(POSITIONS):
+        return [f'T{position_code(i)}' for i in toggles]
+    return None
+
+
+class RuleMiner:
+    """
+    Извлечение правил Hashcat из взломанных паролей.
+
+    Каждый пароль раскладывается на префикс и суффикс из небуквенных
+    символов и ядро; в ядре обращаются замены leetspeak и регистр, после
+    чего ищется базовое слово (в словаре base_words или, без словаря, само
+    нормализованное ядро). Правило собирается из функций усечения ('N),
+    регистра (l, u, c, C, t, TN), замен (sXY), добавления в начало (^X) и в
+    конец ($X) и проверяется встроенным интерпретатором правил. Из
+    подходящих разложений выбирается правило без замен в небуквенных
+    префиксе и суффиксе пароля (цифры после последней буквы дописываются
+    $X, а не восстанавливаются в буквы), затем — с наименьшим числом
+    функций. Без словаря такие замены не рассматриваются вовсе: ядро
+    занимает ровно участок от первой до последней буквы.
+    """
+
+    def __init__(self, base_words=None, max_affix=6):
+        """
+        Инициализирует извлечение правил.
+
+        :param base_words: Итерируемое базовых слов (словарь) или None.
+        :param max_affix: Максимальная длина отделяемых префикса и суффикса.
+        """
+        self.base_words = set(base_words) if base_words is not None else None
+        self._lower_words = None
+        self._sorted_words = None
+        if self.base_words is not None:
+            self._lower_words = {word.lower(): word for word in self.base_words}
+            self._sorted_words = sorted(self._lower_words)
+        self.max_affix = max_affix
+
+    def _restorations(self, core):
+        """
+        Перечисляет варианты ядра с обращёнными заменами leetspeak.
+
+        :param core: Ядро пароля.
+        :return: Итератор кортежей (восстановленное слово, список замен (буква, символ)).
+        """
+        variants = [('', [])]
+        for char in core:
+            options = LEET_REVERSE.get(char)
+            if options is None:
+                variants = [(word + char, subs) for word, subs in variants]
+                continue
+            extended = []
+            for word, subs in variants:
+                extended.append((word + char, subs))
+                for letter in options:
+                    extended.append((word + letter, subs + [(letter, char)]))
+            variants = extended[:64]
+        for word, subs in variants:
+            yield word, list(dict.fromkeys(subs))
+
+    def _bases(self, restored):
+        """
+        Находит базовые слова для восстановленного ядра.
+
+        :param restored: Ядро с обращёнными заменами.
+        :return: Список кортежей (базовое слово, функции усечения).
+        """
+        if self.base_words is None:
+            # Без словаря базовым словом считается чисто буквенное ядро
+            return [(restored.lower(), [])] if restored.isalpha() else []
+        if restored in self.base_words:
+            return [(restored, [])]
+        lower = restored.lower()
+        if lower in self._lower_words:
+            return [(self._lower_words[lower], [])]
+        index = bisect.bisect_right(self._sorted_words, lower)
+        if index < len(self._sorted_words) and len(lower) < len(POSITIONS):
+            candidate = self._sorted_words[index]
+            if candidate.startswith(lower):
+                return [(self._lower_words[candidate], [f"'{position_code(len(lower))}"])]
+        return []
+
+    def derive_rule(self, plaintext):
+        """
+        Подбирает правило, порождающее пароль из базового слова.
+
+        :param plaintext: Взломанный пароль.
+        :return: Кортеж (правило, базовое слово) или None.
+        """
+        lead = 0
+        while lead < len(plaintext) and not plaintext[lead].isalpha():
+            lead += 1
+        trail = 0
+        while trail < len(plaintext) - lead and not plaintext[-1 - trail].isalpha():
+            trail += 1
+
+        best = None
+        for p in range(min(lead, self.max_affix) + 1):
+            for s in range(min(trail, self.max_affix) + 1):
+                if self.base_words is None and (p != lead or s != trail):
+                    # Без словаря небуквенные префикс и суффикс не восстанавливаются в буквы
+                    continue
+                core = plaintext[p:len(plaintext) - s]
+                if not any(char.isalpha() for char in core):
+                    continue
+                prefix, suffix = plaintext[:p], plaintext[len(plaintext) - s:]
+                # Символы ядра, относящиеся к небуквенным префиксу и суффиксу пароля
+                affix_positions = [i for i in range(len(core)) if p + i < lead or p + i >= len(plaintext) - trail]
+                for restored, subs in self._restorations(core):
+                    for base, truncate in self._bases(restored):
+                        truncated = apply_rule(base, truncate) if truncate else base
+                        if truncated.lower() != restored.lower():
+                            continue
+                        case = _case_functions(truncated, restored)
+                        if case is None:
+                            continue
+                        functions = (truncate + case + [f's{letter}{char}' for letter, char in subs]
+                                     + [f'^{char}' for char in reversed(prefix)] + [f'${char}' for char in suffix])
+                        rule = ' '.join(functions) or ':'
+                        if apply_rule(base, rule) != plaintext:
+                            continue
+                        affix_subs = sum(1 for i in affix_positions if restored[i] != core[i])
+                        key = (affix_subs, len(functions), len(subs), -len(core))
+                        if best is None or key < best[0]:
+                            best = (key, rule, base)
+        return (best[1], best[2]) if best else None
+
+    def mine(self, plaintexts):
+        """
+        Подсчитывает, сколько паролей объясняет каждое правило.
+
+        :param plaintexts: Итерируемое взломанных паролей.
+        :return: Counter {правило: количество паролей}.
+        """
+        counts = Counter()
+        for plaintext in plaintexts:
+            derived = self.derive_rule(plaintext)
+            if derived is not None:
+                counts[derived[0]] += 1
+        return counts
+
+    def rank(self, plaintexts, min_hits=1, max_rules=None):
+        """
+        Ранжирует правила по доле попаданий.
+
+        Количество попаданий правила — число взломанных паролей, которые
+        оно объясняет. При заданном словаре доля попаданий — это количество,
+        делённое на размер словаря: оценка доли успешных кандидатов, которые
+        Hashcat получит из словаря этим правилом (каждый объяснённый пароль
+        получен из своего базового слова словаря). Правила не применяются ко
+        всему словарю повторно, поэтому ранжирование занимает время,
+        пропорциональное числу паролей, а не размеру словаря. Без словаря —
+        доля взломанных паролей, объясняемых правилом.
+
+        :param plaintexts: Итерируемое взломанных паролей.
+        :param min_hits: Минимальное количество объяснённых паролей.
+        :param max_rules: Максимальное количество правил или None.
+        :return: Список кортежей (правило, количество попаданий, доля попаданий) по убыванию доли.
+        """
+        plaintexts = list(dict.fromkeys(plaintexts))
+        counts = self.mine(plaintexts)
+        total = (len(plaintexts) if self.base_words is None else len(self.base_words)) or 1
+        ranked = [(rule, hits, hits / total) for rule, hits in counts.items() if hits >= min_hits]
+        ranked.sort(key=lambda item: (-item[2], len(item[0]), item[0]))
+        return ranked[:max_rules] if max_rules is not None else ranked
+
+
+def write_rules(rules, output_file):
+    """
+    Записывает правила в файл правил Hashcat (по одному на строку, без повторов).
+
+    :param rules: Список правил или кортежей ранжирования (правило первым элементом).
+    :param output_file: Путь к файлу правил.
+    :return: Количество записанных правил.
+    """
+    unique = list(dict.fromkeys(rule[0] if isinstance(rule, tuple) else rule for rule in rules))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.writelines(f"{rule}\n" for rule in unique)
+    return len(unique)
+
+
+def write_model_rules(model, output_file, plaintexts=None, base_words=None, max_rules=1000,
+                      lengths=range(6, 13), samples_per_length=2000):
+    """
+    Извлекает правила для модели и записывает их в файл.
+
+    Если взломанные пароли не переданы, правила извлекаются из выборки
+    паролей модели: так в правила попадают характерные для модели суффиксы,
+    префиксы, регистр и замены.
+
+    :param model: Модель паролей с методом generate_batch.
+    :param output_file: Путь к файлу правил.
+    :param plaintexts: Взломанные пароли или None.
+    :param base_words: Базовые слова (словарь) или None.
+    :param max_rules: Максимальное количество правил.
+    :param lengths: Длины паролей выборки из модели.
+    :param samples_per_length: Размер выборки для каждой длины.
+    :return: Список кортежей ранжирования (правило, количество попаданий, доля попаданий).
+    """
+    if plaintexts is None:
+        plaintexts = []
+        for length in lengths:
+            plaintexts.extend(unpack_candidates(model.generate_batch(samples_per_length, length)))
+    ranked = RuleMiner(base_words).rank(plaintexts, max_rules=max_rules)
+    write_rules(ranked, output_file)
+    return ranked
@@ -0,0 +1,336 @@
+# hashcat/status.py
+import json
+import time
+
+# Коды состояния сессии Hashcat (поле "status" в --status-json, ST_0000..ST_0016 в types.h)
+STATUS_NAMES = {
+    0: "Инициализация",
+    1: "Автонастройка",
+    2: "Самотестирование",
+    3: "Выполняется",
+    4: "Пауза",
+    5: "Исчерпано",
+    6: "Взломано",
+    7: "Прервано",
+    8: "Завершено",
+    9: "Пропущено",
+    10: "Прервано (контрольная точка)",
+    11: "Прервано (лимит времени)",
+    12: "Выполняется (запрошен выход в контрольной точке)",
+    13: "Ошибка",
+    14: "Прервано (завершение)",
+    15: "Выполняется (запрошен выход после атаки)",
+    16: "Автоопределение",
+}
+# Состояния, после которых Hashcat больше не сообщает прогресс
+FINAL_STATUSES = {5, 6, 7, 8, 10, 11, 13, 14}
+# Опции, включающие машиночитаемый статус
+STATUS_OPTIONS = ['--status', '--status-json']
+
+
+class DeviceStatus:
+    """
+    Состояние одного вычислительного устройства Hashcat.
+    """
+
+    def __init__(self, device_id, name, device_type, speed):
+        """
+        Инициализирует состояние устройства.
+
+        :param device_id: Номер устройства.
+        :param name: Название устройства.
+        :param device_type: Тип устройства (GPU, CPU).
+        :param speed: Скорость перебора в хешах в секунду.
+        """
+        self.device_id = device_id
+        self.name = name
+        self.device_type = device_type
+        self.speed = speed
+
+    def __repr__(self):
+        return f"DeviceStatus({self.device_id}, {self.name!r}, {self.device_type!r}, {self.speed})"
+
+
+class HashcatStatus:
+    """
+    Снимок прогресса сессии Hashcat, разобранный из строки --status-json.
+    """
+
+    def __init__(self, status, progress, progress_total, recovered, recovered_total, devices,
+                 time_start=None, estimated_stop=None, rejected=0, received_at=None):
+        """
+        Инициализирует снимок прогресса.
+
+        :param status: Код состояния сессии (см. STATUS_NAMES).
+        :param progress: Количество проверенных кандидатов.
+        :param progress_total: Общее количество кандидатов (0 — неизвестно, например при чтении stdin).
+        :param recovered: Количество взломанных хешей.
+        :param recovered_total: Общее количество хешей.
+        :param devices: Список DeviceStatus.
+        :param time_start: Время начала сессии (Unix time).
+        :param estimated_stop: Оценка времени окончания (Unix time).
+        :param rejected: Количество отброшенных кандидатов.
+        :param received_at: Время получения снимка (time.time()).
+        """
+        self.status = status
+        self.progress = progress
+        self.progress_total = progress_total
+        self.recovered = recovered
+        self.recovered_total = recovered_total
+        self.devices = devices
+        self.time_start = time_start
+        self.estimated_stop = estimated_stop
+        self.rejected = rejected
+        self.received_at = received_at if received_at is not None else time.time()
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Создаёт снимок из словаря, полученного из JSON-строки статуса.
+
+        :param data: Словарь статуса Hashcat.
+        :return: Экземпляр HashcatStatus.
+        """
+        progress = data.get('progress') or [0, 0]
+        recovered = data.get('recovered_hashes') or [0, 0]
+        devices = [DeviceStatus(device.get('device_id'), device.get('device_name', ''),
+                                device.get('device_type', ''), int(device.get('speed', 0)))
+                   for device in data.get('devices', [])]
+        return cls(int(data.get('status', 0)), int(progress[0]), int(progress[1]),
+                   int(recovered[0]), int(recovered[1]), devices,
+                   data.get('time_start'), data.get('estimated_stop'), int(data.get('rejected', 0)))
+
+    @property
+    def status_name(self):
+        """
+        Название состояния сессии.
+        """
+        return STATUS_NAMES.get(self.status, f"Состояние {self.status}")
+
+    @property
+    def is_final(self):
+        """
+        True, если сессия завершена.
+        """
+        return self.status in FINAL_STATUSES
+
+    @property
+    def speed(self):
+        """
+        Суммарная скорость всех устройств в хешах в секунду.
+        """
+        return sum(device.speed for device in self.devices)
+
+    @property
+    def percent(self):
+        """
+        Доля проверенных кандидатов в процентах или None, если объём перебора неизвестен.
+        """
+        if not self.progress_total:
+            return None
+        return 100.0 * self.progress / self.progress_total
+
+    @property
+    def eta(self):
+        """
+        Оценка оставшегося времени в секундах или None, если она неизвестна.
+        """
+        if not self.estimated_stop or self.is_final:
+            return None
+        return max(0.0, self.estimated_stop - self.received_at)
+
+    def to_dict(self):
+        """
+        Представляет снимок словарём, пригодным для сериализации в JSON.
+
+        :return: Словарь с полями снимка.
+        """
+        return {
+            'status': self.status,
+            'status_name': self.status_name,
+            'progress': self.progress,
+            'progress_total': self.progress_total,
+            'percent': self.percent,
+            'recovered': self.recovered,
+            'recovered_total': self.recovered_total,
+            'speed': self.speed,
+            'devices': [{'device_id': d.device_id, 'name': d.name, 'type': d.device_type, 'speed': d.speed}
+                        for d in self.devices],
+            'eta': self.eta,
+            'rejected': self.rejected,
+        }
+
+    def __str__(self):
+        percent = f"{self.percent:.2f}%" if self.percent is not None else f"{self.progress} кандидатов"
+        eta = f", осталось {format_duration(self.eta)}" if self.eta is not None else ""
+        devices = ", ".join(f"#{d.device_id} {format_speed(d.speed)}" for d in self.devices)
+        return (f"{self.status_name}: {percent}, взломано {self.recovered}/{self.recovered_total}, "
+                f"скорость {format_speed(self.speed)}" + (f" ({devices})" if len(self.devices) > 1 else "") + eta)
+
+
+def parse_status_line(line):
+    """
+    Разбирает строку вывода Hashcat со статусом в формате --status-json.
+
+    :param line: Строка вывода.
+    :return: Экземпляр HashcatStatus или None, если строка не является статусом.
+    """
+    line = line.strip()
+    if not line.startswith('{'):
+        return None
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or 'status' not in data or 'progress' not in data:
+        return None
+    return HashcatStatus.from_json(data)
+
+
+def format_speed(speed):
+    """
+    Форматирует скорость перебора с десятичной приставкой.
+
+    :param speed: Скорость в хешах в секунду.
+    :return: Строка вида '12.3 MH/s'.
+    """
+    for unit in ('', 'k', 'M', 'G', 'T'):
+        if speed < 1000 or unit == 'T':
+            return f"{speed:.1f} {unit}H/s"
+        speed /= 1000.0
+
+
+def format_duration(seconds):
+    """
+    Форматирует длительность в часы, минуты и секунды.
+
+    :param seconds: Длительность в секундах.
+    :return: Строка вида '1:02:03'.
+    """
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class StatusThrottle:
+    """
+    Ограничивает частоту передачи снимков прогресса потребителю.
+
+    Снимок передаётся, если с предыдущей передачи прошло не меньше interval
+    секунд, изменилось состояние сессии или количество взломанных хешей.
+    Последний задержанный снимок передаётся при вызове flush().
+    """
+
+    def __init__(self, callback, interval=1.0):
+        """
+        Инициализирует ограничитель.
+
+        :param callback: Функция, принимающая HashcatStatus; None — снимки не передаются.
+        :param interval: Минимальный интервал между передачами в секундах.
+        """
+        self.callback = callback
+        self.interval = interval
+        self.last_sent = None
+        self.last_time = 0.0
+        self.pending = None
+
+    def __call__(self, status):
+        """
+        Принимает новый снимок и передаёт его, если это разрешено.
+
+        :param status: Экземпляр HashcatStatus.
+        """
+        now = time.monotonic()
+        previous = self.last_sent
+        if (previous is None or status.is_final or now - self.last_time >= self.interval
+                or status.status != previous.status or status.recovered != previous.recovered):
+            self._send(status, now)
+        else:
+            self.pending = status
+
+    def flush(self):
+        """
+        Передаёт задержанный снимок, если он есть.
+        """
+        if self.pending is not None:
+            self._send(self.pending, time.monotonic())
+
+    def _send(self, status, now):
+        self.pending = None
+        self.last_sent = status
+        self.last_time = now
+        if self.callback is not None:
+            self.callback(status)
+
+
+class HashcatOutputParser:
+    """
+    Разбор вывода одного запуска Hashcat.
+
+    Строки статуса превращаются в HashcatStatus и передаются через
+    StatusThrottle; остальные строки stdout и строки stderr сохраняются
+    (последние max_lines) для диагностики ошибок.
+    """
+
+    def __init__(self, callback=None, interval=1.0, max_lines=50):
+        """
+        Инициализирует разбор.
+
+        :param callback: Функция, принимающая HashcatStatus.
+        :param interval: Минимальный интервал между передачами снимков в секундах.
+        :param max_lines: Количество сохраняемых последних строк сообщений.
+        """
+        self.throttle = StatusThrottle(callback, interval)
+        self.max_lines = max_lines
+        self.first_status = None
+        self.last_status = None
+        self.messages = []
+        self.errors = []
+
+    def feed_stdout(self, line):
+        """
+        Обрабатывает строку stdout.
+
+        :param line: Строка вывода.
+        :return: HashcatStatus, если строка является статусом, иначе None.
+        """
+        status = parse_status_line(line)
+        if status is None:
+            line = line.rstrip('\r\n')
+            if line:
+                self._remember(self.messages, line)
+            return None
+        if self.first_status is None:
+            self.first_status = status
+        self.last_status = status
+        self.throttle(status)
+        return status
+
+    def feed_stderr(self, line):
+        """
+        Обрабатывает строку stderr.
+
+        :param line: Строка вывода.
+        """
+        line = line.rstrip('\r\n')
+        if line:
+            self._remember(self.errors, line)
+
+    def finish(self):
+        """
+        Передаёт последний задержанный снимок.
+        """
+        self.throttle.flush()
+
+    @property
+    def recovered(self):
+        """
+        Количество взломанных хешей по последнему снимку (включая найденные в potfile).
+        """
+        if self.last_status is None:
+            return 0
+        return self.last_status.recovered
+
+    def _remember(self, lines, line):
+        lines.append(line)
+        if len(lines) > self.max_lines:
+            del lines[0]
@@ -1,5 +1,54 @@
 # models/base_password_model.py
 from abc import ABC, abstractmethod
+import numpy as np
+
+# Способ запуска рабочих процессов моделей (обучения и генерации): они создаются
+# из многопоточных процессов, а fork скопировал бы в дочерние процессы
+# блокировки, захваченные другими потоками
+PROCESS_START_METHOD = 'spawn'
+
+
+def pack_candidates(passwords, width=None):
+    """
+    Упаковывает список паролей в плотный буфер кодов символов.
+
+    Буфер — массив uint32 формы (количество, ширина); короткие пароли
+    дополняются нулями справа.
+
+    :param passwords: Список паролей.
+    :param width: Ширина буфера; по умолчанию — длина самого длинного пароля.
+    :return: Массив NumPy с кодами символов.
+    """
+    if width is None:
+        width = max((len(p) for p in passwords), default=0)
+    width = max(width, 1)
+    return np.array(passwords, dtype=f'U{width}').view(np.uint32).reshape(len(passwords), width)
+
+
+def unpack_candidates(buffer):
+    """
+    Преобразует буфер кодов символов обратно в список строк.
+
+    :param buffer: Массив uint32 формы (количество, ширина).
+    :return: Список паролей; завершающие нули отбрасываются.
+    """
+    buffer = np.ascontiguousarray(buffer, dtype=np.uint32)
+    if buffer.size == 0:
+        return [''] * len(buffer)
+    return buffer.view(f'U{buffer.shape[1]}').ravel().tolist()
+
+
+def format_candidates(buffer):
+    """
+    Форматирует буфер кандидатов как текст словаря (по одному паролю в строке).
+
+    :param buffer: Массив uint32 формы (количество, ширина).
+    :return: Строка с паролями, разделёнными переводом строки.
+    """
+    passwords = unpack_candidates(buffer)
+    if not passwords:
+        return ''
+    return '\n'.join(passwords) + '\n'
 
 
 class BasePasswordModel(ABC):
@@ -18,15 +67,64 @@ class BasePasswordModel(ABC):
         """
         pass
 
+    def generate_batch(self, count, length):
+        """
+        Генерирует партию паролей и возвращает их упакованный буфер.
+
+        Реализация по умолчанию вызывает generate_password в цикле; модели
+        переопределяют метод векторизованной генерацией.
+
+        :param count: Количество генерируемых паролей.
+        :param length: Длина генерируемых паролей.
+        :return: Массив uint32 формы (count, ширина) с кодами символов.
+        """
+        passwords = [self.generate_password(length=length) for _ in range(count)]
+        return pack_candidates(passwords, width=length)
+
+    def sampler(self):
+        """
+        Возвращает объект для генерации в рабочих процессах: с методами
+        reseed и generate_batch и только теми данными, которые нужны для
+        выборки. Реализация по умолчанию возвращает саму модель.
+
+        :return: Объект, передаваемый рабочим процессам.
+        """
+        return self
+
+    def reseed(self, seed=None):
+        """
+        Переинициализирует генератор случайных чисел модели.
+
+        :param seed: Зерно или numpy.random.SeedSequence.
+        """
+        self.rng = np.random.default_rng(seed)
+
     @abstractmethod
-    def generate_hashcat_rules(self, output_file):
+    def reinforce(self, passwords, weight=10):
         """
-        Генерирует правила для Hashcat и сохраняет их в указанный файл.
+        Усиливает в модели найденные пароли (например, взломанные открытые
+        тексты), дообучая её на них с повышенным весом.
 
-        :param output_file: Путь к файлу для сохранения правил.
+        :param passwords: Список паролей.
+        :param weight: Вес паролей относительно обучающих данных.
         """
         pass
 
+    def generate_hashcat_rules(self, output_file, plaintexts=None, base_words=None, max_rules=1000):
+        """
+        Извлекает правила Hashcat, ранжированные по доле попаданий, и сохраняет
+        их в указанный файл (см. hashcat.rule_miner.write_model_rules).
+
+        :param output_file: Путь к файлу для сохранения правил.
+        :param plaintexts: Взломанные пароли или None — правила извлекаются из выборки модели.
+        :param base_words: Базовые слова (словарь атаки) или None.
+        :param max_rules: Максимальное количество правил.
+        :return: Список кортежей (правило, количество попаданий, доля попаданий).
+        """
+        # rule_miner импортирует этот модуль, поэтому импорт выполняется при вызове
+        from hashcat.rule_miner import write_model_rules
+        return write_model_rules(self, output_file, plaintexts, base_words, max_rules)
+
     @abstractmethod
     def update_model(self, new_data):
         """
@@ -0,0 +1,340 @@
+# models/compiled_markov.py
+import numpy as np
+from .base_password_model import unpack_candidates
+
+
+class CompiledMarkovTables:
+    """
+    Скомпилированное представление марковской модели для быстрой выборки.
+
+    Префиксы заменены целочисленными идентификаторами состояний, а переходы
+    хранятся в плоских массивах NumPy (формат CSR): переходы состояния ``s``
+    занимают диапазон ``offsets[s]:offsets[s + 1]``. Для каждого перехода
+    заранее вычислены символ, вероятность, накопленная вероятность, таблица
+    псевдонимов (alias method) и идентификатор следующего состояния, поэтому
+    выборка сводится к обходу таблиц.
+
+    Таблицы могут содержать префиксы младших порядков (после прореживания
+    модели): переход ведёт в состояние самого длинного суффикса контекста,
+    для которого есть префикс, а цепочки начинаются только с префиксов
+    полного порядка.
+    """
+
+    # Массивы, полностью описывающие таблицы (в этом порядке хранятся в бинарном файле)
+    ARRAYS = ('prefix_lengths', 'prefix_codepoints', 'start_states', 'offsets', 'codepoints', 'probs',
+              'cum_probs', 'alias_prob', 'alias_index', 'next_state')
+
+    def __init__(self, prefixes, offsets, codepoints, probs, next_state):
+        """
+        Инициализирует таблицы из уже подготовленных массивов.
+
+        :param prefixes: Список префиксов; индекс в списке — идентификатор состояния.
+        :param offsets: Массив смещений переходов (длина — число состояний + 1).
+        :param codepoints: Коды символов переходов (uint32).
+        :param probs: Вероятности переходов (float64).
+        :param next_state: Идентификатор следующего состояния или -1.
+        """
+        self._prefixes = prefixes
+        self._prefix_index = None
+        self.source_path = None
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        self.codepoints = np.ascontiguousarray(codepoints, dtype=np.uint32)
+        self.probs = np.ascontiguousarray(probs, dtype=np.float64)
+        self.next_state = np.ascontiguousarray(next_state, dtype=np.int64)
+        self.degree = np.diff(self.offsets)
+        self.cum_probs = self._build_cumulative()
+        self.alias_prob, self.alias_index = self._build_alias_tables()
+
+        self.prefix_lengths = np.array([len(p) for p in prefixes], dtype=np.int64)
+        width = int(self.prefix_lengths.max()) if len(prefixes) else 0
+        self.prefix_codepoints = np.zeros((len(prefixes), width), dtype=np.uint32)
+        for idx, prefix in enumerate(prefixes):
+            if prefix:
+                self.prefix_codepoints[idx, :len(prefix)] = [ord(c) for c in prefix]
+        self.start_states = np.flatnonzero(self.prefix_lengths == width).astype(np.int64)
+
+    @classmethod
+    def from_arrays(cls, arrays, source_path=None):
+        """
+        Создаёт таблицы из готовых массивов без пересчёта (например, отображённых
+        в память из бинарного файла модели).
+
+        :param arrays: Словарь массивов с ключами из ARRAYS.
+        :param source_path: Путь к файлу, из которого отображены массивы.
+        :return: Экземпляр CompiledMarkovTables.
+        """
+        tables = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(tables, name, arrays[name])
+        tables.degree = np.diff(tables.offsets)
+        tables._prefixes = None
+        tables._prefix_index = None
+        tables.source_path = source_path
+        return tables
+
+    def __getstate__(self):
+        """
+        При передаче в другой процесс таблицы, отображённые из файла,
+        передаются только путём: процесс отображает тот же файл заново и
+        разделяет страницы с остальными процессами.
+        """
+        if self.source_path is not None:
+            return {'source_path': self.source_path}
+        state = self.__dict__.copy()
+        state['_prefix_index'] = None
+        return state
+
+    def __setstate__(self, state):
+        """
+        Восстанавливает таблицы после передачи между процессами.
+
+        :param state: Состояние, полученное из __getstate__.
+        """
+        if set(state) == {'source_path'}:
+            from .markov_binary import load_tables
+            state = load_tables(state['source_path'])[0].__dict__
+        self.__dict__.update(state)
+
+    @property
+    def prefixes(self):
+        """
+        Список префиксов; индекс в списке — идентификатор состояния.
+        """
+        if self._prefixes is None:
+            self._prefixes = unpack_candidates(self.prefix_codepoints)
+        return self._prefixes
+
+    @property
+    def prefix_index(self):
+        """
+        Отображение префикса на идентификатор состояния.
+        """
+        if self._prefix_index is None:
+            self._prefix_index = {prefix: idx for idx, prefix in enumerate(self.prefixes)}
+        return self._prefix_index
+
+    def prefix_of(self, state):
+        """
+        Возвращает префикс состояния, не декодируя весь список префиксов.
+
+        :param state: Идентификатор состояния.
+        :return: Префикс в виде строки.
+        """
+        if self._prefixes is not None:
+            return self._prefixes[state]
+        return ''.join(map(chr, self.prefix_codepoints[state, :self.prefix_lengths[state]].tolist()))
+
+    @classmethod
+    def from_transitions(cls, transitions):
+        """
+        Компилирует таблицу переходов вида ``{префикс: {символ: вес}}``.
+
+        Веса нормализуются внутри каждого префикса, поэтому подходят как
+        частоты, так и уже нормализованные вероятности. Префиксы без
+        переходов пропускаются. Следующее состояние перехода — самый длинный
+        суффикс контекста (не длиннее префиксов полного порядка), имеющий
+        переходы.
+
+        :param transitions: Отображение префиксов на счётчики следующих символов.
+        :return: Экземпляр CompiledMarkovTables.
+        """
+        prefixes = [prefix for prefix, next_chars in transitions.items() if next_chars]
+        prefix_index = {prefix: idx for idx, prefix in enumerate(prefixes)}
+        order = max((len(prefix) for prefix in prefixes), default=0)
+
+        offsets = [0]
+        codepoints = []
+        probs = []
+        next_state = []
+        for prefix in prefixes:
+            next_chars = transitions[prefix]
+            total = float(sum(next_chars.values()))
+            for char, weight in next_chars.items():
+                codepoints.append(ord(char))
+                probs.append(weight / total)
+                next_state.append(cls._longest_suffix(prefix_index, (prefix + char)[-order:] if order else ''))
+            offsets.append(len(codepoints))
+
+        return cls(prefixes, offsets, codepoints, probs, next_state)
+
+    @staticmethod
+    def _longest_suffix(prefix_index, context):
+        """
+        Находит состояние самого длинного суффикса контекста.
+
+        :param prefix_index: Отображение префикса на идентификатор состояния.
+        :param context: Контекст не длиннее префиксов полного порядка.
+        :return: Идентификатор состояния или -1.
+        """
+        for start in range(len(context) + 1):
+            state = prefix_index.get(context[start:])
+            if state is not None:
+                return state
+        return -1
+
+    def backoff_state(self, context):
+        """
+        Возвращает состояние для последних символов контекста с переходом к
+        более коротким суффиксам, если полного префикса нет в таблицах.
+
+        :param context: Строка контекста (например, уже сгенерированная часть пароля).
+        :return: Идентификатор состояния или -1.
+        """
+        order = self.prefix_codepoints.shape[1]
+        return self._longest_suffix(self.prefix_index, context[-order:] if order else '')
+
+    def log_likelihood(self, password, unseen_prob=1e-6):
+        """
+        Вычисляет логарифм вероятности символов пароля после начального префикса.
+
+        Символ, для которого в текущем состоянии нет перехода, оценивается
+        вероятностью unseen_prob, после чего состояние восстанавливается по
+        контексту.
+
+        :param password: Пароль.
+        :param unseen_prob: Вероятность для отсутствующих переходов.
+        :return: Кортеж (сумма натуральных логарифмов, число оценённых символов, число найденных переходов).
+        """
+        order = self.prefix_codepoints.shape[1]
+        state = self.backoff_state(password[:order])
+        total, found = 0.0, 0
+        for position in range(order, len(password)):
+            transition = -1
+            if state >= 0:
+                start, end = int(self.offsets[state]), int(self.offsets[state + 1])
+                matches = np.flatnonzero(self.codepoints[start:end] == ord(password[position]))
+                if matches.size:
+                    transition = start + int(matches[0])
+            if transition >= 0:
+                total += float(np.log(self.probs[transition]))
+                found += 1
+                state = int(self.next_state[transition])
+            else:
+                total += float(np.log(unseen_prob))
+                state = -1
+            if state < 0:
+                state = self.backoff_state(password[:position + 1])
+        return total, max(len(password) - order, 0), found
+
+    @property
+    def nbytes(self):
+        """
+        Объём памяти массивов таблиц в байтах.
+        """
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    @property
+    def num_states(self):
+        """
+        Количество состояний (префиксов) в таблицах.
+        """
+        return len(self.offsets) - 1
+
+    def _build_cumulative(self):
+        """
+        Строит накопленные вероятности переходов внутри каждого состояния.
+
+        :return: Массив float64; последний элемент каждого состояния равен 1.0.
+        """
+        cum_probs = np.cumsum(self.probs)
+        if len(cum_probs):
+            starts = self.offsets[:-1]
+            base = np.concatenate(([0.0], cum_probs))[starts]
+            cum_probs -= np.repeat(base, self.degree)
+            cum_probs[self.offsets[1:] - 1] = 1.0
+        return cum_probs
+
+    def _build_alias_tables(self):
+        """
+        Строит таблицы псевдонимов (алгоритм Воуза) для выборки за O(1).
+
+        :return: Кортеж (alias_prob, alias_index); alias_index содержит
+                 глобальные индексы переходов.
+        """
+        alias_prob = np.ones(len(self.probs), dtype=np.float64)
+        alias_index = np.arange(len(self.probs), dtype=np.int64)
+        probs = self.probs.tolist()
+        for state in range(self.num_states):
+            start, end = int(self.offsets[state]), int(self.offsets[state + 1])
+            count = end - start
+            if count <= 1:
+                continue
+            scaled = [probs[t] * count for t in range(start, end)]
+            small = [i for i, p in enumerate(scaled) if p < 1.0]
+            large = [i for i, p in enumerate(scaled) if p >= 1.0]
+            while small and large:
+                s, l = small.pop(), large.pop()
+                alias_prob[start + s] = scaled[s]
+                alias_index[start + s] = start + l
+                scaled[l] -= 1.0 - scaled[s]
+                if scaled[l] < 1.0:
+                    small.append(l)
+                else:
+                    large.append(l)
+        return alias_prob, alias_index
+
+    def sample_transitions(self, states, rng):
+        """
+        Выбирает по одному переходу для каждого состояния методом псевдонимов.
+
+        :param states: Массив идентификаторов состояний.
+        :param rng: Генератор случайных чисел numpy.random.Generator.
+        :return: Массив глобальных индексов выбранных переходов.
+        """
+        column = (rng.random(len(states)) * self.degree[states]).astype(np.int64)
+        transitions = self.offsets[states] + column
+        keep = rng.random(len(states)) < self.alias_prob[transitions]
+        return np.where(keep, transitions, self.alias_index[transitions])
+
+    def sample(self, length, rng):
+        """
+        Генерирует один пароль обходом таблиц.
+
+        :param length: Длина генерируемого пароля.
+        :param rng: Генератор случайных чисел numpy.random.Generator.
+        :return: Сгенерированный пароль в виде строки.
+        """
+        state = int(self.start_states[rng.integers(len(self.start_states))])
+        password = list(self.prefix_of(state))
+        steps = length - len(password)
+        if steps <= 0:
+            return ''.join(password)
+        columns = rng.random(steps)
+        coins = rng.random(steps)
+        offsets, degree = self.offsets, self.degree
+        for step in range(steps):
+            transition = int(offsets[state]) + int(columns[step] * degree[state])
+            if coins[step] >= self.alias_prob[transition]:
+                transition = int(self.alias_index[transition])
+            password.append(chr(self.codepoints[transition]))
+            state = int(self.next_state[transition])
+            if state < 0:
+                break
+        return ''.join(password)
+
+    def sample_batch(self, count, length, rng):
+        """
+        Генерирует партию паролей, продвигая все цепочки синхронно.
+
+        :param count: Количество генерируемых паролей.
+        :param length: Длина генерируемых паролей.
+        :param rng: Генератор случайных чисел numpy.random.Generator.
+        :return: Массив uint32 формы (count, ширина) с кодами символов.
+        """
+        starts = self.start_states[rng.integers(len(self.start_states), size=count)]
+        positions = self.prefix_lengths[starts]
+        width = max(length, int(positions.max()) if count else 0, 1)
+        buffer = np.zeros((count, width), dtype=np.uint32)
+        prefix_width = min(self.prefix_codepoints.shape[1], width)
+        buffer[:, :prefix_width] = self.prefix_codepoints[starts, :prefix_width]
+
+        states = starts.copy()
+        active = np.flatnonzero(positions < length)
+        while active.size:
+            transitions = self.sample_transitions(states[active], rng)
+            buffer[active, positions[active]] = self.codepoints[transitions]
+            positions[active] += 1
+            following = self.next_state[transitions]
+            states[active] = following
+            active = active[(following >= 0) & (positions[active] < length)]
+        return buffer
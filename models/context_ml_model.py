@@ -0,0 +1,266 @@
+# models/context_ml_model.py
+
+from sklearn.neural_network import MLPClassifier
+from scipy import sparse
+import joblib
+import logging
+import numpy as np
+from .base_password_model import BasePasswordModel, unpack_candidates
+from .mlp_inference import ACTIVATIONS, mlp_forward, cumulative_distribution, sample_columns
+from .minibatch_training import MinibatchTrainer, rebatch, fit_repeated
+from utils.wordlist import iter_wordlist_chunks
+
+# Индекс служебного символа начала пароля (дополнение контекста)
+PAD_INDEX = 0
+
+
+class ContextMLPasswordModel(BasePasswordModel):
+    """
+    Модель паролей на основе MLP с контекстом из нескольких предыдущих символов.
+
+    Контекст кодируется целочисленными индексами символов; на вход
+    классификатора подаётся разреженная one-hot матрица, в каждой строке
+    которой ровно context_size ненулевых элементов, поэтому память растёт
+    линейно по числу примеров. Обучение идёт минипартиями через partial_fit
+    по потоку паролей из файла (см. MinibatchTrainer). При выводе первый слой вычисляется как сумма
+    строк весов по индексам контекста (эмбеддинги).
+    """
+
+    def __init__(self, context_size=4, hidden_layer_sizes=(128,), batch_size=4096,
+                 sampling='sample', temperature=1.0, top_k=None):
+        """
+        Инициализирует модель.
+
+        :param context_size: Количество предыдущих символов, от которых зависит следующий.
+        :param hidden_layer_sizes: Размеры скрытых слоёв MLP.
+        :param batch_size: Размер минипартии обучения.
+        :param sampling: Способ выбора следующего символа: 'sample' или 'argmax'.
+        :param temperature: Температура выборки в режиме 'sample'.
+        :param top_k: Выборка только из top_k наиболее вероятных символов.
+        """
+        super().__init__()
+        self.context_size = context_size
+        self.batch_size = batch_size
+        self.model = MLPClassifier(hidden_layer_sizes=hidden_layer_sizes, random_state=42)
+        self.alphabet = np.zeros(0, dtype=np.uint32)
+        self.sampling = sampling
+        self.temperature = temperature
+        self.top_k = top_k
+        self.version = "1.0"
+        self.rng = np.random.default_rng()
+
+    @property
+    def vocabulary_size(self):
+        """
+        Размер словаря индексов с учётом служебного символа начала пароля.
+        """
+        return len(self.alphabet) + 1
+
+    def build_vocabulary(self, file_path, encoding='utf-8'):
+        """
+        Собирает алфавит символов за один потоковый проход по словарю.
+
+        :param file_path: Путь к файлу словаря.
+        :param encoding: Кодировка файла.
+        """
+        chars = set()
+        for passwords, _ in iter_wordlist_chunks(file_path, encoding=encoding):
+            for password in passwords:
+                chars.update(password)
+        chars.discard('\0')
+        self.alphabet = np.array(sorted(ord(c) for c in chars), dtype=np.uint32)
+        logging.info(f"Уникальных символов: {len(self.alphabet)}")
+
+    def encode_passwords(self, passwords):
+        """
+        Преобразует пароли в примеры (контекст, следующий символ).
+
+        Перед каждым паролем добавляются context_size служебных символов,
+        поэтому окна не пересекают границы паролей. Символы вне алфавита
+        не используются как цели и заменяются служебным символом в контексте.
+
+        :param passwords: Список паролей.
+        :return: Кортеж (контексты int32 формы (n, context_size), цели int32 формы (n,)).
+        """
+        k = self.context_size
+        padding = '\0' * k
+        text = padding + padding.join(passwords)
+        codepoints = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+        positions = np.searchsorted(self.alphabet, codepoints)
+        positions = np.minimum(positions, max(len(self.alphabet) - 1, 0))
+        known = (self.alphabet[positions] == codepoints) if len(self.alphabet) else np.zeros(len(codepoints), bool)
+        tokens = np.where(known, positions + 1, PAD_INDEX).astype(np.int32)
+
+        windows = np.lib.stride_tricks.sliding_window_view(tokens, k + 1)
+        targets = windows[:, k]
+        mask = targets != PAD_INDEX
+        return np.ascontiguousarray(windows[mask, :k]), np.ascontiguousarray(targets[mask])
+
+    def to_sparse(self, contexts):
+        """
+        Кодирует контексты разреженной one-hot матрицей.
+
+        :param contexts: Массив индексов формы (n, context_size).
+        :return: scipy.sparse.csr_matrix формы (n, context_size * vocabulary_size).
+        """
+        n, k = contexts.shape
+        columns = (contexts + np.arange(k, dtype=np.int64) * self.vocabulary_size).ravel()
+        indptr = np.arange(0, n * k + 1, k, dtype=np.int64)
+        data = np.ones(n * k, dtype=np.float32)
+        return sparse.csr_matrix((data, columns, indptr), shape=(n, k * self.vocabulary_size))
+
+    def partial_fit(self, contexts, targets):
+        """
+        Выполняет один шаг обучения на минипартии.
+
+        :param contexts: Массив индексов контекстов формы (n, context_size).
+        :param targets: Индексы следующих символов.
+        :return: Значение функции потерь на минипартии.
+        """
+        self.model.partial_fit(self.to_sparse(contexts), targets, classes=np.arange(1, self.vocabulary_size))
+        return self.model.loss_
+
+    def train_from_file(self, file_path, epochs=3, encoding='utf-8', progress_callback=None,
+                        patience=2, tol=1e-4, checkpoint_path=None, resume=False, shuffle_buffer=1 << 20,
+                        seed=None):
+        """
+        Обучает модель на словаре минипартиями, не загружая его в память.
+
+        :param file_path: Путь к файлу словаря.
+        :param epochs: Максимальное количество проходов по словарю.
+        :param encoding: Кодировка файла.
+        :param progress_callback: Функция, принимающая словарь со статистикой чтения.
+        :param patience: Количество эпох без улучшения потерь до досрочной остановки.
+        :param tol: Минимальное улучшение средних потерь эпохи.
+        :param checkpoint_path: Путь к контрольной точке, сохраняемой после каждой эпохи.
+        :param resume: Продолжить обучение с контрольной точки, если она существует.
+        :param shuffle_buffer: Размер буфера перемешивания примеров; 0 — порядок файла.
+        :param seed: Зерно перемешивания или None.
+        :return: Список средних потерь по эпохам.
+        """
+        trainer = MinibatchTrainer(self, epochs, self.batch_size, patience, tol, checkpoint_path,
+                                   shuffle_buffer, seed)
+        if not (resume and trainer.resume()):
+            if not len(self.alphabet):
+                self.build_vocabulary(file_path, encoding)
+            if not len(self.alphabet):
+                raise ValueError("Словарь не содержит паролей для обучения.")
+        return trainer.fit_file(file_path, encoding, progress_callback)
+
+    def update_model(self, new_passwords):
+        """
+        Дообучает модель новыми паролями (символы вне алфавита игнорируются).
+
+        :param new_passwords: Список новых паролей.
+        """
+        if not hasattr(self.model, "classes_"):
+            raise ValueError("Модель не была обучена.")
+        for contexts, targets in rebatch([self.encode_passwords(new_passwords)], self.batch_size):
+            self.partial_fit(contexts, targets)
+        logging.info("Контекстная ML модель успешно дообучена с новыми данными.")
+
+    def reinforce(self, passwords, weight=10):
+        """
+        Дообучает модель на найденных паролях, повторяя их weight раз.
+
+        :param passwords: Список паролей.
+        :param weight: Вес паролей (количество проходов).
+        """
+        if not hasattr(self.model, "classes_"):
+            raise ValueError("Модель не была обучена.")
+        fit_repeated(self, passwords, weight, self.batch_size)
+
+    def predict_proba(self, contexts):
+        """
+        Вычисляет распределения следующего символа для партии контекстов.
+
+        Первый слой вычисляется как сумма строк весов по индексам контекста,
+        без построения one-hot матрицы.
+
+        :param contexts: Массив индексов формы (n, context_size).
+        :return: Матрица вероятностей формы (n, число классов); столбцы соответствуют model.classes_.
+        """
+        coefs, intercepts = self.model.coefs_, self.model.intercepts_
+        columns = contexts + np.arange(self.context_size, dtype=np.int64) * self.vocabulary_size
+        first_layer = coefs[0][columns].sum(axis=1) + intercepts[0]
+        return mlp_forward(first_layer, coefs, intercepts, ACTIVATIONS[self.model.activation],
+                           self.model.out_activation_)
+
+    def generate_batch(self, count, length=8):
+        """
+        Генерирует партию паролей, продвигая все цепочки синхронно.
+
+        :param count: Количество генерируемых паролей.
+        :param length: Длина генерируемых паролей.
+        :return: Массив uint32 формы (count, length) с кодами символов.
+        """
+        if not hasattr(self.model, "classes_"):
+            raise ValueError("Модель не была обучена.")
+        classes = np.asarray(self.model.classes_, dtype=np.int64)
+        buffer = np.zeros((count, max(length, 1)), dtype=np.uint32)
+        contexts = np.full((count, self.context_size), PAD_INDEX, dtype=np.int64)
+        for position in range(length if count else 0):
+            proba = self.predict_proba(contexts)
+            if self.sampling == 'argmax':
+                next_tokens = classes[np.argmax(proba, axis=1)]
+            else:
+                cumulative = cumulative_distribution(proba, self.temperature, self.top_k)
+                next_tokens = classes[sample_columns(cumulative, self.rng)]
+            buffer[:, position] = self.alphabet[next_tokens - 1]
+            contexts[:, :-1] = contexts[:, 1:]
+            contexts[:, -1] = next_tokens
+        return buffer
+
+    def generate_password(self, length=8):
+        """
+        Генерирует пароль заданной длины.
+
+        :param length: Длина генерируемого пароля.
+        :return: Сгенерированный пароль в виде строки.
+        """
+        return unpack_candidates(self.generate_batch(1, length))[0]
+
+    def save_model(self, file_path, version=None):
+        """
+        Сохраняет модель и её параметры в один файл.
+
+        :param file_path: Путь к файлу для сохранения модели.
+        :param version: Версия модели.
+        """
+        try:
+            joblib.dump({
+                'version': version or self.version,
+                'model': self.model,
+                'context_size': self.context_size,
+                'batch_size': self.batch_size,
+                'alphabet': self.alphabet,
+                'sampling': self.sampling,
+                'temperature': self.temperature,
+                'top_k': self.top_k
+            }, file_path)
+            logging.info(f"Модель сохранена в {file_path}.")
+        except Exception as e:
+            logging.error(f"Ошибка при сохранении модели: {e}")
+            raise
+
+    def load_model(self, file_path):
+        """
+        Загружает модель из файла.
+
+        :param file_path: Путь к файлу модели.
+        """
+        try:
+            data = joblib.load(file_path)
+            self.version = data.get('version', '1.0')
+            self.model = data['model']
+            self.context_size = data['context_size']
+            self.batch_size = data.get('batch_size', self.batch_size)
+            self.alphabet = data['alphabet']
+            self.sampling = data.get('sampling', self.sampling)
+            self.temperature = data.get('temperature', self.temperature)
+            self.top_k = data.get('top_k', self.top_k)
+            logging.info(f"Модель загружена из {file_path}.")
+        except Exception as e:
+            logging.error(f"Ошибка при загрузке модели: {e}")
+            raise
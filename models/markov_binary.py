@@ -0,0 +1,132 @@
+# models/markov_binary.py
+import mmap
+import os
+import struct
+import numpy as np
+from .compiled_markov import CompiledMarkovTables
+
+MAGIC = b'LQMK'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Заголовок: сигнатура, версия формата, N, число состояний, число переходов,
+# ширина префикса, число секций, версия модели (UTF-8, до VERSION_BYTES байт)
+VERSION_BYTES = 32
+HEADER = struct.Struct(f'<4sIIQQII{VERSION_BYTES}s')
+SECTION = struct.Struct('<QQ')
+
+# Секции файла: имя, тип элементов и функция формы по (состояния, переходы, ширина префикса)
+SECTIONS = (
+    ('prefix_lengths', np.int32, lambda s, t, w: (s,)),
+    ('prefix_codepoints', np.uint32, lambda s, t, w: (s, w)),
+    ('start_states', np.int32, None),
+    ('offsets', np.int64, lambda s, t, w: (s + 1,)),
+    ('codepoints', np.uint32, lambda s, t, w: (t,)),
+    ('probs', np.float64, lambda s, t, w: (t,)),
+    ('cum_probs', np.float64, lambda s, t, w: (t,)),
+    ('alias_prob', np.float64, lambda s, t, w: (t,)),
+    ('alias_index', np.int32, lambda s, t, w: (t,)),
+    ('next_state', np.int32, lambda s, t, w: (t,)),
+    ('counts', np.float64, lambda s, t, w: (t,)),
+)
+
+
+def is_binary_model(file_path):
+    """
+    Проверяет, записан ли файл в бинарном формате модели.
+
+    :param file_path: Путь к файлу.
+    :return: True, если файл начинается с сигнатуры формата.
+    """
+    with open(file_path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def save_tables(file_path, tables, counts, n, version):
+    """
+    Записывает скомпилированные таблицы в бинарный файл плоскими секциями.
+
+    Каждая секция выровнена по 64 байтам, поэтому при загрузке массивы
+    отображаются прямо на страницы файла без копирования.
+
+    :param file_path: Путь к файлу.
+    :param tables: Экземпляр CompiledMarkovTables.
+    :param counts: Сырые количества переходов (float64, в порядке переходов таблиц).
+    :param n: Размер N-грамм модели.
+    :param version: Версия модели (не длиннее VERSION_BYTES байт в UTF-8).
+    """
+    encoded_version = str(version).encode('utf-8')
+    if len(encoded_version) > VERSION_BYTES:
+        raise ValueError(f"Версия модели длиннее {VERSION_BYTES} байт в UTF-8: {version}")
+    arrays = {name: getattr(tables, name) for name in CompiledMarkovTables.ARRAYS}
+    arrays['counts'] = counts
+
+    header_size = HEADER.size + SECTION.size * len(SECTIONS)
+    position = _align(header_size)
+    entries = []
+    for name, dtype, _ in SECTIONS:
+        data = np.ascontiguousarray(arrays[name], dtype=dtype)
+        entries.append((position, data))
+        position = _align(position + data.nbytes)
+
+    # Файл может быть отображён в память этим или другими процессами: перезапись
+    # на месте обрезала бы отображение, поэтому пишем во временный файл и подменяем
+    temp_path = f"{file_path}.tmp{os.getpid()}"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, n, tables.num_states, len(tables.codepoints),
+                                tables.prefix_codepoints.shape[1], len(SECTIONS), encoded_version))
+            for offset, data in entries:
+                f.write(SECTION.pack(offset, data.nbytes))
+            for offset, data in entries:
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(data.tobytes())
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def load_tables(file_path):
+    """
+    Отображает бинарный файл модели в память.
+
+    Массивы ссылаются на страницы отображения, поэтому загрузка не зависит
+    от размера модели, а несколько процессов, открывших один файл,
+    разделяют одни и те же физические страницы.
+
+    :param file_path: Путь к файлу.
+    :return: Кортеж (CompiledMarkovTables, сырые количества переходов, N, версия модели).
+    """
+    with open(file_path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, format_version, n, num_states, num_transitions, width, num_sections, version = \
+            HEADER.unpack_from(mapping, 0)
+    except struct.error:
+        raise ValueError("Ошибка при загрузке модели: файл повреждён или несовместим.")
+    if magic != MAGIC or format_version != FORMAT_VERSION or num_sections != len(SECTIONS):
+        raise ValueError("Ошибка при загрузке модели: файл повреждён или несовместим.")
+
+    arrays = {}
+    for index, (name, dtype, shape) in enumerate(SECTIONS):
+        offset, nbytes = SECTION.unpack_from(mapping, HEADER.size + SECTION.size * index)
+        if offset + nbytes > len(mapping):
+            raise ValueError("Ошибка при загрузке модели: файл повреждён или несовместим.")
+        count = nbytes // np.dtype(dtype).itemsize
+        array = np.frombuffer(mapping, dtype=dtype, count=count, offset=offset)
+        arrays[name] = array.reshape(shape(num_states, num_transitions, width)) if shape else array
+
+    tables = CompiledMarkovTables.from_arrays(arrays, source_path=file_path)
+    # Файлы прежних версий могли сохранить версию, обрезанную посреди символа
+    return tables, arrays['counts'], n, version.rstrip(b'\0').decode('utf-8', 'ignore')
+
+
+def _align(position):
+    """
+    Округляет смещение вверх до границы выравнивания секций.
+
+    :param position: Смещение в байтах.
+    :return: Выровненное смещение.
+    """
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -0,0 +1,198 @@
+# models/markov_enumerator.py
+import numpy as np
+
+
+class MarkovEnumerator:
+    """
+    Перебор паролей марковской модели в порядке убывания вероятности.
+
+    Вероятности переходов переводятся в целочисленные уровни
+    (``floor(-ln(p) / level_step)``), как в OMEN. Пароли перечисляются по
+    возрастанию суммарного уровня, то есть примерно по убыванию вероятности;
+    внутри уровня — поиском в глубину с отсечением по минимальной стоимости
+    оставшегося пути. Память ограничена длиной пароля, а позицию перебора
+    можно сохранить методом checkpoint() и продолжить с неё позднее.
+    """
+
+    def __init__(self, tables, length, level_step=1.0, max_level=None, checkpoint=None):
+        """
+        Инициализирует перебор.
+
+        :param tables: Экземпляр CompiledMarkovTables.
+        :param length: Длина перечисляемых паролей.
+        :param level_step: Ширина уровня в единицах -ln(p).
+        :param max_level: Максимальный суммарный уровень; по умолчанию — без ограничения.
+        :param checkpoint: Словарь, полученный из checkpoint(), для продолжения перебора.
+        """
+        self.tables = tables
+        self.length = length
+        self.level_step = level_step
+
+        levels = np.floor(-np.log(tables.probs) / level_step)
+        self.levels = np.maximum(levels, 0).astype(np.int64)
+
+        lengths = tables.prefix_lengths[tables.start_states]
+        self.starts = tables.start_states[lengths <= length].tolist()
+        self.max_steps = max((length - int(tables.prefix_lengths[s]) for s in self.starts), default=0)
+        self.min_cost = self._build_min_cost()
+
+        if max_level is None:
+            max_level = self.max_steps * int(self.levels.max()) if len(self.levels) else 0
+        self.max_level = max_level
+
+        self._level = 0
+        self._start_index = 0
+        self._path = []
+        self.emitted = 0
+        if checkpoint is not None:
+            self._restore(checkpoint)
+
+    def _build_min_cost(self):
+        """
+        Вычисляет минимальную стоимость (в уровнях) k оставшихся шагов из каждого состояния.
+
+        :return: Список списков: min_cost[k][состояние].
+        """
+        tables = self.tables
+        unreachable = np.iinfo(np.int64).max // 4
+        min_cost = [np.zeros(tables.num_states, dtype=np.int64)]
+        if not tables.num_states:
+            return [row.tolist() for row in min_cost]
+        starts = tables.offsets[:-1]
+        for steps in range(1, self.max_steps + 1):
+            if steps == 1:
+                cost = self.levels
+            else:
+                previous = min_cost[-1]
+                cost = np.where(tables.next_state >= 0,
+                                self.levels + previous[np.maximum(tables.next_state, 0)],
+                                unreachable)
+            min_cost.append(np.minimum(np.minimum.reduceat(cost, starts), unreachable))
+        return [row.tolist() for row in min_cost]
+
+    def checkpoint(self):
+        """
+        Возвращает позицию перебора после последнего выданного пароля.
+
+        :return: Словарь, пригодный для сериализации в JSON.
+        """
+        return {
+            'length': self.length,
+            'level_step': self.level_step,
+            'num_transitions': len(self.levels),
+            'level': self._level,
+            'start_index': self._start_index,
+            'path': list(self._path),
+            'emitted': self.emitted,
+        }
+
+    def _restore(self, checkpoint):
+        """
+        Восстанавливает позицию перебора из контрольной точки.
+
+        :param checkpoint: Словарь, полученный из checkpoint().
+        """
+        if (checkpoint.get('length') != self.length
+                or checkpoint.get('level_step') != self.level_step
+                or checkpoint.get('num_transitions') != len(self.levels)):
+            raise ValueError("Контрольная точка не соответствует модели или параметрам перебора.")
+        self._level = checkpoint['level']
+        self._start_index = checkpoint['start_index']
+        self._path = list(checkpoint['path'])
+        self.emitted = checkpoint.get('emitted', 0)
+
+    def __iter__(self):
+        """
+        Перечисляет пароли, начиная с сохранённой позиции.
+
+        :return: Итератор паролей.
+        """
+        resume = self._path
+        start_index = self._start_index
+        for level in range(self._level, self.max_level + 1):
+            for index in range(start_index, len(self.starts)):
+                state = self.starts[index]
+                for path in self._walk(state, level, resume):
+                    self._level, self._start_index, self._path = level, index, path
+                    self.emitted += 1
+                    yield self._format(state, path)
+                resume = []
+            start_index = 0
+
+    def _walk(self, state, level, resume):
+        """
+        Перебирает в глубину пути из состояния с суммарным уровнем ровно level.
+
+        :param state: Начальное состояние.
+        :param level: Требуемый суммарный уровень.
+        :param resume: Путь последнего выданного пароля (продолжить после него) или [].
+        :return: Итератор списков индексов переходов.
+        """
+        steps = self.length - int(self.tables.prefix_lengths[state])
+        if steps == 0:
+            if level == 0 and not resume:
+                yield []
+            return
+        if self.min_cost[steps][state] > level:
+            return
+
+        offsets = self.tables.offsets
+        levels = self.levels
+        next_state = self.tables.next_state
+        min_cost = self.min_cost
+
+        if resume:
+            path = list(resume)
+            states = [state]
+            spent = [0]
+            for transition in path[:-1]:
+                spent.append(spent[-1] + int(levels[transition]))
+                states.append(int(next_state[transition]))
+        else:
+            path = [int(offsets[state]) - 1]
+            states = [state]
+            spent = [0]
+
+        depth = len(path) - 1
+        while depth >= 0:
+            remaining = steps - depth - 1
+            transition = path[depth] + 1
+            end = int(offsets[states[depth] + 1])
+            while transition < end:
+                cost = spent[depth] + int(levels[transition])
+                if remaining == 0:
+                    if cost == level:
+                        break
+                else:
+                    following = int(next_state[transition])
+                    if following >= 0 and cost + min_cost[remaining][following] <= level:
+                        break
+                transition += 1
+
+            if transition >= end:
+                path.pop()
+                states.pop()
+                spent.pop()
+                depth -= 1
+                continue
+
+            path[depth] = transition
+            if remaining == 0:
+                yield list(path)
+            else:
+                following = int(next_state[transition])
+                path.append(int(offsets[following]) - 1)
+                states.append(following)
+                spent.append(spent[depth] + int(levels[transition]))
+                depth += 1
+
+    def _format(self, state, path):
+        """
+        Собирает пароль из префикса начального состояния и пути переходов.
+
+        :param state: Начальное состояние.
+        :param path: Список индексов переходов.
+        :return: Пароль в виде строки.
+        """
+        codepoints = self.tables.codepoints
+        return self.tables.prefix_of(state) + ''.join(chr(codepoints[t]) for t in path)
@@ -1,8 +1,21 @@
 # models/markov_model.py
+import concurrent.futures
+import multiprocessing
 import pickle
 from collections import defaultdict, Counter
-import random
-from .base_password_model import BasePasswordModel
+import numpy as np
+from .base_password_model import PROCESS_START_METHOD, BasePasswordModel
+from .compiled_markov import CompiledMarkovTables
+from .markov_enumerator import MarkovEnumerator
+from .markov_binary import is_binary_model, save_tables, load_tables
+from .markov_pruning import count_transitions, backoff_tables, prune_table, limit_transitions
+from .markov_training import (count_ngrams, add_ngram_counts, split_file_ranges, count_file_range,
+                              reduce_count_tables, from_count_table)
+from utils.wordlist import iter_wordlist_chunks, WordlistProgress
+
+# Минимальное количество кусков словаря на процесс подсчёта: для меньших
+# словарей запуск пула процессов дороже самого подсчёта
+MIN_CHUNKS_PER_WORKER = 4
 
 
 class MarkovModel(BasePasswordModel):
@@ -10,50 +23,394 @@ class MarkovModel(BasePasswordModel):
     Модель паролей на основе цепей Маркова.
     """
 
+    # Расширение файлов бинарного формата модели
+    BINARY_EXTENSION = '.lqm'
+
     def __init__(self, passwords=None, n=3):
         """
         Инициализирует модель с заданным набором паролей и размером N-грамм.
 
+        Пароли не сохраняются в модели: хранятся только количества переходов.
+
         :param passwords: Список паролей для обучения модели.
         :param n: Размер N-грамм.
         """
-        self.passwords = passwords if passwords is not None else []
         self.n = n
-        self.markov_model = defaultdict(Counter)
+        self._lazy_counts = None
+        self.counts = defaultdict(Counter)
+        self._probabilities = {}
+        self._dirty = set()
         self.version = "1.0"
-        if self.passwords:
-            self.build_model()
+        self.rng = np.random.default_rng()
+        self._compiled = None
+        if passwords:
+            self.build_model(passwords)
             self.normalize_model()
+            self.compile()
+
+    @property
+    def counts(self):
+        """
+        Сырые количества переходов {префикс: Counter({символ: количество})}.
+
+        После загрузки бинарного файла словари строятся только при первом
+        обращении (например, при дообучении).
+        """
+        if self._lazy_counts is not None:
+            self._materialize_counts()
+        return self._counts
+
+    @counts.setter
+    def counts(self, table):
+        """
+        Заменяет сырые количества переходов.
+
+        :param table: Таблица вида defaultdict(Counter).
+        """
+        self._counts = table
+        self._lazy_counts = None
+
+    def _materialize_counts(self):
+        """
+        Строит словари количеств и вероятностей из скомпилированных таблиц,
+        загруженных из бинарного файла.
+        """
+        tables, raw_counts = self._compiled, self._lazy_counts.tolist()
+        self._lazy_counts = None
+        offsets = tables.offsets.tolist()
+        chars = [chr(c) for c in tables.codepoints.tolist()]
+        counts = defaultdict(Counter)
+        probabilities = {}
+        for state, prefix in enumerate(tables.prefixes):
+            transitions = range(offsets[state], offsets[state + 1])
+            counts[prefix] = Counter({chars[t]: raw_counts[t] for t in transitions})
+            total = sum(raw_counts[t] for t in transitions)
+            probabilities[prefix] = {chars[t]: raw_counts[t] / total for t in transitions}
+        self._counts = counts
+        self._probabilities = probabilities
+        self._dirty = set()
+
+    def _is_built(self):
+        """
+        Проверяет, построена ли модель, не разворачивая лениво загруженные таблицы.
+
+        :return: True, если модель содержит переходы.
+        """
+        return self._compiled is not None or bool(self.markov_model)
+
+    def __getstate__(self):
+        """
+        При передаче модели, загруженной из бинарного файла, в другой процесс
+        количества передаются путём к файлу, а не копией массива.
+        """
+        state = self.__dict__.copy()
+        if self._lazy_counts is not None and self._compiled.source_path is not None:
+            state['_lazy_counts'] = self._compiled.source_path
+        return state
 
-    def generate_ngrams(self):
+    def __setstate__(self, state):
         """
-        Генерирует N-граммы из списка паролей.
+        Восстанавливает модель после передачи между процессами.
 
-        :return: Список N-грамм.
+        :param state: Состояние, полученное из __getstate__.
         """
-        ngrams = []
-        for password in self.passwords:
-            for i in range(len(password) - self.n + 1):
-                ngrams.append(password[i:i + self.n])
-        return ngrams
+        if isinstance(state.get('_lazy_counts'), str):
+            state['_lazy_counts'] = load_tables(state['_lazy_counts'])[1]
+        self.__dict__.update(state)
 
-    def build_model(self):
+    @property
+    def markov_model(self):
         """
-        Строит модель цепей Маркова на основе N-грамм.
+        Вероятностное представление модели {префикс: {символ: вероятность}}.
+
+        Строится лениво из сырых количеств: перед выдачей пересчитываются
+        только префиксы, изменившиеся с последней нормализации.
         """
-        ngrams = self.generate_ngrams()
-        for ngram in ngrams:
-            prefix, next_char = ngram[:-1], ngram[-1]
-            self.markov_model[prefix][next_char] += 1
+        if self._lazy_counts is not None:
+            self._materialize_counts()
+        if self._dirty:
+            self.normalize_model()
+        return self._probabilities
+
+    @markov_model.setter
+    def markov_model(self, table):
+        """
+        Заменяет таблицы модели; значения используются как веса переходов.
+
+        :param table: Таблица вида {префикс: {символ: вес}}.
+        """
+        self.counts = defaultdict(Counter, {prefix: Counter(next_chars) for prefix, next_chars in table.items()})
+        self._probabilities = {}
+        self._dirty = set(self.counts)
+        self._compiled = None
+
+    def _add_counts(self, ngram_counts, weight=1):
+        """
+        Добавляет количества N-грамм и помечает затронутые префиксы для нормализации.
+
+        :param ngram_counts: Отображение {N-грамма: количество}.
+        :param weight: Множитель для добавляемых количеств.
+        """
+        self._dirty |= add_ngram_counts(self.counts, ngram_counts, weight)
+        self._compiled = None
+
+    def build_model(self, passwords):
+        """
+        Строит модель цепей Маркова на основе N-грамм паролей.
+
+        :param passwords: Список паролей.
+        """
+        self._add_counts(count_ngrams(passwords, self.n))
+
+    def train_from_file(self, file_path, chunk_bytes=1 << 20, encoding='utf-8', progress_callback=None,
+                        num_workers=1, max_transitions=None):
+        """
+        Обучает модель на словаре, читая его кусками.
+
+        Пароли не сохраняются в памяти: N-граммы каждого куска подсчитываются
+        и сразу добавляются в таблицы переходов, поэтому память зависит только
+        от размера модели. Текущие таблицы заменяются.
+
+        При num_workers > 1 файл делится на диапазоны байтов, которые
+        подсчитываются в пуле процессов в компактные таблицы количеств; таблицы
+        объединяются древовидным слиянием. Каждому процессу должно достаться не
+        меньше MIN_CHUNKS_PER_WORKER кусков, поэтому для небольших словарей
+        процессов меньше, а словарь меньше двух таких долей подсчитывается в
+        текущем процессе.
+
+        При заданном max_transitions память таблиц ограничена: когда число
+        переходов превышает бюджет вдвое, редкие переходы отбрасываются, а
+        после обучения модель прореживается до бюджета (см. prune).
+
+        :param file_path: Путь к файлу словаря.
+        :param chunk_bytes: Примерный размер читаемого куска в байтах.
+        :param encoding: Кодировка файла.
+        :param progress_callback: Функция, принимающая словарь со статистикой
+                                  (прочитано байтов и строк, скорость, процент).
+        :param num_workers: Максимальное количество процессов для подсчёта N-грамм.
+        :param max_transitions: Бюджет количества переходов или None.
+        :return: Итоговая статистика обучения.
+        """
+        try:
+            progress = WordlistProgress.for_file(file_path, progress_callback)
+            num_workers = min(num_workers, progress.total_bytes // (MIN_CHUNKS_PER_WORKER * chunk_bytes))
+            self.markov_model = {}
+            if num_workers > 1:
+                self._count_file_parallel(file_path, chunk_bytes, encoding, progress, num_workers)
+                self._bound_counts(max_transitions)
+            else:
+                for passwords, bytes_read in iter_wordlist_chunks(file_path, chunk_bytes, encoding=encoding):
+                    self._add_counts(count_ngrams(passwords, self.n))
+                    self._bound_counts(max_transitions)
+                    progress.update(len(passwords), bytes_read)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Файл словаря не найден: {file_path}")
+        if max_transitions is not None:
+            self.prune(max_transitions=max_transitions)
+        else:
+            self.normalize_model()
+            self.compile()
+        return progress.finish()
+
+    def _bound_counts(self, max_transitions):
+        """
+        Отбрасывает редкие переходы, если их число превысило бюджет вдвое.
+
+        :param max_transitions: Бюджет количества переходов или None.
+        """
+        if max_transitions is None or count_transitions(self._counts) <= 2 * max_transitions:
+            return
+        self._counts = limit_transitions(self._counts, max_transitions)
+        self._compiled = None
+
+    def _count_file_parallel(self, file_path, chunk_bytes, encoding, progress, num_workers):
+        """
+        Подсчитывает N-граммы словаря в пуле процессов и добавляет их в таблицы.
+
+        :param file_path: Путь к файлу словаря.
+        :param chunk_bytes: Примерный размер читаемого куска в байтах.
+        :param encoding: Кодировка файла.
+        :param progress: Экземпляр WordlistProgress.
+        :param num_workers: Количество процессов.
+        """
+        # Диапазонов больше, чем процессов, чтобы выровнять нагрузку
+        ranges = split_file_ranges(file_path, num_workers * 4)
+        context = multiprocessing.get_context(PROCESS_START_METHOD)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as executor:
+            futures = [executor.submit(count_file_range, file_path, start, end, self.n, chunk_bytes, encoding)
+                       for start, end in ranges]
+            tables = []
+            for future in concurrent.futures.as_completed(futures):
+                keys, counts, lines, bytes_read = future.result()
+                tables.append((keys, counts))
+                progress.update(lines, bytes_read)
+            merged = reduce_count_tables(tables, executor)
+        if merged is not None:
+            self._add_counts(from_count_table(*merged))
 
     def normalize_model(self):
         """
         Нормализует частоты переходов для вероятностного выбора следующего символа.
+
+        Сырые количества не изменяются; пересчитываются только префиксы,
+        затронутые с последней нормализации.
+        """
+        if not self._dirty:
+            return
+        for prefix in self._dirty:
+            next_chars = self.counts.get(prefix)
+            total = sum(next_chars.values()) if next_chars else 0
+            if total > 0:
+                self._probabilities[prefix] = {char: count / total for char, count in next_chars.items()}
+            else:
+                self._probabilities.pop(prefix, None)
+        self._dirty = set()
+        self._compiled = None
+
+    def compile(self):
+        """
+        Компилирует таблицы переходов в массивы NumPy для быстрой выборки.
+
+        :return: Экземпляр CompiledMarkovTables.
+        """
+        if not self.markov_model:
+            raise ValueError("Марковская модель не была построена.")
+        self._compiled = CompiledMarkovTables.from_transitions(self.markov_model)
+        return self._compiled
+
+    @property
+    def compiled(self):
+        """
+        Скомпилированные таблицы переходов; строятся при первом обращении.
+        """
+        if self._compiled is None:
+            self.compile()
+        return self._compiled
+
+    def sampler(self):
+        """
+        Возвращает модель только со скомпилированными таблицами, без сырых
+        количеств и вероятностей. Таблицы модели из бинарного файла
+        передаются в рабочие процессы путём к файлу.
+
+        :return: Экземпляр MarkovModel.
+        """
+        sampler = MarkovModel(n=self.n)
+        sampler.version = self.version
+        sampler._compiled = self.compiled
+        return sampler
+
+    def prune(self, top_k=None, min_prob=None, max_transitions=None, min_prefix_count=1, backoff=True,
+              holdout=None):
+        """
+        Прореживает таблицы переходов, ограничивая память модели.
+
+        Для каждого префикса остаются top_k самых частых следующих символов
+        и символы с вероятностью не ниже min_prob; префиксы, встретившиеся
+        реже min_prefix_count раз, удаляются. При заданном max_transitions
+        остаются самые частые переходы в пределах бюджета. При backoff=True
+        для суффиксов удалённых префиксов из полных таблиц выводятся таблицы
+        младших порядков (прореживаемые по тем же top_k и min_prob), и при
+        выборке контекст без префикса полного порядка переходит к самому
+        длинному известному суффиксу. Итоговое число переходов не превышает
+        max_transitions, а без него — числа переходов до прореживания
+        (таблица нулевого порядка сохраняется целиком).
+
+        Таблицы младших порядков выводятся из количеств полного порядка и при
+        дообучении через update_model не обновляются; повторный вызов prune
+        строит их заново.
+
+        :param top_k: Максимальное количество переходов на префикс или None.
+        :param min_prob: Минимальная вероятность перехода или None.
+        :param max_transitions: Бюджет количества переходов или None.
+        :param min_prefix_count: Минимальное количество появлений префикса.
+        :param backoff: Строить таблицы младших порядков.
+        :param holdout: Список паролей для оценки потери качества или None.
+        :return: Словарь со статистикой до и после прореживания (см. stats и evaluate).
+        """
+        if not self._is_built():
+            raise ValueError("Марковская модель не была построена.")
+        before = self.stats()
+        quality_before = self.evaluate(holdout) if holdout else None
+        order = self.n - 1
+        full = defaultdict(Counter, {prefix: next_chars for prefix, next_chars in self.counts.items()
+                                     if len(prefix) == order})
+        keep = {''}
+        table = prune_table(full, top_k, min_prob, min_prefix_count)
+        if max_transitions is not None:
+            table = limit_transitions(table, max_transitions)
+        if backoff:
+            removed = [prefix for prefix in full if prefix not in table]
+            table.update(prune_table(backoff_tables(full, order, removed), top_k, min_prob))
+        budget = max_transitions if max_transitions is not None else before['transitions']
+        table = limit_transitions(table, budget, keep)
+        if not table:
+            raise ValueError("После прореживания в модели не осталось переходов.")
+        self.counts = table
+        self._probabilities = {}
+        self._dirty = set(table)
+        self.normalize_model()
+        self.compile()
+        result = {'before': before, 'after': self.stats()}
+        if holdout:
+            result['quality_before'] = quality_before
+            result['quality_after'] = self.evaluate(holdout)
+        return result
+
+    def stats(self):
+        """
+        Возвращает размер модели.
+
+        Модель при этом не компилируется: для нескомпилированной модели
+        объём таблиц не известен.
+
+        :return: Словарь: количество состояний, переходов и объём
+                 скомпилированных таблиц в байтах (или None).
         """
-        for prefix, next_chars in self.markov_model.items():
-            total = sum(next_chars.values())
-            for char in next_chars:
-                next_chars[char] /= total
+        tables = self._compiled
+        if tables is None:
+            counts = self.counts
+            return {
+                'states': sum(1 for next_chars in counts.values() if next_chars),
+                'transitions': count_transitions(counts),
+                'compiled_bytes': None,
+            }
+        return {
+            'states': tables.num_states,
+            'transitions': len(tables.codepoints),
+            'compiled_bytes': tables.nbytes,
+        }
+
+    def evaluate(self, passwords, unseen_prob=1e-6):
+        """
+        Оценивает качество модели на отложенных паролях.
+
+        Символы после начального префикса оцениваются по таблицам модели;
+        отсутствующие переходы получают вероятность unseen_prob. Сравнение
+        оценок до и после прореживания показывает потерю качества.
+
+        :param passwords: Список паролей.
+        :param unseen_prob: Вероятность для отсутствующих переходов.
+        :return: Словарь: количество оценённых символов, доля символов с
+                 известным переходом (coverage), средний логарифм
+                 вероятности на символ и перплексия.
+        """
+        if not self._is_built():
+            raise ValueError("Марковская модель не была построена.")
+        tables = self.compiled
+        total, characters, found = 0.0, 0, 0
+        for password in passwords:
+            log_prob, scored, hits = tables.log_likelihood(password, unseen_prob)
+            total += log_prob
+            characters += scored
+            found += hits
+        mean = total / characters if characters else 0.0
+        return {
+            'characters': characters,
+            'coverage': found / characters if characters else 0.0,
+            'log_likelihood': mean,
+            'perplexity': float(np.exp(-mean)),
+        }
 
     def generate_password(self, length=8):
         """
@@ -62,79 +419,147 @@ class MarkovModel(BasePasswordModel):
         :param length: Длина генерируемого пароля.
         :return: Сгенерированный пароль в виде строки.
         """
-        if not self.markov_model:
+        if not self._is_built():
             raise ValueError("Марковская модель не была построена.")
-        start = random.choice(list(self.markov_model.keys()))
-        password = list(start)
-        for _ in range(length - len(start)):
-            current_prefix = ''.join(password[-(self.n - 1):])
-            if current_prefix in self.markov_model:
-                next_char = random.choices(
-                    list(self.markov_model[current_prefix].keys()),
-                    weights=self.markov_model[current_prefix].values()
-                )[0]
-                password.append(next_char)
-            else:
-                break
-        return ''.join(password)
+        return self.compiled.sample(length, self.rng)
+
+    def generate_batch(self, count, length=8):
+        """
+        Генерирует партию паролей, продвигая все цепочки по таблицам синхронно.
+
+        :param count: Количество генерируемых паролей.
+        :param length: Длина генерируемых паролей.
+        :return: Массив uint32 формы (count, ширина) с кодами символов.
+        """
+        if not self._is_built():
+            raise ValueError("Марковская модель не была построена.")
+        return self.compiled.sample_batch(count, length, self.rng)
+
+    def enumerate_passwords(self, length=8, level_step=1.0, max_level=None, checkpoint=None):
+        """
+        Перечисляет пароли заданной длины в порядке убывания вероятности модели.
 
-    def update_model(self, new_passwords):
+        :param length: Длина перечисляемых паролей.
+        :param level_step: Ширина уровня вероятности в единицах -ln(p).
+        :param max_level: Максимальный суммарный уровень перебора.
+        :param checkpoint: Контрольная точка для продолжения перебора.
+        :return: Экземпляр MarkovEnumerator (итерируемый, с методом checkpoint()).
+        """
+        if not self._is_built():
+            raise ValueError("Марковская модель не была построена.")
+        return MarkovEnumerator(self.compiled, length, level_step=level_step,
+                                max_level=max_level, checkpoint=checkpoint)
+
+    def update_model(self, new_passwords, weight=1):
         """
         Обновляет модель новыми паролями.
 
+        Подсчитываются только N-граммы новых паролей; вероятности
+        пересчитываются лениво и лишь для изменившихся префиксов.
+
         :param new_passwords: Список новых паролей.
+        :param weight: Вес новых паролей относительно уже учтённых.
         """
-        self.passwords.extend(new_passwords)
-        self.build_model()
-        self.normalize_model()
+        self._add_counts(count_ngrams(new_passwords, self.n), weight)
 
-    def generate_hashcat_rules(self, output_file):
+    def reinforce(self, passwords, weight=10):
         """
-        Генерирует правила для Hashcat и сохраняет их в указанный файл.
+        Усиливает найденные пароли: их N-граммы добавляются с весом weight,
+        так что вероятности соответствующих переходов растут.
 
-        :param output_file: Путь к файлу для сохранения правил.
+        :param passwords: Список паролей.
+        :param weight: Вес паролей относительно обучающих данных.
         """
-        with open(output_file, 'w') as f:
-            for prefix, next_chars in self.markov_model.items():
-                for next_char, weight in next_chars.items():
-                    rule = f'[{prefix}]{next_char} # weight: {weight}\n'
-                    f.write(rule)
+        self.update_model(passwords, weight)
 
     def save_model(self, file_path, version):
         """
-        Сохраняет модель Маркова в файл с помощью pickle.
+        Сохраняет модель Маркова в файл с помощью pickle или, для файлов
+        с расширением BINARY_EXTENSION, в компактном бинарном формате.
 
         :param file_path: Путь к файлу для сохранения модели.
         :param version: Версия модели.
         """
+        if str(file_path).endswith(self.BINARY_EXTENSION):
+            self.save_binary(file_path, version)
+            return
         try:
             with open(file_path, 'wb') as f:
                 pickle.dump({
                     'version': version,
-                    'passwords': self.passwords,
                     'n': self.n,
-                    'markov_model': self.markov_model
+                    'markov_model': self.markov_model,
+                    'counts': self.counts
                 }, f)
         except Exception as e:
             raise IOError(f"Не удалось сохранить модель: {e}")
 
+    def save_binary(self, file_path, version):
+        """
+        Сохраняет модель в версионированном бинарном формате: интернированные
+        префиксы, массивы переходов, вероятности и сырые количества хранятся
+        плоскими секциями.
+
+        :param file_path: Путь к файлу для сохранения модели.
+        :param version: Версия модели.
+        """
+        try:
+            tables = self.compiled
+            if self._lazy_counts is not None:
+                raw_counts = self._lazy_counts
+            else:
+                chars = [chr(c) for c in tables.codepoints.tolist()]
+                offsets = tables.offsets.tolist()
+                raw_counts = np.array([self.counts[prefix][chars[t]]
+                                       for state, prefix in enumerate(tables.prefixes)
+                                       for t in range(offsets[state], offsets[state + 1])], dtype=np.float64)
+            save_tables(file_path, tables, raw_counts, self.n, version)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise IOError(f"Не удалось сохранить модель: {e}")
+
+    def load_binary(self, file_path):
+        """
+        Загружает модель из бинарного файла, отображая его в память.
+
+        Таблицы для выборки готовы сразу; словари количеств строятся лениво.
+
+        :param file_path: Путь к файлу модели.
+        """
+        tables, raw_counts, n, version = load_tables(file_path)
+        self.n = n
+        self.version = version
+        self._counts = defaultdict(Counter)
+        self._probabilities = {}
+        self._dirty = set()
+        self._compiled = tables
+        self._lazy_counts = raw_counts
+
     def load_model(self, file_path):
         """
-        Загружает модель Маркова из файла с помощью pickle.
+        Загружает модель Маркова из файла: бинарного формата (через mmap)
+        или pickle.
 
         :param file_path: Путь к файлу для загрузки модели.
         """
         try:
+            if is_binary_model(file_path):
+                self.load_binary(file_path)
+                return
             with open(file_path, 'rb') as f:
                 data = pickle.load(f)
+                # Список паролей в файлах старых версий не используется: модель хранит только количества
                 self.version = data.get('version', '1.0')
-                self.passwords = data['passwords']
                 self.n = data['n']
-                self.markov_model = data['markov_model']
+                # В файлах старых версий сырых количеств нет: вероятности служат весами
+                self.markov_model = data.get('counts') or data['markov_model']
         except FileNotFoundError:
             raise FileNotFoundError(f"Файл модели не найден: {file_path}")
         except pickle.UnpicklingError:
             raise ValueError("Ошибка при загрузке модели: файл повреждён или несовместим.")
+        except ValueError:
+            raise
         except KeyError as e:
             raise KeyError(f"Отсутствует необходимый ключ в данных модели: {e}")
         except Exception as e:
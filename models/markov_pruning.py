@@ -0,0 +1,105 @@
+# models/markov_pruning.py
+from collections import defaultdict, Counter
+import numpy as np
+
+
+def count_transitions(table):
+    """
+    Подсчитывает количество переходов в таблице.
+
+    :param table: Таблица вида {префикс: Counter({символ: количество})}.
+    :return: Количество пар (префикс, символ).
+    """
+    return sum(len(next_chars) for next_chars in table.values())
+
+
+def backoff_tables(table, order, contexts=None):
+    """
+    Выводит таблицы переходов младших порядков из таблицы полного порядка.
+
+    Количества переходов префикса длины order добавляются ко всем его
+    суффиксам (от order - 1 символов до пустой строки), так что таблица
+    порядка m содержит частоты следующего символа после m последних
+    символов.
+
+    :param table: Таблица вида {префикс: Counter({символ: количество})}.
+    :param order: Длина префиксов полного порядка (N - 1).
+    :param contexts: Префиксы полного порядка, для суффиксов которых строятся
+                     таблицы, или None — таблицы строятся для всех суффиксов.
+    :return: defaultdict(Counter) с префиксами длиной от 0 до order - 1.
+    """
+    needed = None
+    if contexts is not None:
+        needed = {context[order - length:] for context in contexts for length in range(order)}
+    lower = defaultdict(Counter)
+    for prefix, next_chars in table.items():
+        if len(prefix) != order:
+            continue
+        for length in range(order):
+            suffix = prefix[order - length:]
+            if needed is None or suffix in needed:
+                lower[suffix].update(next_chars)
+    return lower
+
+
+def prune_table(table, top_k=None, min_prob=None, min_prefix_count=1, keep=()):
+    """
+    Оставляет для каждого префикса только наиболее вероятные переходы.
+
+    Префиксы, встретившиеся реже min_prefix_count раз, удаляются целиком
+    (при выборке для них используется таблица младшего порядка). Если
+    порог min_prob отсекает все переходы префикса, остаётся самый частый.
+
+    :param table: Таблица вида {префикс: Counter({символ: количество})}.
+    :param top_k: Максимальное количество переходов на префикс или None.
+    :param min_prob: Минимальная вероятность перехода или None.
+    :param min_prefix_count: Минимальное суммарное количество переходов префикса.
+    :param keep: Префиксы, которые не удаляются по min_prefix_count.
+    :return: Новая таблица defaultdict(Counter).
+    """
+    pruned = defaultdict(Counter)
+    for prefix, next_chars in table.items():
+        total = sum(next_chars.values())
+        if total <= 0 or (total < min_prefix_count and prefix not in keep):
+            continue
+        items = next_chars.most_common(top_k)
+        if min_prob is not None:
+            items = [(char, count) for char, count in items if count / total >= min_prob] or items[:1]
+        pruned[prefix] = Counter(dict(items))
+    return pruned
+
+
+def limit_transitions(table, max_transitions, keep=()):
+    """
+    Ограничивает общее количество переходов, оставляя самые частые.
+
+    Количество перехода пропорционально совместной вероятности префикса и
+    символа, поэтому удаляются переходы с наименьшим вкладом в
+    распределение паролей. Префиксы из keep сохраняются полностью и
+    учитываются в бюджете.
+
+    :param table: Таблица вида {префикс: Counter({символ: количество})}.
+    :param max_transitions: Бюджет количества переходов.
+    :param keep: Префиксы, переходы которых не удаляются.
+    :return: Таблица defaultdict(Counter) не более чем с max_transitions переходами
+             (сверх бюджета остаются только переходы префиксов из keep).
+    """
+    if count_transitions(table) <= max_transitions:
+        return table
+    pruned = defaultdict(Counter, {prefix: table[prefix] for prefix in keep if prefix in table})
+    prefixes, chars, counts = [], [], []
+    for prefix, next_chars in table.items():
+        if prefix in pruned:
+            continue
+        for char, count in next_chars.items():
+            prefixes.append(prefix)
+            chars.append(char)
+            counts.append(count)
+    limit = max(max_transitions - count_transitions(pruned), 0)
+    if limit < len(counts):
+        selected = np.argpartition(-np.asarray(counts, dtype=np.float64), limit)[:limit]
+    else:
+        selected = range(len(counts))
+    for index in selected:
+        pruned[prefixes[index]][chars[index]] = counts[index]
+    return pruned
@@ -0,0 +1,143 @@
+# models/markov_training.py
+import os
+from collections import Counter
+import numpy as np
+from utils.wordlist import iter_wordlist_chunks
+
+
+def count_ngrams(passwords, n):
+    """
+    Подсчитывает N-граммы в наборе паролей.
+
+    :param passwords: Итерируемый набор паролей.
+    :param n: Размер N-грамм.
+    :return: Counter вида {N-грамма: количество}.
+    """
+    return Counter(password[i:i + n] for password in passwords for i in range(len(password) - n + 1))
+
+
+def add_ngram_counts(table, ngram_counts, weight=1):
+    """
+    Добавляет подсчитанные N-граммы в таблицу переходов.
+
+    :param table: Таблица вида defaultdict(Counter) {префикс: {символ: количество}}.
+    :param ngram_counts: Counter вида {N-грамма: количество}.
+    :param weight: Множитель для добавляемых количеств.
+    :return: Множество затронутых префиксов.
+    """
+    touched = set()
+    for ngram, count in ngram_counts.items():
+        prefix = ngram[:-1]
+        table[prefix][ngram[-1]] += count * weight
+        touched.add(prefix)
+    return touched
+
+
+def split_file_ranges(file_path, num_shards):
+    """
+    Делит файл на диапазоны байтов примерно равного размера.
+
+    Границы не выравниваются по строкам: iter_wordlist_chunks относит строку
+    к диапазону, в котором она начинается.
+
+    :param file_path: Путь к файлу.
+    :param num_shards: Количество диапазонов.
+    :return: Список кортежей (начало, конец).
+    """
+    size = os.path.getsize(file_path)
+    num_shards = max(1, min(num_shards, size))
+    bounds = [size * i // num_shards for i in range(num_shards + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def to_count_table(ngram_counts, n):
+    """
+    Преобразует Counter N-грамм в компактную таблицу из двух массивов.
+
+    Ключи хранятся матрицей кодов символов, а не строками NumPy U{n}: те
+    отбрасывают завершающие символы '\0', и N-граммы, оканчивающиеся на
+    него, слились бы с более короткими ключами.
+
+    :param ngram_counts: Counter вида {N-грамма: количество}; все N-граммы длины n.
+    :param n: Размер N-грамм.
+    :return: Кортеж (ключи uint32 формы (k, n), количества int64), отсортированный по ключам.
+    """
+    text = ''.join(ngram_counts.keys()).encode('utf-32-le', 'surrogatepass')
+    keys = np.frombuffer(text, dtype='<u4').astype(np.uint32).reshape(len(ngram_counts), max(n, 1))
+    counts = np.fromiter(ngram_counts.values(), dtype=np.int64, count=len(ngram_counts))
+    order = np.lexsort(keys.T[::-1])
+    return keys[order], counts[order]
+
+
+def from_count_table(keys, counts):
+    """
+    Преобразует таблицу количеств обратно в словарь N-грамм.
+
+    :param keys: Матрица кодов символов uint32 формы (k, n).
+    :param counts: Количества int64.
+    :return: Словарь {N-грамма: количество}.
+    """
+    n = keys.shape[1]
+    text = np.ascontiguousarray(keys, dtype='<u4').tobytes().decode('utf-32-le', 'surrogatepass')
+    return dict(zip((text[i:i + n] for i in range(0, len(text), n)), counts.tolist()))
+
+
+def count_file_range(file_path, start, end, n, chunk_bytes=1 << 20, encoding='utf-8'):
+    """
+    Подсчитывает N-граммы в диапазоне байтов файла (выполняется в рабочем процессе).
+
+    :param file_path: Путь к файлу словаря.
+    :param start: Смещение начала диапазона.
+    :param end: Смещение конца диапазона.
+    :param n: Размер N-грамм.
+    :param chunk_bytes: Примерный размер читаемого куска в байтах.
+    :param encoding: Кодировка файла.
+    :return: Кортеж (ключи, количества, прочитано строк, прочитано байтов).
+    """
+    ngram_counts = Counter()
+    lines = 0
+    bytes_read = 0
+    for passwords, consumed in iter_wordlist_chunks(file_path, chunk_bytes, start, end, encoding=encoding):
+        ngram_counts.update(count_ngrams(passwords, n))
+        lines += len(passwords)
+        bytes_read += consumed
+    keys, counts = to_count_table(ngram_counts, n)
+    return keys, counts, lines, bytes_read
+
+
+def merge_count_tables(left, right):
+    """
+    Объединяет две таблицы количеств N-грамм.
+
+    :param left: Кортеж (ключи, количества).
+    :param right: Кортеж (ключи, количества).
+    :return: Объединённая таблица, отсортированная по ключам.
+    """
+    keys = np.concatenate((left[0], right[0]))
+    counts = np.concatenate((left[1], right[1]))
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    merged = np.zeros(len(unique_keys), dtype=np.int64)
+    np.add.at(merged, inverse.ravel(), counts)
+    return unique_keys, merged
+
+
+def reduce_count_tables(tables, executor=None):
+    """
+    Объединяет таблицы количеств попарным (древовидным) слиянием.
+
+    На каждом уровне пары сливаются параллельно, если передан пул.
+
+    :param tables: Список таблиц (ключи, количества).
+    :param executor: Пул concurrent.futures для параллельного слияния.
+    :return: Итоговая таблица (ключи, количества) или None для пустого списка.
+    """
+    tables = list(tables)
+    while len(tables) > 1:
+        pairs = [(tables[i], tables[i + 1]) for i in range(0, len(tables) - 1, 2)]
+        carry = [tables[-1]] if len(tables) % 2 else []
+        if executor is not None:
+            merged = list(executor.map(merge_count_tables, *zip(*pairs)))
+        else:
+            merged = [merge_count_tables(left, right) for left, right in pairs]
+        tables = merged + carry
+    return tables[0] if tables else None
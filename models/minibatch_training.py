@@ -0,0 +1,253 @@
+# models/minibatch_training.py
+import json
+import logging
+import os
+import numpy as np
+from utils.wordlist import iter_wordlist_chunks, WordlistProgress
+
+
+def rebatch(chunks, batch_size):
+    """
+    Нарезает поток кусков массивов на минипартии фиксированного размера.
+
+    Каждый элемент потока — кортеж массивов одинаковой длины (например,
+    входы и цели); остаток куска переносится в следующую минипартию,
+    последняя минипартия может быть короче.
+
+    :param chunks: Итератор кортежей массивов.
+    :param batch_size: Размер минипартии.
+    :return: Итератор кортежей массивов длины batch_size.
+    """
+    pending, size = [], 0
+    for arrays in chunks:
+        if not len(arrays[0]):
+            continue
+        pending.append(arrays)
+        size += len(arrays[0])
+        if size < batch_size:
+            continue
+        merged = [np.concatenate(column) for column in zip(*pending)]
+        full = size // batch_size * batch_size
+        for start in range(0, full, batch_size):
+            yield tuple(array[start:start + batch_size] for array in merged)
+        pending = [tuple(array[full:] for array in merged)]
+        size -= full
+    if size:
+        yield tuple(np.concatenate(column) for column in zip(*pending))
+
+
+def shuffle_chunks(chunks, buffer_size, rng):
+    """
+    Перемешивает поток кусков массивов через ограниченный буфер примеров.
+
+    Куски накапливаются в буфере; как только в нём больше buffer_size
+    примеров, лишние выдаются в случайном порядке, выбираясь равновероятно
+    из всего буфера. Так перемешиваются примеры, отстоящие друг от друга
+    не дальше чем на размер буфера, а память ограничена буфером и одним
+    куском. Оставшиеся в конце примеры выдаются перемешанными.
+
+    :param chunks: Итератор кортежей массивов одинаковой длины.
+    :param buffer_size: Размер буфера в примерах.
+    :param rng: Генератор случайных чисел numpy.random.Generator.
+    :return: Итератор кортежей массивов.
+    """
+    buffer = None
+    for arrays in chunks:
+        if not len(arrays[0]):
+            continue
+        buffer = arrays if buffer is None else tuple(np.concatenate(pair) for pair in zip(buffer, arrays))
+        excess = len(buffer[0]) - buffer_size
+        if excess > 0:
+            order = rng.permutation(len(buffer[0]))
+            yield tuple(array[order[:excess]] for array in buffer)
+            buffer = tuple(array[order[excess:]] for array in buffer)
+    if buffer is not None:
+        order = rng.permutation(len(buffer[0]))
+        yield tuple(array[order] for array in buffer)
+
+
+def iter_file_batches(file_path, encode, batch_size, encoding='utf-8', progress=None, shuffle_buffer=0,
+                      rng=None):
+    """
+    Читает словарь кусками и превращает его в поток минипартий.
+
+    Словари утечек обычно отсортированы (по алфавиту или частоте), поэтому
+    при shuffle_buffer > 0 примеры перемешиваются через буфер этого размера
+    (см. shuffle_chunks).
+
+    :param file_path: Путь к файлу словаря.
+    :param encode: Функция, преобразующая список паролей в кортеж массивов примеров.
+    :param batch_size: Размер минипартии.
+    :param encoding: Кодировка файла.
+    :param progress: Экземпляр WordlistProgress или None.
+    :param shuffle_buffer: Размер буфера перемешивания в примерах; 0 — порядок файла.
+    :param rng: Генератор случайных чисел для перемешивания или None.
+    :return: Итератор кортежей массивов.
+    """
+    def chunks():
+        for passwords, bytes_read in iter_wordlist_chunks(file_path, encoding=encoding):
+            if progress is not None:
+                progress.update(len(passwords), bytes_read)
+            yield encode(passwords)
+
+    examples = chunks()
+    if shuffle_buffer:
+        examples = shuffle_chunks(examples, shuffle_buffer, rng if rng is not None else np.random.default_rng())
+    return rebatch(examples, batch_size)
+
+
+def fit_repeated(model, passwords, weight, batch_size=4096):
+    """
+    Дообучает модель на небольшом наборе паролей с повышенным весом.
+
+    partial_fit в MLPClassifier не принимает веса примеров, поэтому вес
+    передаётся повторением: набор проходится round(weight) раз.
+
+    :param model: Модель с методами encode_passwords и partial_fit.
+    :param passwords: Список паролей.
+    :param weight: Вес паролей (количество проходов).
+    :param batch_size: Размер минипартии.
+    :return: Количество выполненных шагов обучения.
+    """
+    arrays = model.encode_passwords(passwords)
+    steps = 0
+    for _ in range(max(1, int(round(weight)))):
+        for batch in rebatch([arrays], batch_size):
+            model.partial_fit(*batch)
+            steps += 1
+    return steps
+
+
+class MinibatchTrainer:
+    """
+    Обучение модели по эпохам минипартиями из файла словаря.
+
+    Модель должна предоставлять методы encode_passwords(passwords) -> кортеж
+    массивов, partial_fit(*arrays) -> значение функции потерь на минипартии,
+    save_model(path) и load_model(path). После каждой эпохи модель и
+    состояние обучения сохраняются в контрольную точку, с которой обучение
+    можно продолжить. Обучение останавливается досрочно, если средние потери
+    эпохи не улучшаются больше чем на tol в течение patience эпох подряд.
+    Примеры каждой эпохи перемешиваются через буфер shuffle_buffer
+    примеров; при заданном seed порядок эпохи воспроизводим (он зависит от
+    seed и номера эпохи, поэтому не меняется и при продолжении обучения).
+    """
+
+    def __init__(self, model, epochs=10, batch_size=4096, patience=2, tol=1e-4, checkpoint_path=None,
+                 shuffle_buffer=1 << 20, seed=None):
+        """
+        Инициализирует обучение.
+
+        :param model: Обучаемая модель.
+        :param epochs: Максимальное количество эпох.
+        :param batch_size: Размер минипартии.
+        :param patience: Количество эпох без улучшения до остановки; None — без досрочной остановки.
+        :param tol: Минимальное улучшение средних потерь, считающееся прогрессом.
+        :param checkpoint_path: Путь к файлу контрольной точки модели или None.
+        :param shuffle_buffer: Размер буфера перемешивания в примерах; 0 — порядок файла.
+        :param seed: Зерно перемешивания или None.
+        """
+        self.model = model
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.patience = patience
+        self.tol = tol
+        self.checkpoint_path = checkpoint_path
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.epoch = 0
+        self.best_loss = None
+        self.stale_epochs = 0
+        self.history = []
+
+    @property
+    def state_path(self):
+        """
+        Путь к файлу состояния обучения рядом с контрольной точкой модели.
+        """
+        return f"{self.checkpoint_path}.state.json"
+
+    def resume(self):
+        """
+        Загружает модель и состояние обучения из контрольной точки, если она есть.
+
+        :return: True, если обучение продолжено с контрольной точки.
+        """
+        if not self.checkpoint_path or not os.path.exists(self.state_path):
+            return False
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.model.load_model(self.checkpoint_path)
+        self.epoch = state['epoch']
+        self.best_loss = state['best_loss']
+        self.stale_epochs = state['stale_epochs']
+        self.history = state['history']
+        logging.info(f"Обучение продолжено с эпохи {self.epoch + 1} из контрольной точки {self.checkpoint_path}.")
+        return True
+
+    def save_checkpoint(self):
+        """
+        Сохраняет модель и состояние обучения в контрольную точку.
+        """
+        if not self.checkpoint_path:
+            return
+        self.model.save_model(self.checkpoint_path)
+        state = {
+            'epoch': self.epoch,
+            'best_loss': self.best_loss,
+            'stale_epochs': self.stale_epochs,
+            'history': self.history,
+        }
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def fit_file(self, file_path, encoding='utf-8', progress_callback=None):
+        """
+        Обучает модель на словаре, начиная с текущей эпохи.
+
+        :param file_path: Путь к файлу словаря.
+        :param encoding: Кодировка файла.
+        :param progress_callback: Функция, принимающая словарь со статистикой чтения.
+        :return: Список средних потерь по эпохам.
+        """
+        while self.epoch < self.epochs and not self.should_stop():
+            progress = WordlistProgress.for_file(file_path, progress_callback)
+            rng = np.random.default_rng(None if self.seed is None else [self.seed, self.epoch])
+            batches = iter_file_batches(file_path, self.model.encode_passwords, self.batch_size,
+                                        encoding, progress, self.shuffle_buffer, rng)
+            total_loss, num_batches = 0.0, 0
+            for arrays in batches:
+                total_loss += self.model.partial_fit(*arrays)
+                num_batches += 1
+            progress.finish()
+            if not num_batches:
+                raise ValueError("Словарь не содержит примеров для обучения.")
+            self.end_epoch(total_loss / num_batches)
+        return self.history
+
+    def end_epoch(self, loss):
+        """
+        Учитывает потери завершённой эпохи и сохраняет контрольную точку.
+
+        :param loss: Средние потери эпохи.
+        """
+        loss = float(loss)
+        self.epoch += 1
+        self.history.append(loss)
+        if self.best_loss is None or loss < self.best_loss - self.tol:
+            self.best_loss = loss
+            self.stale_epochs = 0
+        else:
+            self.stale_epochs += 1
+        logging.info(f"Эпоха {self.epoch}/{self.epochs} завершена, средние потери: {loss:.4f}")
+        self.save_checkpoint()
+
+    def should_stop(self):
+        """
+        Проверяет условие досрочной остановки.
+
+        :return: True, если потери не улучшались patience эпох подряд.
+        """
+        return self.patience is not None and self.stale_epochs >= self.patience
@@ -4,7 +4,10 @@ from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import OneHotEncoder
 import joblib
 import numpy as np
-from .base_password_model import BasePasswordModel
+from .base_password_model import BasePasswordModel, unpack_candidates
+from .mlp_inference import MLPInferenceEngine
+from .minibatch_training import MinibatchTrainer, fit_repeated
+from utils.wordlist import iter_wordlist_chunks
 import os
 import logging
 import pickle
@@ -17,11 +20,15 @@ class MLPasswordModel(BasePasswordModel):
     Модель паролей на основе многослойного перцептрона (MLP).
     """
 
-    def __init__(self, dataset=None):
+    def __init__(self, dataset=None, sampling='sample', temperature=1.0, top_k=None):
         """
         Инициализирует модель с заданным набором данных.
 
         :param dataset: Кортеж (X, y) для обучения модели.
+        :param sampling: Способ выбора следующего символа: 'sample' — случайно
+                         по распределению модели, 'argmax' — наиболее вероятный.
+        :param temperature: Температура выборки в режиме 'sample'.
+        :param top_k: Выборка только из top_k наиболее вероятных символов.
         """
         super().__init__()
         self.dataset = dataset if dataset is not None else ([], [])
@@ -31,6 +38,11 @@ class MLPasswordModel(BasePasswordModel):
         self.int_to_char = {}
         self.num_classes = 0
         self.version = "1.0"
+        self.rng = np.random.default_rng()
+        self._engine = None
+        self.sampling = sampling
+        self.temperature = temperature
+        self.top_k = top_k
 
         if len(self.dataset[0]) > 0 and len(self.dataset[1]) > 0:
             self.preprocess_data()
@@ -61,6 +73,7 @@ class MLPasswordModel(BasePasswordModel):
         # One-Hot Encoding для X
         self.X_encoded = self.encoder.fit_transform(X_indices)
         self.y_encoded = np.array(y_indices)
+        self._engine = None
 
         logging.info(f"Размерность X_encoded: {self.X_encoded.shape}")
         logging.info(f"Размерность y_encoded: {self.y_encoded.shape}")
@@ -72,11 +85,123 @@ class MLPasswordModel(BasePasswordModel):
         try:
             logging.info(f"Начинаем обучение модели с {self.X_encoded.shape[0]} примерами.")
             self.model.fit(self.X_encoded, self.y_encoded)
+            self._engine = None
             logging.info("ML модель успешно обучена.")
         except Exception as e:
             logging.error(f"Ошибка при обучении модели: {e}")
             raise
 
+    def build_vocabulary(self, file_path, encoding='utf-8'):
+        """
+        Собирает алфавит символов за один потоковый проход по словарю
+        и настраивает по нему словари и кодировщик.
+
+        :param file_path: Путь к файлу словаря.
+        :param encoding: Кодировка файла.
+        """
+        chars = set()
+        for passwords, _ in iter_wordlist_chunks(file_path, encoding=encoding):
+            for password in passwords:
+                chars.update(password)
+        self.set_vocabulary(sorted(chars))
+
+    def set_vocabulary(self, chars):
+        """
+        Задаёт алфавит модели: индексы символов и кодировщик со всеми категориями.
+
+        :param chars: Последовательность уникальных символов.
+        """
+        self.char_to_int = {char: idx for idx, char in enumerate(chars)}
+        self.int_to_char = {idx: char for idx, char in enumerate(chars)}
+        self.num_classes = len(chars)
+        categories = np.arange(self.num_classes)
+        self.encoder = OneHotEncoder(categories=[categories], sparse_output=False)
+        self.encoder.fit(categories.reshape(-1, 1))
+        self._engine = None
+        logging.info(f"Уникальных символов: {self.num_classes}")
+
+    def encode_passwords(self, passwords):
+        """
+        Преобразует пароли в пары индексов (символ, следующий символ) без
+        построчного цикла: пароли склеиваются через перевод строки, который
+        не входит в алфавит и поэтому разрывает пары на границах паролей.
+        Пары с символами вне алфавита отбрасываются.
+
+        :param passwords: Список паролей.
+        :return: Кортеж (индексы символов, индексы следующих символов) типа int64.
+        """
+        codes = np.fromiter((ord(char) for char in self.char_to_int), dtype=np.int64, count=len(self.char_to_int))
+        ints = np.fromiter(self.char_to_int.values(), dtype=np.int64, count=len(self.char_to_int))
+        order = np.argsort(codes)
+        codes, ints = codes[order], ints[order]
+
+        text = '\n'.join(passwords)
+        codepoints = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4').astype(np.int64)
+        if not len(codes) or len(codepoints) < 2:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(codes, codepoints), len(codes) - 1)
+        indices = np.where(codes[positions] == codepoints, ints[positions], -1)
+        keep = (indices[:-1] >= 0) & (indices[1:] >= 0)
+        return indices[:-1][keep], indices[1:][keep]
+
+    def partial_fit(self, X_indices, y_indices):
+        """
+        Выполняет один шаг обучения на минипартии пар индексов.
+
+        One-hot матрица строится выборкой строк единичной матрицы, поэтому
+        её размер ограничен размером минипартии.
+
+        :param X_indices: Индексы текущих символов.
+        :param y_indices: Индексы следующих символов.
+        :return: Значение функции потерь на минипартии.
+        """
+        categories = np.asarray(self.encoder.categories_[0]).astype(np.int64)
+        classes = None
+        if hasattr(self.model, "classes_"):
+            # Обученная модель принимает только известные ей входы и классы
+            keep = np.isin(X_indices, categories) & np.isin(y_indices, self.model.classes_)
+            X_indices, y_indices = X_indices[keep], y_indices[keep]
+            if not len(y_indices):
+                return self.model.loss_
+        else:
+            classes = np.arange(self.num_classes)
+        one_hot = np.eye(len(categories))[np.searchsorted(categories, X_indices)]
+        self.model.partial_fit(one_hot, y_indices, classes=classes)
+        self._engine = None
+        return self.model.loss_
+
+    def train_from_file(self, file_path, epochs=10, batch_size=4096, encoding='utf-8', progress_callback=None,
+                        patience=2, tol=1e-4, checkpoint_path=None, resume=False, shuffle_buffer=1 << 20,
+                        seed=None):
+        """
+        Обучает модель на словаре минипартиями, не загружая его в память.
+
+        Пары символов извлекаются из файла кусками и подаются в partial_fit
+        по эпохам; после каждой эпохи сохраняется контрольная точка, а при
+        отсутствии улучшения потерь обучение останавливается досрочно.
+
+        :param file_path: Путь к файлу словаря.
+        :param epochs: Максимальное количество проходов по словарю.
+        :param batch_size: Размер минипартии.
+        :param encoding: Кодировка файла.
+        :param progress_callback: Функция, принимающая словарь со статистикой чтения.
+        :param patience: Количество эпох без улучшения потерь до досрочной остановки.
+        :param tol: Минимальное улучшение средних потерь эпохи.
+        :param checkpoint_path: Путь к контрольной точке, сохраняемой после каждой эпохи.
+        :param resume: Продолжить обучение с контрольной точки, если она существует.
+        :param shuffle_buffer: Размер буфера перемешивания примеров; 0 — порядок файла.
+        :param seed: Зерно перемешивания или None.
+        :return: Список средних потерь по эпохам.
+        """
+        trainer = MinibatchTrainer(self, epochs, batch_size, patience, tol, checkpoint_path, shuffle_buffer, seed)
+        if not (resume and trainer.resume()):
+            self.build_vocabulary(file_path, encoding)
+            if not self.num_classes:
+                raise ValueError("Словарь не содержит паролей для обучения.")
+        history = trainer.fit_file(file_path, encoding, progress_callback)
+        logging.info("ML модель успешно обучена.")
+        return history
+
     def generate_password(self, length=8):
         """
         Генерирует пароль заданной длины на основе обученной модели.
@@ -89,20 +214,75 @@ class MLPasswordModel(BasePasswordModel):
         if not self.char_to_int or not self.int_to_char:
             raise ValueError("Словари char_to_int и int_to_char не инициализированы.")
 
-        password = []
-        # Выберите случайный начальный символ
-        current_char = np.random.choice(list(self.char_to_int.keys()))
-        password.append(current_char)
+        return unpack_candidates(self.generate_batch(1, length))[0]
 
-        for _ in range(length - 1):
-            current_int = self.char_to_int[current_char]
-            current_encoded = self.encoder.transform([[current_int]])
-            next_int = self.model.predict(current_encoded)[0]
-            next_char = self.int_to_char.get(next_int, '?')  # Используем '?' для неизвестных индексов
-            password.append(next_char)
-            current_char = next_char
+    @property
+    def engine(self):
+        """
+        Движок вывода на NumPy; строится при первом обращении после обучения или загрузки.
+        """
+        if self._engine is None:
+            self._engine = MLPInferenceEngine(self.model, self.encoder)
+        return self._engine
 
-        return ''.join(password)
+    def generate_batch(self, count, length=8):
+        """
+        Генерирует партию паролей, продвигая все цепочки синхронно: на каждом
+        шаге следующий символ всех цепочек берётся из таблицы распределений
+        движка вывода — выборкой с температурой и top-k или, в режиме
+        'argmax', наиболее вероятный.
+
+        :param count: Количество генерируемых паролей.
+        :param length: Длина генерируемых паролей.
+        :return: Массив uint32 формы (count, length) с кодами символов.
+        """
+        if not hasattr(self.model, "classes_"):
+            raise ValueError("Модель не была обучена.")
+        if not self.char_to_int or not self.int_to_char:
+            raise ValueError("Словари char_to_int и int_to_char не инициализированы.")
+
+        # Таблица «индекс символа -> код символа»; '?' для неизвестных индексов
+        lookup = np.full(max(self.int_to_char) + 1, ord('?'), dtype=np.uint32)
+        for idx, char in self.int_to_char.items():
+            lookup[idx] = ord(char)
+
+        buffer = np.zeros((count, max(length, 1)), dtype=np.uint32)
+        if count == 0:
+            return buffer
+        engine = self.engine
+        current = self.rng.choice(np.fromiter(self.char_to_int.values(), dtype=np.int64), size=count)
+        buffer[:, 0] = lookup[current]
+        active = np.arange(count)
+        for position in range(1, length):
+            # Цепочки, дошедшие до символа вне категорий кодировщика, останавливаются
+            active = active[engine.known(current[active])]
+            if not active.size:
+                break
+            if self.sampling == 'argmax':
+                next_ints = engine.predict(current[active])
+            else:
+                next_ints = engine.sample(current[active], self.rng, self.temperature, self.top_k)
+            current[active] = next_ints
+            buffer[active, position] = lookup[next_ints]
+        return buffer
+
+    def sampler(self):
+        """
+        Возвращает модель только с тем, что нужно для выборки: обученной
+        сетью, кодировщиком, словарями символов и параметрами выборки, без
+        обучающих данных (dataset, X_encoded, y_encoded) и кэша движка вывода.
+
+        :return: Экземпляр MLPasswordModel.
+        """
+        sampler = MLPasswordModel(sampling=self.sampling, temperature=self.temperature, top_k=self.top_k)
+        sampler.model = self.model
+        sampler.encoder = self.encoder
+        sampler.char_to_int = self.char_to_int
+        sampler.int_to_char = self.int_to_char
+        sampler.num_classes = self.num_classes
+        sampler.version = self.version
+        sampler.rng = self.rng
+        return sampler
 
     def update_model(self, new_data):
         """
@@ -121,7 +301,15 @@ class MLPasswordModel(BasePasswordModel):
 
         # Проверка наличия новых символов и обновление словарей
         new_unique_chars = set(X_new_chars + y_new_chars) - set(self.char_to_int.keys())
-        if new_unique_chars:
+        if new_unique_chars and not hasattr(self, 'X_encoded'):
+            # Модель обучена потоково: алфавит фиксирован, пары с новыми символами пропускаются
+            logging.warning(f"Символы вне алфавита модели пропущены: {len(new_unique_chars)}")
+            pairs = [(x, y) for x, y in zip(X_new_chars, y_new_chars)
+                     if x in self.char_to_int and y in self.char_to_int]
+            if not pairs:
+                return
+            X_new_chars, y_new_chars = map(list, zip(*pairs))
+        elif new_unique_chars:
             for char in new_unique_chars:
                 self.char_to_int[char] = self.num_classes
                 self.int_to_char[self.num_classes] = char
@@ -139,13 +327,14 @@ class MLPasswordModel(BasePasswordModel):
         y_new_encoded = np.array(y_new_indices)
 
         # Проверка совместимости размерности
-        if X_new_encoded.shape[1] != self.X_encoded.shape[1]:
+        if X_new_encoded.shape[1] != self.model.coefs_[0].shape[0]:
             logging.error("Размерность X_new_encoded не совпадает с существующими данными.")
             raise ValueError("Размерность новых данных не совпадает с размерностью обучающих данных.")
 
         # Дообучение модели
         try:
             self.model.partial_fit(X_new_encoded, y_new_encoded)
+            self._engine = None
             logging.info("ML модель успешно дообучена с новыми данными.")
         except AttributeError:
             # Если partial_fit недоступен, переобучите модель полностью
@@ -153,14 +342,16 @@ class MLPasswordModel(BasePasswordModel):
             self.y_encoded = np.concatenate([self.y_encoded, y_new_encoded])
             self.train_model()
 
-    def generate_hashcat_rules(self):
+    def reinforce(self, passwords, weight=10):
         """
-        Генерирует правила для Hashcat на основе модели.
+        Дообучает модель на найденных паролях, повторяя их weight раз.
+
+        :param passwords: Список паролей.
+        :param weight: Вес паролей (количество проходов).
         """
-        # Здесь можно добавить логику генерации правил на основе модели
-        # Пока оставляем пустым или возвращаем стандартные правила
-        logging.info("Генерация правил для Hashcat не реализована.")
-        return []
+        if not hasattr(self.model, "classes_"):
+            raise ValueError("Модель не была обучена.")
+        fit_repeated(self, passwords, weight)
 
     def load_model(self, file_path):
         """
@@ -185,6 +376,10 @@ class MLPasswordModel(BasePasswordModel):
                 self.int_to_char = meta['int_to_char']
                 self.num_classes = meta['num_classes']
                 self.encoder = meta['encoder']
+                self.sampling = meta.get('sampling', self.sampling)
+                self.temperature = meta.get('temperature', self.temperature)
+                self.top_k = meta.get('top_k', self.top_k)
+            self._engine = None
             logging.info("Метаданные модели успешно загружены.")
         except Exception as e:
             logging.error(f"Ошибка при загрузке модели: {e}")
@@ -206,7 +401,10 @@ class MLPasswordModel(BasePasswordModel):
                 'char_to_int': self.char_to_int,
                 'int_to_char': self.int_to_char,
                 'num_classes': self.num_classes,
-                'encoder': self.encoder
+                'encoder': self.encoder,
+                'sampling': self.sampling,
+                'temperature': self.temperature,
+                'top_k': self.top_k
             }
             meta_path = os.path.splitext(file_path)[0] + "_meta.pkl"
             with open(meta_path, 'wb') as f:
@@ -0,0 +1,182 @@
+# models/mlp_inference.py
+import numpy as np
+
+ACTIVATIONS = {
+    'identity': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'logistic': lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+
+def mlp_forward(first_layer, coefs, intercepts, activation, out_activation):
+    """
+    Продолжает прямой проход MLP от выхода первого линейного слоя.
+
+    :param first_layer: Выход первого линейного слоя (до активации) формы (партия, нейроны).
+    :param coefs: Список матриц весов слоёв.
+    :param intercepts: Список векторов смещений слоёв.
+    :param activation: Функция активации скрытых слоёв.
+    :param out_activation: Имя выходной активации ('softmax' или 'logistic').
+    :return: Матрица вероятностей классов формы (партия, число классов).
+    """
+    activations = first_layer
+    for coef, intercept in zip(coefs[1:], intercepts[1:]):
+        activations = activation(activations) @ coef + intercept
+
+    if out_activation == 'softmax':
+        activations = activations - activations.max(axis=1, keepdims=True)
+        np.exp(activations, out=activations)
+        activations /= activations.sum(axis=1, keepdims=True)
+        return activations
+    positive = ACTIVATIONS['logistic'](activations)
+    if positive.shape[1] == 1:
+        return np.hstack([1.0 - positive, positive])
+    return positive
+
+
+def cumulative_distribution(proba, temperature=1.0, top_k=None):
+    """
+    Строит накопленные вероятности для стохастической выборки.
+
+    Распределение каждой строки возводится в степень 1 / temperature
+    (эквивалентно делению логитов softmax на температуру), обрезается до
+    top_k наиболее вероятных символов и нормализуется.
+
+    :param proba: Матрица вероятностей формы (строки, классы).
+    :param temperature: Температура; меньше 1 — ближе к argmax, больше 1 — разнообразнее.
+    :param top_k: Количество наиболее вероятных символов, из которых идёт выборка.
+    :return: Матрица накопленных вероятностей той же формы.
+    """
+    if temperature <= 0:
+        raise ValueError("Температура должна быть положительной.")
+    weights = np.power(proba, 1.0 / temperature)
+    if top_k is not None and 0 < top_k < weights.shape[1]:
+        cutoff = np.partition(weights, -top_k, axis=1)[:, -top_k][:, None]
+        weights = np.where(weights >= cutoff, weights, 0.0)
+    totals = weights.sum(axis=1, keepdims=True)
+    # Строки, обнулившиеся при малой температуре, сводятся к argmax
+    degenerate = totals[:, 0] <= 0
+    if degenerate.any():
+        weights[degenerate] = 0.0
+        weights[degenerate, np.argmax(proba[degenerate], axis=1)] = 1.0
+        totals = weights.sum(axis=1, keepdims=True)
+    cumulative = np.cumsum(weights / totals, axis=1)
+    cumulative[:, -1] = 1.0
+    return cumulative
+
+
+def sample_columns(cumulative, rng):
+    """
+    Выбирает по одному столбцу в каждой строке по накопленным вероятностям.
+
+    :param cumulative: Матрица накопленных вероятностей.
+    :param rng: Генератор случайных чисел numpy.random.Generator.
+    :return: Массив индексов столбцов.
+    """
+    draws = rng.random(len(cumulative))[:, None]
+    return np.minimum((cumulative < draws).sum(axis=1), cumulative.shape[1] - 1)
+
+
+class MLPInferenceEngine:
+    """
+    Вывод обученного MLPClassifier средствами NumPy.
+
+    Веса и смещения слоёв копируются в массивы NumPy, а прямой проход
+    выполняется матричными умножениями сразу для всей партии без проверок
+    входа sklearn. Поскольку вход модели — one-hot вектор предыдущего
+    символа, распределения следующего символа для всех входов вычисляются
+    один раз и хранятся в таблице: шаг генерации сводится к выборке строк.
+    """
+
+    def __init__(self, classifier, encoder):
+        """
+        Извлекает параметры обученной модели и строит таблицу распределений.
+
+        :param classifier: Обученный sklearn.neural_network.MLPClassifier.
+        :param encoder: Обученный OneHotEncoder входных индексов символов.
+        """
+        self.coefs = [np.asarray(coef, dtype=np.float64) for coef in classifier.coefs_]
+        self.intercepts = [np.asarray(intercept, dtype=np.float64) for intercept in classifier.intercepts_]
+        self.activation = ACTIVATIONS[classifier.activation]
+        self.out_activation = classifier.out_activation_
+        self.classes = np.asarray(classifier.classes_).astype(np.int64)
+
+        categories = np.asarray(encoder.categories_[0]).astype(np.int64)
+        size = int(max(categories.max(initial=-1), self.classes.max(initial=-1))) + 1
+        # Строка таблицы для индекса символа; -1 — символ не входит в категории кодировщика
+        self.input_row = np.full(size, -1, dtype=np.int64)
+        self.input_row[categories] = np.arange(len(categories))
+
+        self.proba_table = self.forward(np.eye(len(categories)))
+        self.argmax_table = self.classes[np.argmax(self.proba_table, axis=1)]
+        self._sampling_params = None
+        self._cumulative_table = None
+
+    def forward(self, X):
+        """
+        Выполняет прямой проход для партии входов.
+
+        :param X: Матрица входов формы (партия, число признаков).
+        :return: Матрица вероятностей классов формы (партия, число классов).
+        """
+        first_layer = X @ self.coefs[0] + self.intercepts[0]
+        return mlp_forward(first_layer, self.coefs, self.intercepts, self.activation, self.out_activation)
+
+    def known(self, char_indices):
+        """
+        Проверяет, известны ли кодировщику индексы символов.
+
+        :param char_indices: Массив индексов символов.
+        :return: Булев массив.
+        """
+        inside = (char_indices >= 0) & (char_indices < len(self.input_row))
+        known = np.zeros(len(char_indices), dtype=bool)
+        known[inside] = self.input_row[char_indices[inside]] >= 0
+        return known
+
+    def predict_proba(self, char_indices):
+        """
+        Возвращает распределения следующего символа для партии предыдущих символов.
+
+        :param char_indices: Массив известных кодировщику индексов символов.
+        :return: Матрица вероятностей формы (партия, число классов); столбцы соответствуют classes.
+        """
+        return self.proba_table[self.input_row[char_indices]]
+
+    def predict(self, char_indices):
+        """
+        Возвращает наиболее вероятный следующий символ (как MLPClassifier.predict).
+
+        :param char_indices: Массив известных кодировщику индексов символов.
+        :return: Массив индексов следующих символов.
+        """
+        return self.argmax_table[self.input_row[char_indices]]
+
+    def sampling_table(self, temperature=1.0, top_k=None):
+        """
+        Возвращает таблицу накопленных вероятностей для стохастической выборки;
+        таблица кешируется для последних параметров.
+
+        :param temperature: Температура выборки.
+        :param top_k: Количество наиболее вероятных символов, из которых идёт выборка.
+        :return: Матрица накопленных вероятностей формы (число входов, число классов).
+        """
+        if (temperature, top_k) != self._sampling_params:
+            self._cumulative_table = cumulative_distribution(self.proba_table, temperature, top_k)
+            self._sampling_params = (temperature, top_k)
+        return self._cumulative_table
+
+    def sample(self, char_indices, rng, temperature=1.0, top_k=None):
+        """
+        Выбирает следующий символ для партии предыдущих символов случайно
+        согласно распределению модели.
+
+        :param char_indices: Массив известных кодировщику индексов символов.
+        :param rng: Генератор случайных чисел numpy.random.Generator.
+        :param temperature: Температура выборки.
+        :param top_k: Ограничение выборки top_k наиболее вероятными символами.
+        :return: Массив индексов следующих символов.
+        """
+        cumulative = self.sampling_table(temperature, top_k)[self.input_row[char_indices]]
+        return self.classes[sample_columns(cumulative, rng)]
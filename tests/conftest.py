@@ -0,0 +1,30 @@
+# tests/conftest.py
+import os
+import sys
+import pytest
+
+# Модули проекта импортируются от корня репозитория (как в main.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class NullLogger:
+    """
+    Логгер, отбрасывающий записи.
+    """
+
+    def log_results(self, data):
+        pass
+
+    def log_successful_attempts(self, attempts):
+        pass
+
+    def log_failed_attempts(self, attempts):
+        pass
+
+
+@pytest.fixture
+def null_logger():
+    """
+    Логгер, не создающий файлов.
+    """
+    return NullLogger()
@@ -0,0 +1,18 @@
+# tests/test_adaptive_password_generator.py
+from generators.adaptive_password_generator import AdaptivePasswordGenerator
+from models.markov_model import MarkovModel
+
+
+def test_hex_plaintexts_are_not_reinforced(tmp_path, null_logger):
+    model = MarkovModel(['password', 'letmein'], n=3)
+    reinforced = []
+    model.reinforce = lambda passwords, weight=10: reinforced.append(list(passwords))
+    generator = AdaptivePasswordGenerator(model, str(tmp_path / 'candidates.txt'), 10, null_logger)
+
+    stats = generator.register_success(3, ['dragon', '$HEX[e4f6fc]', 'пароль'], candidates=10)
+    assert reinforced == [['dragon', 'пароль']]
+    assert generator.cracked_passwords == ['dragon', 'пароль']
+    assert stats['successful_attempts'] == 3
+
+    generator.register_success(1, ['$HEX[ff]'], candidates=10)
+    assert reinforced == [['dragon', 'пароль']]
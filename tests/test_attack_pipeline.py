@@ -0,0 +1,56 @@
+# tests/test_attack_pipeline.py
+import pytest
+from generators.adaptive_password_generator import AdaptivePasswordGenerator
+from hashcat import hashcat_runner
+from hashcat.hashcat_runner import HashcatRunner
+from models.markov_model import MarkovModel
+from utils.attack_pipeline import CancelToken, JobCancelled
+
+
+@pytest.fixture
+def popen_calls(monkeypatch):
+    """
+    Подменяет запуск процессов Hashcat и возвращает список запущенных команд.
+    """
+    calls = []
+
+    def fake_popen(command, **kwargs):
+        calls.append(command)
+        raise AssertionError("Hashcat не должен запускаться")
+
+    monkeypatch.setattr(hashcat_runner.subprocess, 'Popen', fake_popen)
+    return calls
+
+
+def test_cancel_during_generation_stops_before_hashcat(tmp_path, popen_calls, null_logger):
+    token = CancelToken()
+    model = MarkovModel(['password', 'passw0rd', 'letmein'], n=3)
+    generate_batch = model.generate_batch
+    chunks = []
+
+    def cancelling_generate_batch(count, length=8):
+        chunks.append(count)
+        token.cancel()
+        return generate_batch(count, length)
+
+    model.generate_batch = cancelling_generate_batch
+    generator = AdaptivePasswordGenerator(model, str(tmp_path / 'candidates.txt'), 100, null_logger,
+                                          chunk_size=10, cancel_token=token)
+    runner = HashcatRunner(str(tmp_path / 'hashes.txt'), '', None, null_logger, cancel_token=token)
+
+    with pytest.raises(JobCancelled):
+        generator.run_feedback_loop(runner, 8, rounds=3, num_workers=1)
+    assert chunks == [10]
+    assert popen_calls == []
+
+
+def test_cancelled_runner_refuses_to_start(tmp_path, popen_calls, null_logger):
+    token = CancelToken()
+    runner = HashcatRunner(str(tmp_path / 'hashes.txt'), '', None, null_logger, cancel_token=token)
+    token.cancel()
+
+    with pytest.raises(JobCancelled):
+        runner.run_hashcat(str(tmp_path / 'candidates.txt'))
+    with pytest.raises(JobCancelled):
+        runner.run_hashcat_stream(iter(['a\n']))
+    assert popen_calls == []
@@ -0,0 +1,42 @@
+# tests/test_bloom_filter.py
+import pytest
+from hashcat.cracked_index import CrackedHashIndex
+from utils.bloom_filter import BloomFilter
+from utils.database import Database
+
+
+def test_preload_from_cracked_index_suppresses_cracked_plaintexts(tmp_path):
+    db = Database(str(tmp_path / 'test.db'))
+    try:
+        index = CrackedHashIndex(db, hash_mode=0)
+        index.record({'5f4dcc3b5aa765d61d8327deb882cf99': 'password', 'e10adc3949ba59abbe56e057f20f883e': '123456'})
+        CrackedHashIndex(db, hash_mode=1000).record({'8846f7eaee8fb117ad06bdd830b7586c': 'other'})
+
+        bloom = BloomFilter(capacity=1000)
+        assert bloom.preload(index.plaintexts()) == 2
+        assert bloom.filter_new(['password', 'letmein', '123456', 'other']) == ['letmein', 'other']
+    finally:
+        db.close()
+
+
+def test_preload_file_adds_lines(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_text('alpha\nbeta\r\nalpha\n')
+    bloom = BloomFilter(capacity=100)
+    assert bloom.preload_file(str(path), chunk_lines=1) == 2
+    assert 'beta' in bloom
+
+
+def test_failed_save_keeps_previous_file(tmp_path):
+    path = str(tmp_path / 'filter.bin')
+    bloom = BloomFilter(capacity=100)
+    bloom.add_many(['password', 'letmein'])
+    bloom.save(path)
+
+    broken = BloomFilter(capacity=100)
+    broken.bits = None
+    with pytest.raises(IOError):
+        broken.save(path)
+    assert [entry.name for entry in tmp_path.iterdir()] == ['filter.bin']
+    restored = BloomFilter.load(path)
+    assert restored.count == 2 and 'letmein' in restored
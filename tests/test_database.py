@@ -0,0 +1,106 @@
+# tests/test_database.py
+import threading
+import pytest
+from utils.database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+
+def add_attacks(db, count):
+    """Добавляет атаки attack-0..attack-{count-1}, созданные 2024-01-01 в 00:00, 01:00, ..."""
+    ids = [db.add_attack(f"attack-{index}", status="Completed" if index % 2 else "Failed")
+           for index in range(count)]
+    for index, attack_id in enumerate(ids):
+        db._write(lambda conn, attack_id=attack_id, index=index: conn.execute(
+            "UPDATE attacks SET created_at = ? WHERE id = ?", (f"2024-01-01 {index:02d}:00:00", attack_id)))
+    return ids
+
+
+def test_write_after_close_raises(tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    job_id = db.add_job("task", "{}", 0)
+    db.close()
+    with pytest.raises(RuntimeError):
+        db.update_job_status(job_id, "Completed")
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_pending_writes_fail_when_writer_stops(tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    started, release = threading.Event(), threading.Event()
+
+    def broken_batch(batch):
+        started.set()
+        release.wait()
+        raise OSError("диск недоступен")
+
+    db._run_batch = broken_batch
+    errors = []
+
+    def write():
+        try:
+            db.add_job("task", "{}", 0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write)]
+    threads[0].start()
+    assert started.wait(5)
+    threads.append(threading.Thread(target=write))
+    threads[1].start()
+    while db._writes.qsize() == 0:
+        threads[1].join(0.01)
+    release.set()
+    db._writer.join(5)
+    for thread in threads:
+        thread.join(5)
+        assert not thread.is_alive()
+    assert len(errors) == 2 and all(isinstance(e, RuntimeError) for e in errors)
+    with pytest.raises(RuntimeError):
+        db.add_job("task", "{}", 0)
+
+
+def test_attack_pages_follow_id_key(db):
+    ids = add_attacks(db, 7)
+    first = db.list_attacks_page(limit=3, fields=['id', 'task'])
+    assert first == [(ids[0], 'attack-0'), (ids[1], 'attack-1'), (ids[2], 'attack-2')]
+    second = db.list_attacks_page(limit=3, after=first[-1][0], fields=['id'])
+    assert second == [(ids[3],), (ids[4],), (ids[5],)]
+    assert db.list_attacks_page(limit=3, after=ids[-1]) == []
+
+
+def test_page_rejects_unknown_fields(db):
+    add_attacks(db, 1)
+    with pytest.raises(ValueError):
+        db.list_attacks_page(fields=['id', 'spec'])
+    with pytest.raises(ValueError):
+        db.list_models_page(fields=['id; DROP TABLE models'])
+    with pytest.raises(ValueError):
+        list(db.iter_attacks(fields=['task', 'password']))
+
+
+def test_page_filters_by_status_and_time(db):
+    ids = add_attacks(db, 6)
+    rows = db.list_attacks_page(since="2024-01-01 01:00:00", until="2024-01-01 04:00:00", fields=['id'])
+    assert rows == [(ids[1],), (ids[2],), (ids[3],)]
+    rows = db.list_attacks_page(status="Completed", since="2024-01-01 02:00:00", fields=['task'])
+    assert rows == [('attack-3',), ('attack-5',)]
+
+
+def test_iter_crosses_page_boundaries(db):
+    ids = add_attacks(db, 7)
+    # Поле id не запрошено: ключ страницы выбирается отдельно и не попадает в строки
+    assert list(db.iter_attacks(fields=['task'], batch_size=3)) == [(f"attack-{i}",) for i in range(7)]
+    assert [row[0] for row in db.iter_attacks(batch_size=7)] == ids
+    assert list(db.iter_attacks(status="Completed", fields=['id'], batch_size=2)) == [(ids[i],) for i in (1, 3, 5)]
+    assert list(db.iter_attacks(status="Cancelled", batch_size=2)) == []
+
+    model_ids = [db.add_model("MarkovModel" if i % 3 else "MLPasswordModel", f"m{i}.lqm", "1.0") for i in range(5)]
+    assert list(db.iter_models(model_type="MarkovModel", fields=['file_path'], batch_size=2)) == \
+           [(f"m{i}.lqm",) for i in (1, 2, 4)]
+    assert [row[0] for row in db.iter_models(batch_size=2)] == model_ids
@@ -0,0 +1,28 @@
+# tests/test_hashcat_runner.py
+import pytest
+from hashcat.hashcat_runner import HashcatRunner
+from hashcat.status import STATUS_OPTIONS
+
+
+def make_runner(options, **kwargs):
+    return HashcatRunner('hashes.txt', options, None, None, **kwargs)
+
+
+def test_mask_attack_mode_overrides_options():
+    runner = make_runner('-a 0 -w 3 --attack-mode=1 -a6', hash_mode=1000)
+    command = runner.build_command('masks.hcmask', hash_file='hashes.txt', attack_mode=3)
+    assert command == ['hashcat', '-m', '1000', '-a', '3', 'hashes.txt', 'masks.hcmask', '-w', '3',
+                       *STATUS_OPTIONS, '--status-timer=5']
+
+
+def test_straight_attack_keeps_user_attack_mode_and_single_hash_mode():
+    runner = make_runner('-m 1000 -a 0 -O')
+    command = runner.build_command('words.txt', hash_file='hashes.txt')
+    assert command == ['hashcat', '-m', '1000', 'hashes.txt', 'words.txt', '-a', '0', '-O',
+                       *STATUS_OPTIONS, '--status-timer=5']
+    assert runner.hash_mode == 1000
+
+
+def test_conflicting_hash_mode_is_rejected():
+    with pytest.raises(ValueError):
+        make_runner('--hash-type=1000', hash_mode=0)
@@ -0,0 +1,78 @@
+# tests/test_hashcat_status.py
+import pytest
+from hashcat.status import FINAL_STATUSES, HashcatOutputParser, STATUS_NAMES, parse_status_line
+
+# Строка вывода hashcat 6.2 с --status --status-json
+STATUS_LINE = (
+    '{ "session": "hashcat", "guess": { "guess_base": "words.txt", "guess_base_count": 1, '
+    '"guess_base_offset": 1, "guess_base_percent": 100.00, "guess_mask_length": 0, "guess_mod": null, '
+    '"guess_mod_count": 1, "guess_mod_offset": 1, "guess_mod_percent": 100.00, "guess_mode": 1 }, '
+    '"status": 3, "target": "hashes.txt", "progress": [1048576, 14344385], "restore_point": 1048576, '
+    '"recovered_hashes": [1, 3], "recovered_salts": [1, 1], "rejected": 0, '
+    '"devices": [ { "device_id": 1, "device_name": "NVIDIA GeForce RTX 3080", "device_type": "GPU", '
+    '"speed": 2451841234, "temp": 52, "util": 99 }, { "device_id": 2, "device_name": "NVIDIA GeForce RTX 3080", '
+    '"device_type": "GPU", "speed": 2448000000, "temp": 50, "util": 98 } ], '
+    '"time_start": 1700000000, "estimated_stop": 1700000012 }'
+)
+
+
+def status_line(status=3, progress=1048576, recovered=1):
+    return STATUS_LINE.replace('"status": 3', f'"status": {status}') \
+        .replace('"progress": [1048576', f'"progress": [{progress}') \
+        .replace('"recovered_hashes": [1', f'"recovered_hashes": [{recovered}')
+
+
+def test_status_codes_match_hashcat():
+    assert sorted(STATUS_NAMES) == list(range(17))
+    assert FINAL_STATUSES == {5, 6, 7, 8, 10, 11, 13, 14}
+
+
+def test_parses_recorded_status_line():
+    status = parse_status_line(STATUS_LINE + '\n')
+    assert status.status == 3 and not status.is_final
+    assert (status.progress, status.progress_total) == (1048576, 14344385)
+    assert (status.recovered, status.recovered_total) == (1, 3)
+    assert [device.device_id for device in status.devices] == [1, 2]
+    assert status.speed == 2451841234 + 2448000000
+    assert status.percent == pytest.approx(100.0 * 1048576 / 14344385)
+    assert status.to_dict()['devices'][0]['name'] == "NVIDIA GeForce RTX 3080"
+
+
+def test_parser_keeps_messages_and_ignores_other_lines():
+    parser = HashcatOutputParser()
+    assert parser.feed_stdout("Session..........: hashcat\n") is None
+    assert parser.feed_stdout("{ not json\n") is None
+    parser.feed_stderr("Warning: something\n")
+    assert parser.messages == ["Session..........: hashcat", "{ not json"]
+    assert parser.errors == ["Warning: something"]
+    assert parser.recovered == 0
+
+
+def test_throttles_progress_but_passes_changes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('hashcat.status.time.monotonic', lambda: now[0])
+    received = []
+    parser = HashcatOutputParser(received.append, interval=1.0)
+
+    parser.feed_stdout(status_line(progress=1))
+    now[0] += 0.2
+    parser.feed_stdout(status_line(progress=2))
+    now[0] += 0.2
+    parser.feed_stdout(status_line(progress=3))
+    assert [status.progress for status in received] == [1]
+
+    # Новый взломанный хеш передаётся сразу
+    parser.feed_stdout(status_line(progress=4, recovered=2))
+    now[0] += 1.0
+    parser.feed_stdout(status_line(progress=5, recovered=2))
+    now[0] += 0.1
+    parser.feed_stdout(status_line(progress=6, recovered=2))
+    assert [status.progress for status in received] == [1, 4, 5]
+
+    parser.finish()
+    assert [status.progress for status in received] == [1, 4, 5, 6]
+    assert parser.first_status.progress == 1 and parser.recovered == 2
+
+    # Итоговое состояние передаётся независимо от интервала
+    parser.feed_stdout(status_line(status=14, progress=7, recovered=2))
+    assert received[-1].is_final and received[-1].status_name == "Прервано (завершение)"
@@ -0,0 +1,74 @@
+# tests/test_logger.py
+import json
+import os
+import pytest
+from utils.logger import Logger
+
+
+@pytest.fixture
+def make_logger(tmp_path):
+    loggers = []
+
+    def make(**kwargs):
+        logger = Logger(str(tmp_path / 'session_log.jsonl'), fsync='never', **kwargs)
+        loggers.append(logger)
+        return logger
+
+    yield make
+    for logger in loggers:
+        logger.close()
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rotation_shifts_backups(make_logger, tmp_path):
+    logger = make_logger(max_bytes=1, backup_count=2, batch_size=1)
+    for index in range(4):
+        logger.log_results({'n': index})
+        logger.flush()
+    log_file = str(tmp_path / 'session_log.jsonl')
+    assert read_lines(f"{log_file}.1") == [{'n': 3}]
+    assert read_lines(f"{log_file}.2") == [{'n': 2}]
+    assert not os.path.exists(f"{log_file}.3")
+    assert read_lines(log_file) == []
+
+
+def test_write_continues_after_failed_rotation(make_logger, tmp_path, monkeypatch):
+    logger = make_logger(max_bytes=1, backup_count=1, batch_size=1)
+
+    def locked(source, target):
+        raise PermissionError("файл открыт другим процессом")
+
+    monkeypatch.setattr('utils.logger.os.replace', locked)
+    logger.log_results({'n': 0})
+    logger.flush()
+    monkeypatch.undo()
+    logger.log_results({'n': 1})
+    logger.flush()
+    assert logger.errors == 1
+    log_file = str(tmp_path / 'session_log.jsonl')
+    # Следующая партия записана и ротирована вместе с предыдущей
+    assert read_lines(f"{log_file}.1") == [{'n': 0}, {'n': 1}]
+
+
+def test_migrates_json_array_log(make_logger, tmp_path):
+    legacy = tmp_path / 'session_log.json'
+    legacy.write_text(json.dumps([{'n': 0}, {'n': 1}]), encoding='utf-8')
+    (tmp_path / 'session_log.jsonl').write_text(json.dumps({'n': 2}) + '\n', encoding='utf-8')
+    logger = make_logger()
+    logger.log_results({'n': 3})
+    assert [record['n'] for record in logger.iter_logs()] == [0, 1, 2, 3]
+    assert (tmp_path / 'session_log.json.bak').exists() and not legacy.exists()
+
+
+def test_iter_logs_reads_oldest_first(make_logger):
+    logger = make_logger(max_bytes=30, backup_count=3, batch_size=1)
+    for index in range(6):
+        logger.log_results({'n': index, 'pad': 'x' * 8})
+        logger.flush()
+    logger.log_results({'n': 6})
+    assert [record['n'] for record in logger.iter_logs()] == list(range(7))
+    assert [record['n'] for record in logger.iter_logs(include_rotated=False)] == [6]
@@ -0,0 +1,44 @@
+# tests/test_markov_binary.py
+import os
+import numpy as np
+import pytest
+from models.compiled_markov import CompiledMarkovTables
+from models.markov_binary import HEADER, MAGIC, FORMAT_VERSION, load_tables
+from models.markov_model import MarkovModel
+
+
+def test_binary_round_trip_keeps_tables_counts_and_version(tmp_path):
+    model = MarkovModel(['password', 'passw0rd', 'letmein', 'пароль'], n=3)
+    path = str(tmp_path / 'model.lqm')
+    model.save_model(path, 'модель-2')
+
+    loaded = MarkovModel()
+    loaded.load_model(path)
+    assert loaded.n == 3
+    assert loaded.version == 'модель-2'
+    assert {prefix: dict(chars) for prefix, chars in loaded.counts.items()} == \
+           {prefix: dict(chars) for prefix, chars in model.counts.items()}
+    for name in CompiledMarkovTables.ARRAYS:
+        assert np.array_equal(getattr(loaded.compiled, name), getattr(model.compiled, name)), name
+
+
+def test_rejects_version_longer_than_header_field(tmp_path):
+    model = MarkovModel(['password'], n=3)
+    path = str(tmp_path / 'model.lqm')
+    with pytest.raises(ValueError):
+        model.save_model(path, 'a' + 'модель' * 6)
+    assert os.listdir(tmp_path) == []
+
+
+def test_loads_version_truncated_inside_character(tmp_path):
+    model = MarkovModel(['password'], n=3)
+    path = str(tmp_path / 'model.lqm')
+    model.save_model(path, 'v')
+    # Заголовок файла, записанного до проверки длины версии
+    with open(path, 'r+b') as f:
+        fields = list(HEADER.unpack(f.read(HEADER.size)))
+        assert fields[:2] == [MAGIC, FORMAT_VERSION]
+        fields[-1] = ('a' + 'модель' * 6).encode('utf-8')[:32]
+        f.seek(0)
+        f.write(HEADER.pack(*fields))
+    assert load_tables(path)[3] == 'a' + 'модельмодель' + 'мод'
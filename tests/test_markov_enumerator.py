@@ -0,0 +1,69 @@
+# tests/test_markov_enumerator.py
+import itertools
+import json
+import math
+import pytest
+from models.markov_model import MarkovModel
+
+PASSWORDS = ['abcab', 'abcba', 'bcabc', 'cabca', 'aabbc', 'abbca', 'abcab', 'bcaab']
+LENGTH = 5
+
+
+def model_probability(model, password):
+    probability = 1.0
+    for i in range(model.n - 1, len(password)):
+        next_chars = model.counts[password[i - model.n + 1:i]]
+        probability *= next_chars[password[i]] / sum(next_chars.values())
+    return probability
+
+
+def all_passwords(model):
+    found = []
+
+    def walk(password):
+        if len(password) == LENGTH:
+            found.append(password)
+            return
+        for char in model.counts.get(password[-(model.n - 1):], {}):
+            walk(password + char)
+
+    for prefix, next_chars in list(model.counts.items()):
+        if len(prefix) == model.n - 1 and next_chars:
+            walk(prefix)
+    return found
+
+
+@pytest.fixture
+def model():
+    return MarkovModel(PASSWORDS, n=3)
+
+
+def test_enumerates_every_password_once_in_probability_order(model):
+    level_step = 0.01
+    enumerated = list(model.enumerate_passwords(LENGTH, level_step=level_step))
+    assert len(enumerated) == len(set(enumerated))
+    assert sorted(enumerated) == sorted(all_passwords(model))
+
+    # Уровни округляют -ln(p) вниз, поэтому порядок точен до множителя exp(шаги * level_step)
+    tolerance = math.exp((LENGTH - model.n + 1) * level_step)
+    probabilities = [model_probability(model, password) for password in enumerated]
+    for previous, following in zip(probabilities, probabilities[1:]):
+        assert following <= previous * tolerance
+
+
+@pytest.mark.parametrize('stop', [0, 1, 7, 20])
+def test_resumes_exactly_after_checkpoint(model, stop):
+    full = list(model.enumerate_passwords(LENGTH))
+    enumerator = model.enumerate_passwords(LENGTH)
+    head = list(itertools.islice(enumerator, stop))
+    checkpoint = json.loads(json.dumps(enumerator.checkpoint()))
+
+    resumed = model.enumerate_passwords(LENGTH, checkpoint=checkpoint)
+    assert head + list(resumed) == full
+    assert resumed.emitted == len(full)
+
+
+def test_rejects_checkpoint_for_other_parameters(model):
+    checkpoint = model.enumerate_passwords(LENGTH).checkpoint()
+    with pytest.raises(ValueError):
+        model.enumerate_passwords(LENGTH + 1, checkpoint=checkpoint)
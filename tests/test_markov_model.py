@@ -0,0 +1,65 @@
+# tests/test_markov_model.py
+import pickle
+from models.markov_model import MarkovModel
+
+
+def test_saved_model_keeps_counts_only(tmp_path):
+    model = MarkovModel(['password', 'letmein'], n=3)
+    path = tmp_path / 'model.pkl'
+    model.save_model(path, '2.0')
+    with open(path, 'rb') as f:
+        data = pickle.load(f)
+    assert 'passwords' not in data
+    assert data['counts']['pa'] == {'s': 1}
+
+
+def test_loads_legacy_file_with_passwords(tmp_path):
+    path = tmp_path / 'legacy.pkl'
+    with open(path, 'wb') as f:
+        pickle.dump({'version': '1.0', 'passwords': ['abcd'], 'n': 3,
+                     'markov_model': {'ab': {'c': 1.0}, 'bc': {'d': 1.0}}}, f)
+    model = MarkovModel()
+    model.load_model(path)
+    assert not hasattr(model, 'passwords')
+    assert model.counts['ab'] == {'c': 1.0}
+
+
+def test_sampler_carries_only_compiled_tables(tmp_path):
+    model = MarkovModel(['password', 'letmein', 'dragon'], n=3)
+    path = str(tmp_path / 'model.lqm')
+    model.save_model(path, '2.0')
+    loaded = MarkovModel()
+    loaded.load_model(path)
+
+    sampler = pickle.loads(pickle.dumps(loaded.sampler()))
+    assert not sampler._counts
+    assert sampler.compiled.source_path == path
+    sampler.reseed(0)
+    assert sampler.generate_batch(5, 8).shape == (5, 8)
+
+
+def test_small_wordlist_is_counted_in_process(tmp_path, monkeypatch):
+    path = tmp_path / 'words.txt'
+    path.write_text('password\nletmein\ndragon\n', encoding='utf-8')
+
+    def no_pool(*args):
+        raise AssertionError("пул процессов для маленького словаря")
+
+    monkeypatch.setattr(MarkovModel, '_count_file_parallel', no_pool)
+    model = MarkovModel(n=3)
+    model.train_from_file(str(path), num_workers=8)
+    assert model.counts['pa'] == {'s': 1}
+
+
+def test_parallel_counts_match_sequential_with_nul(tmp_path):
+    path = tmp_path / 'words.txt'
+    words = ['ab\0', 'ab', 'a\0\0', '\0ab', 'пароль'] * 50 + [f'word{i}' for i in range(200)]
+    path.write_text('\n'.join(words) + '\n', encoding='utf-8')
+
+    sequential, parallel = MarkovModel(n=3), MarkovModel(n=3)
+    sequential.train_from_file(str(path))
+    # Маленькие куски, чтобы словарь делился между процессами
+    parallel.train_from_file(str(path), chunk_bytes=64, num_workers=2)
+    assert {prefix: dict(chars) for prefix, chars in parallel.counts.items()} == \
+           {prefix: dict(chars) for prefix, chars in sequential.counts.items()}
+    assert sequential.counts['ab'] == {'\0': 50}
@@ -0,0 +1,39 @@
+# tests/test_markov_pruning.py
+import numpy as np
+import pytest
+from models.markov_model import MarkovModel
+
+PASSWORDS = ['password', 'passw0rd', 'letmein', 'dragon', 'monkey', 'master', 'shadow', 'sunshine',
+             'princess', 'football', 'baseball', 'welcome', 'qwerty123', 'abc123', 'iloveyou']
+
+
+@pytest.mark.parametrize('options', [
+    {'top_k': 2},
+    {'top_k': 1, 'min_prefix_count': 2},
+    {'min_prob': 0.5, 'min_prefix_count': 3},
+    {'top_k': 3, 'backoff': False},
+])
+def test_prune_never_adds_transitions(options):
+    model = MarkovModel(PASSWORDS, n=3)
+    result = model.prune(**options)
+    assert result['after']['transitions'] <= result['before']['transitions']
+    assert model.stats()['transitions'] <= result['before']['transitions']
+    model.reseed(0)
+    assert model.generate_batch(10, 8).shape[0] == 10
+
+
+def test_prune_respects_transition_budget():
+    model = MarkovModel(PASSWORDS, n=4)
+    model.prune(top_k=2, max_transitions=30)
+    assert model.stats()['transitions'] <= 30
+
+
+def test_removed_prefixes_back_off_to_suffix_tables():
+    model = MarkovModel(PASSWORDS, n=3)
+    model.prune(min_prefix_count=2)
+    tables = model.compiled
+    assert 'pa' in tables.prefix_index
+    # 'dr' встречается один раз и удалён; его суффикс остаётся для выборки
+    assert 'dr' not in tables.prefix_index
+    assert tables.backoff_state('dr') == tables.prefix_index['r']
+    assert np.all(tables.prefix_lengths[tables.start_states] == 2)
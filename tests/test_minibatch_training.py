@@ -0,0 +1,40 @@
+# tests/test_minibatch_training.py
+import numpy as np
+from models.minibatch_training import iter_file_batches, shuffle_chunks
+
+
+def encode(passwords):
+    values = np.array([int(password) for password in passwords], dtype=np.int64)
+    return values, values * 2
+
+
+def write_sorted_wordlist(path, count):
+    path.write_text(''.join(f"{i}\n" for i in range(count)))
+    return str(path)
+
+
+def test_shuffle_chunks_keeps_every_example_once():
+    chunks = [(np.arange(start, start + 10), np.arange(start, start + 10)) for start in range(0, 100, 10)]
+    output = list(shuffle_chunks(iter(chunks), 25, np.random.default_rng(0)))
+    values = np.concatenate([arrays[0] for arrays in output])
+    assert sorted(values.tolist()) == list(range(100))
+    assert values.tolist() != list(range(100))
+    assert all(np.array_equal(a, b) for a, b in output)
+
+
+def test_file_batches_are_shuffled_reproducibly(tmp_path):
+    file_path = write_sorted_wordlist(tmp_path / 'sorted.txt', 1000)
+    first = list(iter_file_batches(file_path, encode, 100, shuffle_buffer=500, rng=np.random.default_rng(1)))
+    second = list(iter_file_batches(file_path, encode, 100, shuffle_buffer=500, rng=np.random.default_rng(1)))
+    assert [len(batch[0]) for batch in first] == [100] * 10
+    assert all(np.array_equal(a[0], b[0]) for a, b in zip(first, second))
+    assert sorted(np.concatenate([batch[0] for batch in first]).tolist()) == list(range(1000))
+    # Первая минипартия берётся не из начала отсортированного файла
+    assert first[0][0].max() >= 100
+    assert np.array_equal(first[0][1], first[0][0] * 2)
+
+
+def test_file_order_without_shuffle_buffer(tmp_path):
+    file_path = write_sorted_wordlist(tmp_path / 'sorted.txt', 300)
+    batches = list(iter_file_batches(file_path, encode, 100))
+    assert np.concatenate([batch[0] for batch in batches]).tolist() == list(range(300))
@@ -0,0 +1,29 @@
+# tests/test_ml_password_model.py
+import pickle
+import numpy as np
+from models.ml_password_model import MLPasswordModel
+
+
+def encode_pairs(passwords):
+    X, y = [], []
+    for password in passwords:
+        for current, following in zip(password, password[1:]):
+            X.append([ord(current)])
+            y.append(ord(following))
+    return X, y
+
+
+def test_sampler_carries_only_compiled_tables():
+    model = MLPasswordModel(encode_pairs(['password', 'letmein', 'dragon']))
+    assert model.X_encoded.size
+
+    sampler = pickle.loads(pickle.dumps(model.sampler()))
+    assert not hasattr(sampler, 'X_encoded') and not hasattr(sampler, 'y_encoded')
+    assert sampler.dataset == ([], [])
+    assert sampler._engine is None
+    assert sampler.char_to_int == model.char_to_int
+    sampler.reseed(0)
+    batch = sampler.generate_batch(5, 8)
+    assert batch.shape == (5, 8)
+    # Остановившиеся цепочки дополняются нулями
+    assert np.isin(batch, [0] + [ord(char) for char in model.char_to_int]).all()
@@ -0,0 +1,86 @@
+# tests/test_queue_manager.py
+import threading
+import time
+import pytest
+from utils.database import Database
+from utils.queue_manager import COMPLETED, QueueManager
+
+
+def spec(device=None):
+    job_spec = {'model_file': 'model.lqm', 'hash_file': 'hashes.txt'}
+    if device is not None:
+        job_spec['device'] = device
+    return job_spec
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "queue.db"))
+    yield database
+    database.close()
+
+
+def take_all(manager):
+    with manager.condition:
+        taken = []
+        while True:
+            job = manager._next_job()
+            if job is None:
+                return taken
+            taken.append(job.task)
+
+
+def test_queue_orders_by_priority_then_arrival(db, null_logger):
+    manager = QueueManager(db, num_workers=0, logger=null_logger, resume=False)
+    for task, priority in [('low', 0), ('high-1', 5), ('mid', 1), ('high-2', 5), ('low-2', 0)]:
+        manager.add_task(task, spec(), priority)
+    assert [job.task for job in manager.task_queue] == ['high-1', 'high-2', 'mid', 'low', 'low-2']
+
+    assert manager.cancel(manager.task_queue[2].id)
+    # Задания на всех устройствах выполняются по одному
+    assert take_all(manager) == ['high-1']
+    assert manager._queue_keys == [job.sort_key for job in manager.task_queue]
+
+    resumed = QueueManager(db, num_workers=0, logger=null_logger, resume=True)
+    assert [job.task for job in resumed.task_queue] == ['high-1', 'high-2', 'low', 'low-2']
+
+
+def test_busy_devices_are_skipped_for_later_jobs(db, null_logger):
+    manager = QueueManager(db, num_workers=0, logger=null_logger, resume=False)
+    manager.add_task('gpu0-a', spec('0'), 9)
+    manager.add_task('all', spec(), 8)
+    manager.add_task('gpu0-b', spec('0'), 7)
+    manager.add_task('gpu1', spec('1'), 6)
+    manager.add_task('gpu0,1', spec('0,1'), 5)
+    # 'all' ждёт освобождения устройства 0, задание на устройстве 1 выполняется сразу
+    assert take_all(manager) == ['gpu0-a', 'gpu1']
+
+    with manager.condition:
+        manager._in_use.subtract(['hashcat:0', 'hashcat:1'])
+    assert take_all(manager) == ['all']
+
+
+def test_resource_limit_holds_across_workers(db, null_logger):
+    running, peak = {}, {}
+    lock = threading.Lock()
+
+    def pipeline(job_id, job_spec, token, progress_callback):
+        device = job_spec['device']
+        with lock:
+            running[device] = running.get(device, 0) + 1
+            peak[device] = max(peak.get(device, 0), running[device])
+        time.sleep(0.05)
+        with lock:
+            running[device] -= 1
+        return {}
+
+    manager = QueueManager(db, num_workers=4, logger=null_logger, pipeline=pipeline, resume=False,
+                           resource_limits={'hashcat:1': 2})
+    job_ids = [manager.add_task(f'job-{i}', spec(str(i % 2))) for i in range(8)]
+    for job_id in job_ids:
+        deadline = time.monotonic() + 10
+        while not (manager.get_job(job_id) or {}).get('finished') and time.monotonic() < deadline:
+            manager.results.wait(job_id, manager.get_job(job_id)['version'], timeout=1)
+    manager.shutdown()
+    assert all(manager.get_job(job_id)['status'] == COMPLETED for job_id in job_ids)
+    assert peak['0'] == 1 and peak['1'] <= 2
@@ -0,0 +1,35 @@
+# tests/test_result_store.py
+from utils.result_store import ResultStore
+
+
+def test_evicts_oldest_finished_jobs_beyond_limit():
+    store = ResultStore(max_jobs=2, ttl=None)
+    store.update(1, status='Running')
+    for job_id in (2, 3, 4):
+        store.update(job_id, status='Completed', finished=True)
+    store.update(1, progress=50)
+    assert store.get(2) is None
+    assert [record['id'] for record in store.list()] == [3, 4, 1]
+
+
+def test_expires_finished_jobs_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('utils.result_store.time.time', lambda: now[0])
+    store = ResultStore(max_jobs=10, ttl=60)
+    store.update(1, status='Completed', finished=True)
+    store.update(2, status='Running')
+    now[0] += 61
+    store.update(3, status='Queued')
+    assert store.get(1) is None
+    assert store.get(2)['status'] == 'Running'
+
+
+def test_refinished_job_moves_to_queue_tail():
+    store = ResultStore(max_jobs=1, ttl=None)
+    store.update(1, status='Completed', finished=True)
+    store.update(1, status='Queued', finished=False)
+    store.update(2, status='Completed', finished=True)
+    assert store.get(1)['status'] == 'Queued'
+    store.update(1, status='Completed', finished=True)
+    assert store.get(2) is None
+    assert store.get(1)['finished']
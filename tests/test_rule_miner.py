@@ -0,0 +1,31 @@
+# tests/test_rule_miner.py
+from hashcat.rule_miner import RuleMiner, apply_rule
+
+
+def test_digit_suffix_is_appended_without_dictionary():
+    assert RuleMiner().derive_rule('Summer2024') == ('c $2 $0 $2 $4', 'summer')
+    assert RuleMiner().derive_rule('HeLLo99') == ('T0 T2 T3 $9 $9', 'hello')
+
+
+def test_digit_prefix_is_prepended_without_dictionary():
+    assert RuleMiner().derive_rule('123abc') == ('^3 ^2 ^1', 'abc')
+
+
+def test_inner_leet_is_still_restored():
+    rule, base = RuleMiner().derive_rule('P@ssw0rd1')
+    assert base == 'password'
+    assert apply_rule(base, rule) == 'P@ssw0rd1'
+    assert rule.endswith('$1')
+
+
+def test_dictionary_prefers_appends_over_leet_in_suffix():
+    miner = RuleMiner(['summer', 'summerzoz', 'hello', 'hellogg'])
+    assert miner.derive_rule('Summer2024') == ('c $2 $0 $2 $4', 'summer')
+    assert miner.derive_rule('hello99') == ('$9 $9', 'hello')
+
+
+def test_rank_with_dictionary_uses_mined_counts():
+    miner = RuleMiner(['summer', 'winter', 'hello', 'dragon'])
+    ranked = miner.rank(['summer1', 'winter1', 'Hello', 'dragon1', 'unknown!'])
+    assert ranked[0] == ('$1', 3, 3 / 4)
+    assert ('c', 1, 1 / 4) in ranked
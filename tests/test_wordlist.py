@@ -0,0 +1,15 @@
+# tests/test_wordlist.py
+import pytest
+from utils.wordlist import count_lines
+
+
+@pytest.mark.parametrize('content, expected', [
+    (b'', 0),
+    (b'password\n', 1),
+    (b'password\nletmein', 2),
+    (b'a\r\nb\r\n\n', 3),
+])
+def test_count_lines(tmp_path, content, expected):
+    path = tmp_path / 'words.txt'
+    path.write_bytes(content)
+    assert count_lines(str(path), chunk_bytes=3) == expected
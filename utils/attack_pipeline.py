@@ -0,0 +1,179 @@
+# utils/attack_pipeline.py
+import os
+import threading
+from models.markov_model import MarkovModel
+from models.ml_password_model import MLPasswordModel
+from models.context_ml_model import ContextMLPasswordModel
+from generators.adaptive_password_generator import AdaptivePasswordGenerator
+from hashcat.hashcat_runner import HashcatRunner
+from hashcat.cracked_index import CrackedHashIndex
+from utils.bloom_filter import BloomFilter
+
+# Типы моделей, доступные в параметрах задания
+MODEL_TYPES = {
+    'MarkovModel': MarkovModel,
+    'MLPasswordModel': MLPasswordModel,
+    'ContextMLPasswordModel': ContextMLPasswordModel,
+}
+# Обязательные параметры задания
+REQUIRED_PARAMETERS = ('model_file', 'hash_file')
+
+
+class JobCancelled(Exception):
+    """
+    Исключение, прерывающее отменённое задание.
+    """
+
+
+class CancelToken:
+    """
+    Признак отмены задания с функциями, вызываемыми при отмене (например,
+    завершением процесса Hashcat).
+    """
+
+    def __init__(self):
+        """
+        Инициализирует признак отмены.
+        """
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        """
+        True, если задание отменено.
+        """
+        return self._event.is_set()
+
+    def cancel(self):
+        """
+        Отменяет задание и вызывает зарегистрированные функции.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback):
+        """
+        Регистрирует функцию, вызываемую при отмене; для уже отменённого
+        задания функция вызывается сразу.
+
+        :param callback: Функция без аргументов.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def check(self):
+        """
+        Прерывает задание, если оно отменено.
+        """
+        if self._event.is_set():
+            raise JobCancelled("Задание отменено.")
+
+
+def validate_spec(spec):
+    """
+    Проверяет параметры задания конвейера.
+
+    :param spec: Словарь параметров.
+    """
+    missing = [name for name in REQUIRED_PARAMETERS if not spec.get(name)]
+    if missing:
+        raise ValueError(f"Не заданы параметры задания: {', '.join(missing)}")
+    if spec.get('model_type', 'MarkovModel') not in MODEL_TYPES:
+        raise ValueError(f"Неизвестный тип модели: {spec['model_type']}")
+
+
+def job_resources(spec):
+    """
+    Определяет ресурсы, занимаемые заданием.
+
+    Задание занимает устройства Hashcat, перечисленные в параметре device
+    (как в опции -d), или, если он не задан, все устройства ('hashcat:*').
+
+    :param spec: Словарь параметров задания.
+    :return: Список имён ресурсов вида 'класс:имя'.
+    """
+    device = spec.get('device')
+    if device is None or str(device).strip() == '':
+        return ['hashcat:*']
+    return [f"hashcat:{name.strip()}" for name in str(device).split(',') if name.strip()]
+
+
+def run_attack_pipeline(job_id, spec, db, logger, token, progress_callback=None):
+    """
+    Выполняет конвейер атаки: загрузка модели, генерация кандидатов и
+    запуск Hashcat, повторяемые rounds раз с дообучением модели на
+    взломанных паролях.
+
+    Параметры задания: model_file, hash_file (обязательные), model_type,
+    length, batch_size, rounds, hashcat_options, hash_mode, device, stream,
+    dedup, output_file.
+
+    При dedup (по умолчанию включён) повторяющиеся кандидаты и уже
+    взломанные пароли из индекса отбрасываются фильтром Блума.
+
+    Кандидаты генерируются в потоке задания: конвейер выполняется в
+    многопоточном процессе сервера, где fork скопировал бы захваченные
+    блокировки, а spawn заново выполнил бы модуль сервера с очередью заданий.
+
+    :param job_id: Идентификатор задания.
+    :param spec: Словарь параметров задания.
+    :param db: Экземпляр Database (индекс взломанных хешей).
+    :param logger: Экземпляр Logger.
+    :param token: Экземпляр CancelToken.
+    :param progress_callback: Функция, принимающая HashcatStatus, или None.
+    :return: Словарь с результатами: статистика партий, кандидаты, взломанные хеши,
+             отброшенные повторы.
+    """
+    validate_spec(spec)
+    token.check()
+    model = MODEL_TYPES[spec.get('model_type', 'MarkovModel')]()
+    model.load_model(spec['model_file'])
+
+    options = spec.get('hashcat_options', '-a 0')
+    if spec.get('device') is not None and str(spec['device']).strip():
+        options = f"{options} -d {spec['device']}"
+    hash_mode = int(spec['hash_mode']) if spec.get('hash_mode') is not None else None
+    runner = HashcatRunner(spec['hash_file'], options, progress_callback, logger, hash_mode=hash_mode,
+                           cancel_token=token)
+    runner.cracked_index = CrackedHashIndex(db, runner.hash_mode)
+
+    batch_size, num_rounds = int(spec.get('batch_size', 10000)), int(spec.get('rounds', 1))
+    dedup_filter = None
+    if spec.get('dedup', True):
+        plaintexts = runner.cracked_index.plaintexts()
+        dedup_filter = BloomFilter(capacity=batch_size * num_rounds + len(plaintexts) or 1, error_rate=0.001)
+        dedup_filter.preload(plaintexts)
+    output_file = spec.get('output_file') or f"job_{job_id}_passwords.txt"
+    generator = AdaptivePasswordGenerator(model, output_file, batch_size, logger, dedup_filter=dedup_filter,
+                                          cancel_token=token)
+
+    cracked = {}
+
+    def finish_round(stats):
+        cracked.update(runner.last_cracked)
+        token.check()
+
+    try:
+        rounds = generator.run_feedback_loop(runner, int(spec.get('length', 8)), num_rounds,
+                                             stream=bool(spec.get('stream', False)), num_workers=1,
+                                             round_callback=finish_round)
+    finally:
+        if not spec.get('output_file') and os.path.exists(output_file):
+            os.remove(output_file)
+    token.check()
+    return {
+        "rounds": rounds,
+        "candidates": sum(stats["candidates"] or 0 for stats in rounds),
+        "cracked": len(cracked),
+        "duplicates_skipped": generator.duplicates_skipped,
+    }
@@ -0,0 +1,211 @@
+# utils/bloom_filter.py
+import hashlib
+import itertools
+import math
+import os
+import struct
+import numpy as np
+
+
+class BloomFilter:
+    """
+    Фильтр Блума для подавления повторяющихся кандидатов.
+
+    Размер битового массива и число хеш-функций вычисляются по ожидаемому
+    количеству элементов и допустимой доле ложных срабатываний, поэтому
+    потребление памяти фиксировано. Позиции битов получаются двойным
+    хешированием из одного дайджеста BLAKE2b.
+    """
+
+    MAGIC = b'LQBF'
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct('<4sIQIQQd')
+
+    def __init__(self, capacity=10_000_000, error_rate=0.001):
+        """
+        Инициализирует пустой фильтр.
+
+        :param capacity: Ожидаемое количество элементов.
+        :param error_rate: Допустимая доля ложных срабатываний при заполнении до capacity.
+        """
+        if capacity <= 0:
+            raise ValueError("Ёмкость фильтра должна быть положительной.")
+        if not 0 < error_rate < 1:
+            raise ValueError("Доля ложных срабатываний должна быть в интервале (0, 1).")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, items):
+        """
+        Вычисляет позиции битов для списка строк.
+
+        :param items: Список строк.
+        :return: Массив uint64 формы (len(items), num_hashes).
+        """
+        digests = b''.join(hashlib.blake2b(item.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+                           for item in items)
+        hashes = np.frombuffer(digests, dtype='<u8').reshape(-1, 2)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            combined = hashes[:, :1] + steps * (hashes[:, 1:] | np.uint64(1))
+        return combined % np.uint64(self.num_bits)
+
+    def _contains_positions(self, positions):
+        """
+        Проверяет, установлены ли все биты для каждой строки позиций.
+
+        :param positions: Массив позиций формы (n, num_hashes).
+        :return: Булев массив длины n.
+        """
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        return np.all(self.bits[positions >> np.uint64(3)] & masks, axis=1)
+
+    def _set_positions(self, positions):
+        """
+        Устанавливает биты для переданных позиций.
+
+        :param positions: Массив позиций.
+        """
+        positions = positions.ravel()
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+
+    def __contains__(self, item):
+        """
+        Проверяет, встречался ли элемент (возможны ложные срабатывания).
+
+        :param item: Строка.
+        :return: True, если элемент, вероятно, уже добавлен.
+        """
+        return bool(self._contains_positions(self._positions([item]))[0])
+
+    def add(self, item):
+        """
+        Добавляет элемент в фильтр.
+
+        :param item: Строка.
+        """
+        self.add_many([item])
+
+    def add_many(self, items):
+        """
+        Добавляет набор элементов в фильтр.
+
+        :param items: Список строк.
+        """
+        self.filter_new(items)
+
+    def filter_new(self, items):
+        """
+        Возвращает элементы, которых ещё нет в фильтре, и добавляет их.
+
+        Повторы внутри самого набора также отбрасываются; порядок сохраняется.
+
+        :param items: Список строк.
+        :return: Список новых элементов.
+        """
+        unique = list(dict.fromkeys(items))
+        if not unique:
+            return []
+        positions = self._positions(unique)
+        fresh = ~self._contains_positions(positions)
+        self._set_positions(positions[fresh])
+        new_items = [item for item, is_new in zip(unique, fresh.tolist()) if is_new]
+        self.count += len(new_items)
+        return new_items
+
+    def preload(self, items, chunk_size=65536):
+        """
+        Добавляет в фильтр элементы итерируемого (например, открытые тексты
+        из CrackedHashIndex.plaintexts), частями по chunk_size.
+
+        :param items: Итерируемое строк.
+        :param chunk_size: Количество элементов, добавляемых за один раз.
+        :return: Количество добавленных новых элементов.
+        """
+        added = 0
+        items = iter(items)
+        while True:
+            chunk = list(itertools.islice(items, chunk_size))
+            if not chunk:
+                break
+            added += len(self.filter_new(chunk))
+        return added
+
+    def preload_file(self, file_path, chunk_lines=65536, encoding='utf-8'):
+        """
+        Добавляет в фильтр все строки файла (например, ранее сгенерированный
+        словарь или outfile Hashcat с --outfile-format 2). Строки outfile в
+        формате «хеш:пароль» (--outfile-format 1,2) добавлялись бы целиком;
+        взломанные пароли добавляются через preload из индекса.
+
+        :param file_path: Путь к файлу.
+        :param chunk_lines: Количество строк, добавляемых за один раз.
+        :param encoding: Кодировка файла.
+        :return: Количество добавленных новых элементов.
+        """
+        with open(file_path, 'r', encoding=encoding, errors='surrogateescape') as f:
+            return self.preload((line.rstrip('\r\n') for line in f), chunk_lines)
+
+    @property
+    def estimated_error_rate(self):
+        """
+        Оценка текущей доли ложных срабатываний при фактическом заполнении.
+        """
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def save(self, file_path):
+        """
+        Сохраняет фильтр в бинарный файл.
+
+        Фильтр записывается во временный файл, который затем подменяет
+        прежний, поэтому сбой при записи не портит сохранённый фильтр.
+
+        :param file_path: Путь к файлу.
+        """
+        temp_path = f"{file_path}.tmp{os.getpid()}"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, self.num_bits, self.num_hashes,
+                                         self.count, self.capacity, self.error_rate))
+                f.write(self.bits.tobytes())
+            os.replace(temp_path, file_path)
+        except Exception as e:
+            raise IOError(f"Не удалось сохранить фильтр: {e}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Загружает фильтр из бинарного файла.
+
+        :param file_path: Путь к файлу.
+        :return: Экземпляр BloomFilter.
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                header = f.read(cls.HEADER.size)
+                magic, version, num_bits, num_hashes, count, capacity, error_rate = cls.HEADER.unpack(header)
+                if magic != cls.MAGIC or version != cls.FORMAT_VERSION:
+                    raise ValueError("файл повреждён или несовместим")
+                bits = np.frombuffer(f.read(), dtype=np.uint8).copy()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Файл фильтра не найден: {file_path}")
+        except (struct.error, ValueError) as e:
+            raise ValueError(f"Ошибка при загрузке фильтра: {e}")
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError("Ошибка при загрузке фильтра: неверный размер битового массива.")
+        bloom = cls.__new__(cls)
+        bloom.capacity = capacity
+        bloom.error_rate = error_rate
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.bits = bits
+        bloom.count = count
+        return bloom
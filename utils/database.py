@@ -1,55 +1,296 @@
 # utils/database.py
+import queue
 import sqlite3
 import threading
-import os
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# Маркер остановки потока записи
+_STOP = None
+# Столбцы, доступные для выборки в постраничных запросах
+ATTACK_COLUMNS = ('id', 'task', 'status', 'result', 'created_at', 'priority', 'updated_at')
+MODEL_COLUMNS = ('id', 'model_type', 'file_path', 'version', 'saved_at')
 
 
 class Database:
     """
     Класс для управления базой данных.
+
+    База работает в режиме WAL, поэтому чтение не блокируется записью.
+    Запросы на чтение выполняются на соединениях из пула (каждое соединение
+    в каждый момент используется одним потоком). Все изменения выполняет
+    единственный поток записи: запросы, накопившиеся в очереди, объединяются
+    в одну транзакцию (каждый — в своей точке сохранения, так что ошибка
+    одного запроса не отменяет остальные), и вызывающий поток получает
+    результат после фиксации транзакции.
     """
 
-    def __init__(self, db_file="password_cracker.db"):
+    def __init__(self, db_file="password_cracker.db", pool_size=4, batch_size=500, timeout=30.0):
         """
         Инициализирует подключение к базе данных.
 
         :param db_file: Путь к файлу базы данных.
+        :param pool_size: Максимальное количество соединений для чтения.
+        :param batch_size: Максимальное количество запросов записи в одной транзакции.
+        :param timeout: Время ожидания блокировки базы данных в секундах.
         """
         self.db_file = db_file
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.timeout = timeout
         self.lock = threading.Lock()
         self.connect()
         self.create_tables()
 
+    def _open_connection(self):
+        """
+        Открывает соединение в режиме автофиксации (транзакциями управляет код).
+
+        :return: Соединение sqlite3.
+        """
+        conn = sqlite3.connect(self.db_file, timeout=self.timeout, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
     def connect(self):
         """
-        Устанавливает соединение с базой данных.
+        Устанавливает соединение записи, включает WAL и запускает поток записи.
         """
-        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
-        self.cursor = self.conn.cursor()
+        self.conn = self._open_connection()
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._writes = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="DatabaseWriter", daemon=True)
+        self._writer.start()
 
-    def create_tables(self):
+    def close(self):
+        """
+        Выполняет оставшиеся запросы записи и закрывает все соединения.
+        """
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._writes.put(_STOP)
+        self._writer.join()
+        self.conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    @contextmanager
+    def _reader(self):
+        """
+        Выдаёт соединение для чтения из пула, при необходимости открывая новое.
+        """
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                create = self._reader_count < self.pool_size
+                if create:
+                    self._reader_count += 1
+            conn = self._open_connection() if create else self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _fetchall(self, sql, params=()):
+        """
+        Выполняет запрос на чтение.
+
+        :param sql: Текст запроса.
+        :param params: Параметры запроса.
+        :return: Список строк.
+        """
+        with self._reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _fetchone(self, sql, params=()):
+        """
+        Выполняет запрос на чтение одной строки.
+
+        :param sql: Текст запроса.
+        :param params: Параметры запроса.
+        :return: Строка или None.
+        """
+        with self._reader() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _write(self, operation):
+        """
+        Передаёт операцию потоку записи и ожидает фиксации её транзакции.
+
+        Проверка закрытия и постановка в очередь выполняются под self.lock,
+        поэтому операция не может оказаться в очереди после маркера остановки.
+
+        :param operation: Функция, принимающая соединение записи.
+        :return: Результат операции.
+        """
+        future = Future()
+        with self.lock:
+            if self._closed:
+                raise RuntimeError("База данных закрыта.")
+            self._writes.put((operation, future))
+        return future.result()
+
+    def _write_loop(self):
+        """
+        Цикл потока записи: объединяет накопившиеся операции в транзакции.
+
+        При выходе из цикла (по маркеру остановки или из-за ошибки) операции
+        незавершённой партии и оставшиеся в очереди завершаются исключением,
+        чтобы вызывающие потоки не ждали их бесконечно.
         """
-        Создаёт необходимые таблицы в базе данных.
+        batch = []
+        try:
+            stopping = False
+            while not stopping:
+                item = self._writes.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._writes.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._run_batch(batch)
+        finally:
+            self._fail_pending(batch)
+
+    def _fail_pending(self, batch):
+        """
+        Завершает исключением невыполненные операции партии и очереди записи.
+
+        :param batch: Список кортежей (операция, Future) последней партии.
         """
         with self.lock:
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS attacks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    task TEXT,
-                    status TEXT,
-                    result TEXT
-                )
-            ''')
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS models (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    model_type TEXT,
-                    file_path TEXT,
-                    version TEXT,
-                    saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            self.conn.commit()
+            # Новые операции после остановки потока отклоняются в _write
+            self._closed = True
+        pending = list(batch)
+        while True:
+            try:
+                item = self._writes.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item)
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Поток записи базы данных остановлен."))
+
+    def _run_batch(self, batch):
+        """
+        Выполняет партию операций записи в одной транзакции.
+
+        :param batch: Список кортежей (операция, Future).
+        """
+        outcomes = []
+        try:
+            self.conn.execute('BEGIN IMMEDIATE')
+            for operation, future in batch:
+                self.conn.execute('SAVEPOINT operation')
+                try:
+                    result = operation(self.conn)
+                except Exception as e:
+                    self.conn.execute('ROLLBACK TO operation')
+                    outcomes.append((future, None, e))
+                else:
+                    outcomes.append((future, result, None))
+                self.conn.execute('RELEASE operation')
+            self.conn.execute('COMMIT')
+        except Exception as e:
+            if self.conn.in_transaction:
+                self.conn.execute('ROLLBACK')
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def create_tables(self):
+        """
+        Создаёт необходимые таблицы и индексы в базе данных.
+        """
+        self._write(self._create_tables)
+
+    @staticmethod
+    def _create_tables(conn):
+        """
+        Создаёт таблицы и индексы (выполняется в потоке записи).
+
+        :param conn: Соединение записи.
+        """
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS attacks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT,
+                status TEXT,
+                result TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                priority INTEGER NOT NULL DEFAULT 0,
+                spec TEXT,
+                updated_at TIMESTAMP
+            )
+        ''')
+        # В базах старых версий этих столбцов нет; время создания существующих строк остаётся NULL
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(attacks)')}
+        for column, definition in (('created_at', 'TIMESTAMP'), ('priority', 'INTEGER NOT NULL DEFAULT 0'),
+                                    ('spec', 'TEXT'), ('updated_at', 'TIMESTAMP')):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE attacks ADD COLUMN {column} {definition}')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS models (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                model_type TEXT,
+                file_path TEXT,
+                version TEXT,
+                saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cracked_hashes (
+                hash TEXT NOT NULL,
+                hash_mode INTEGER NOT NULL DEFAULT 0,
+                plaintext TEXT NOT NULL,
+                cracked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (hash, hash_mode)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_attacks_task ON attacks (task)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_attacks_status ON attacks (status)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_attacks_created_at ON attacks (created_at)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_models_model_type ON models (model_type)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_models_saved_at ON models (saved_at)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cracked_hashes_plaintext ON cracked_hashes (plaintext)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cracked_hashes_cracked_at ON cracked_hashes (cracked_at)
+        ''')
 
     def add_attack(self, task, status="In Progress", result=None):
         """
@@ -58,12 +299,11 @@ class Database:
         :param task: Описание задачи атаки.
         :param status: Статус задачи.
         :param result: Результат атаки.
+        :return: Идентификатор атаки.
         """
-        with self.lock:
-            self.cursor.execute('''
-                INSERT INTO attacks (task, status, result) VALUES (?, ?, ?)
-            ''', (task, status, result))
-            self.conn.commit()
+        return self._write(lambda conn: conn.execute('''
+            INSERT INTO attacks (task, status, result, created_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (task, status, result)).lastrowid)
 
     def update_attack_status(self, task, status, result):
         """
@@ -72,12 +312,63 @@ class Database:
         :param task: Описание задачи атаки.
         :param status: Новый статус.
         :param result: Результат атаки.
+        :return: Количество обновлённых записей.
         """
-        with self.lock:
-            self.cursor.execute('''
-                UPDATE attacks SET status = ?, result = ? WHERE task = ?
-            ''', (status, result, task))
-            self.conn.commit()
+        return self._write(lambda conn: conn.execute('''
+            UPDATE attacks SET status = ?, result = ? WHERE task = ?
+        ''', (status, result, task)).rowcount)
+
+    def add_job(self, task, spec, priority=0, status="Queued"):
+        """
+        Добавляет задание атаки с параметрами конвейера.
+
+        :param task: Описание задачи.
+        :param spec: Параметры конвейера (строка JSON).
+        :param priority: Приоритет задания (больше — раньше).
+        :param status: Начальный статус.
+        :return: Идентификатор задания.
+        """
+        return self._write(lambda conn: conn.execute('''
+            INSERT INTO attacks (task, status, spec, priority, created_at, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        ''', (task, status, spec, priority)).lastrowid)
+
+    def update_job_status(self, job_id, status, result=None):
+        """
+        Обновляет статус и результат задания по его идентификатору.
+
+        :param job_id: Идентификатор задания.
+        :param status: Новый статус.
+        :param result: Результат (строка) или None.
+        :return: Количество обновлённых записей.
+        """
+        return self._write(lambda conn: conn.execute('''
+            UPDATE attacks SET status = ?, result = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (status, result, job_id)).rowcount)
+
+    def list_jobs_by_status(self, statuses):
+        """
+        Получает задания с параметрами конвейера в заданных статусах.
+
+        :param statuses: Список статусов.
+        :return: Список кортежей (id, task, status, spec, priority) в порядке id.
+        """
+        placeholders = ','.join('?' * len(statuses))
+        return self._fetchall(f'''
+            SELECT id, task, status, spec, priority FROM attacks
+            WHERE status IN ({placeholders}) AND spec IS NOT NULL ORDER BY id
+        ''', tuple(statuses))
+
+    def get_attack(self, attack_id):
+        """
+        Получает атаку по её идентификатору.
+
+        :param attack_id: Идентификатор атаки.
+        :return: Кортеж со столбцами ATTACK_COLUMNS или None.
+        """
+        return self._fetchone(f'''
+            SELECT {', '.join(ATTACK_COLUMNS)} FROM attacks WHERE id = ?
+        ''', (attack_id,))
 
     def list_attacks(self):
         """
@@ -85,11 +376,41 @@ class Database:
 
         :return: Список кортежей с данными атак.
         """
-        with self.lock:
-            self.cursor.execute('''
-                SELECT * FROM attacks
-            ''')
-            return self.cursor.fetchall()
+        return self._fetchall('''
+            SELECT * FROM attacks
+        ''')
+
+    def list_attacks_page(self, limit=100, after=None, status=None, since=None, until=None, fields=None):
+        """
+        Получает страницу атак (постраничная выборка по ключу id).
+
+        :param limit: Максимальное количество записей.
+        :param after: Идентификатор последней атаки предыдущей страницы или None.
+        :param status: Статус для отбора или None.
+        :param since: Нижняя граница времени создания ('ГГГГ-ММ-ДД ЧЧ:ММ:СС', UTC) или None.
+        :param until: Верхняя граница времени создания (не включается) или None.
+        :param fields: Список столбцов из ATTACK_COLUMNS или None — все столбцы.
+        :return: Список кортежей в порядке fields, упорядоченный по id.
+        """
+        filters = [('status = ?', status), ('created_at >= ?', since), ('created_at < ?', until)]
+        return self._select_page('attacks', ATTACK_COLUMNS, fields, filters, limit, after)
+
+    def iter_attacks(self, status=None, since=None, until=None, fields=None, batch_size=1000):
+        """
+        Последовательно выдаёт атаки страницами по batch_size записей.
+
+        Соединение не удерживается между страницами, поэтому выгрузка не
+        блокирует других читателей и запись.
+
+        :param status: Статус для отбора или None.
+        :param since: Нижняя граница времени создания или None.
+        :param until: Верхняя граница времени создания (не включается) или None.
+        :param fields: Список столбцов из ATTACK_COLUMNS или None.
+        :param batch_size: Размер страницы.
+        :return: Итератор кортежей в порядке fields.
+        """
+        filters = [('status = ?', status), ('created_at >= ?', since), ('created_at < ?', until)]
+        return self._iter_pages('attacks', ATTACK_COLUMNS, fields, filters, batch_size)
 
     def add_model(self, model_type, file_path, version):
         """
@@ -98,12 +419,11 @@ class Database:
         :param model_type: Тип модели (MarkovModel, MLPasswordModel).
         :param file_path: Путь к файлу модели.
         :param version: Версия модели.
+        :return: Идентификатор записи модели.
         """
-        with self.lock:
-            self.cursor.execute('''
-                INSERT INTO models (model_type, file_path, version) VALUES (?, ?, ?)
-            ''', (model_type, file_path, version))
-            self.conn.commit()
+        return self._write(lambda conn: conn.execute('''
+            INSERT INTO models (model_type, file_path, version) VALUES (?, ?, ?)
+        ''', (model_type, file_path, version)).lastrowid)
 
     def list_models(self):
         """
@@ -111,11 +431,91 @@ class Database:
 
         :return: Список кортежей с данными моделей.
         """
-        with self.lock:
-            self.cursor.execute('''
-                SELECT * FROM models
-            ''')
-            return self.cursor.fetchall()
+        return self._fetchall('''
+            SELECT * FROM models
+        ''')
+
+    def list_models_page(self, limit=100, after=None, model_type=None, since=None, until=None, fields=None):
+        """
+        Получает страницу сохранённых моделей (постраничная выборка по ключу id).
+
+        :param limit: Максимальное количество записей.
+        :param after: Идентификатор последней модели предыдущей страницы или None.
+        :param model_type: Тип модели для отбора или None.
+        :param since: Нижняя граница времени сохранения ('ГГГГ-ММ-ДД ЧЧ:ММ:СС', UTC) или None.
+        :param until: Верхняя граница времени сохранения (не включается) или None.
+        :param fields: Список столбцов из MODEL_COLUMNS или None — все столбцы.
+        :return: Список кортежей в порядке fields, упорядоченный по id.
+        """
+        filters = [('model_type = ?', model_type), ('saved_at >= ?', since), ('saved_at < ?', until)]
+        return self._select_page('models', MODEL_COLUMNS, fields, filters, limit, after)
+
+    def iter_models(self, model_type=None, since=None, until=None, fields=None, batch_size=1000):
+        """
+        Последовательно выдаёт сохранённые модели страницами по batch_size записей.
+
+        :param model_type: Тип модели для отбора или None.
+        :param since: Нижняя граница времени сохранения или None.
+        :param until: Верхняя граница времени сохранения (не включается) или None.
+        :param fields: Список столбцов из MODEL_COLUMNS или None.
+        :param batch_size: Размер страницы.
+        :return: Итератор кортежей в порядке fields.
+        """
+        filters = [('model_type = ?', model_type), ('saved_at >= ?', since), ('saved_at < ?', until)]
+        return self._iter_pages('models', MODEL_COLUMNS, fields, filters, batch_size)
+
+    def _select_page(self, table, columns, fields, filters, limit, after):
+        """
+        Выполняет постраничный запрос: строки с id больше after в порядке id.
+
+        :param table: Имя таблицы.
+        :param columns: Допустимые столбцы.
+        :param fields: Запрошенные столбцы или None.
+        :param filters: Список пар (условие с одним параметром, значение); условия со значением None пропускаются.
+        :param limit: Максимальное количество строк.
+        :param after: Идентификатор, после которого начинается страница, или None.
+        :return: Список кортежей.
+        """
+        fields = list(fields) if fields else list(columns)
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"Неизвестные поля: {', '.join(unknown)}")
+        conditions, params = [], []
+        if after is not None:
+            conditions.append('id > ?')
+            params.append(after)
+        for condition, value in filters:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._fetchall(f'''
+            SELECT {', '.join(fields)} FROM {table} {where} ORDER BY id LIMIT ?
+        ''', (*params, limit))
+
+    def _iter_pages(self, table, columns, fields, filters, batch_size):
+        """
+        Выдаёт строки запроса, последовательно запрашивая страницы по ключу id.
+
+        :param table: Имя таблицы.
+        :param columns: Допустимые столбцы.
+        :param fields: Запрошенные столбцы или None.
+        :param filters: Список пар (условие, значение).
+        :param batch_size: Размер страницы.
+        :return: Итератор кортежей в порядке fields.
+        """
+        fields = list(fields) if fields else list(columns)
+        with_id = 'id' not in fields
+        selected = ['id'] + fields if with_id else fields
+        key = selected.index('id')
+        after = None
+        while True:
+            rows = self._select_page(table, columns, selected, filters, batch_size, after)
+            for row in rows:
+                yield row[1:] if with_id else row
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][key]
 
     def get_model(self, model_id):
         """
@@ -124,8 +524,70 @@ class Database:
         :param model_id: Идентификатор модели.
         :return: Кортеж с данными модели.
         """
-        with self.lock:
-            self.cursor.execute('''
-                SELECT * FROM models WHERE id = ?
-            ''', (model_id,))
-            return self.cursor.fetchone()
+        return self._fetchone('''
+            SELECT * FROM models WHERE id = ?
+        ''', (model_id,))
+
+    def add_cracked_hashes(self, pairs, hash_mode=0):
+        """
+        Добавляет взломанные хеши; уже известные хеши не перезаписываются.
+
+        :param pairs: Итерируемое пар (хеш, открытый текст).
+        :param hash_mode: Режим хеша Hashcat (-m).
+        :return: Количество добавленных записей.
+        """
+        rows = [(hash_value, hash_mode, plaintext) for hash_value, plaintext in pairs]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT OR IGNORE INTO cracked_hashes (hash, hash_mode, plaintext) VALUES (?, ?, ?)
+            ''', rows)
+            return conn.total_changes - before
+
+        return self._write(insert)
+
+    def get_cracked_hashes(self, hashes, hash_mode=0, chunk_size=500):
+        """
+        Находит открытые тексты для набора хешей.
+
+        Запрос выполняется частями, чтобы не превышать ограничение SQLite
+        на количество параметров.
+
+        :param hashes: Итерируемое хешей.
+        :param hash_mode: Режим хеша Hashcat (-m).
+        :param chunk_size: Количество хешей в одном запросе.
+        :return: Словарь {хеш: открытый текст} для взломанных хешей.
+        """
+        hashes = list(hashes)
+        found = {}
+        with self._reader() as conn:
+            for start in range(0, len(hashes), chunk_size):
+                chunk = hashes[start:start + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(conn.execute(f'''
+                    SELECT hash, plaintext FROM cracked_hashes
+                    WHERE hash_mode = ? AND hash IN ({placeholders})
+                ''', (hash_mode, *chunk)).fetchall())
+        return found
+
+    def list_cracked_hashes(self, hash_mode=None, plaintext=None):
+        """
+        Получает список взломанных хешей.
+
+        :param hash_mode: Режим хеша Hashcat или None — все режимы.
+        :param plaintext: Открытый текст для отбора или None.
+        :return: Список кортежей (хеш, режим, открытый текст, время взлома).
+        """
+        conditions, params = [], []
+        if hash_mode is not None:
+            conditions.append('hash_mode = ?')
+            params.append(hash_mode)
+        if plaintext is not None:
+            conditions.append('plaintext = ?')
+            params.append(plaintext)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._fetchall(f'''
+            SELECT hash, hash_mode, plaintext, cracked_at FROM cracked_hashes {where}
+            ORDER BY cracked_at
+        ''', params)
@@ -1,47 +1,156 @@
 # utils/logger.py
+import atexit
 import json
+import logging
 import os
+import queue
 import threading
+import time
+
+# Политики синхронизации с диском: после каждой записанной партии,
+# не чаще fsync_interval секунд или только по решению ОС
+FSYNC_POLICIES = ('always', 'interval', 'never')
+# Маркер остановки фонового потока записи
+_STOP = object()
+
+
+def iter_log_file(file_path):
+    """
+    Последовательно читает записи из файла JSON Lines.
+
+    Пустые и повреждённые строки (например, недописанная последняя строка
+    после аварийного завершения) пропускаются.
+
+    :param file_path: Путь к файлу лога.
+    :return: Итератор словарей.
+    """
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def is_json_array_log(file_path):
+    """
+    Проверяет, записан ли лог в старом формате — одним массивом JSON.
+
+    :param file_path: Путь к файлу лога.
+    :return: True, если первый непробельный символ файла — '['.
+    """
+    if not os.path.exists(file_path):
+        return False
+    with open(file_path, 'r', encoding='utf-8') as file:
+        head = file.read(64).lstrip()
+    return head.startswith('[')
+
+
+def migrate_json_array_log(source, target):
+    """
+    Переписывает лог из массива JSON в формат JSON Lines.
+
+    Записи source помещаются перед записями target (если он существует),
+    результат атомарно заменяет target. Если source и target — разные
+    файлы, source после переноса переименовывается в source + '.bak'.
+
+    :param source: Путь к логу в формате массива JSON.
+    :param target: Путь к логу в формате JSON Lines.
+    :return: Количество перенесённых записей.
+    """
+    try:
+        with open(source, 'r', encoding='utf-8') as file:
+            records = json.load(file)
+    except json.JSONDecodeError:
+        records = []
+    if not isinstance(records, list):
+        records = [records]
+    existing = list(iter_log_file(target)) if os.path.abspath(source) != os.path.abspath(target) else []
+    temp_path = f"{target}.tmp{os.getpid()}"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        for record in records + existing:
+            file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+    os.replace(temp_path, target)
+    if os.path.abspath(source) != os.path.abspath(target):
+        os.replace(source, f"{source}.bak")
+    return len(records)
 
 
 class Logger:
     """
     Класс для логирования результатов с поддержкой потокобезопасности.
+
+    Записи добавляются в конец файла в формате JSON Lines (один объект JSON
+    на строку). Вызовы log_results только ставят запись в очередь в памяти;
+    фоновый поток забирает записи партиями, дописывает их в файл,
+    синхронизирует его с диском согласно политике fsync и при превышении
+    max_bytes переименовывает файл в log_file.1 (старые копии сдвигаются
+    до log_file.<backup_count>).
     """
 
-    def __init__(self, log_file="session_log.json"):
+    def __init__(self, log_file="session_log.jsonl", fsync='interval', fsync_interval=1.0, max_bytes=10 << 20,
+                 backup_count=5, batch_size=1000, queue_size=100000, legacy_file=None):
         """
-        Инициализирует Logger.
+        Инициализирует Logger и запускает поток записи.
 
         :param log_file: Путь к файлу для сохранения логов.
+        :param fsync: Политика синхронизации с диском: 'always', 'interval' или 'never'.
+        :param fsync_interval: Минимальный интервал между fsync в секундах для политики 'interval'.
+        :param max_bytes: Размер файла, после которого он ротируется, или None.
+        :param backup_count: Количество хранимых ротированных файлов.
+        :param batch_size: Максимальное количество записей в одной партии.
+        :param queue_size: Ёмкость очереди; при заполнении log_results ждёт поток записи.
+        :param legacy_file: Лог старого формата (массив JSON) для переноса или None —
+                            файл с тем же именем и расширением .json.
         """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Неизвестная политика fsync: {fsync}")
         self.log_file = log_file
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.legacy_file = legacy_file if legacy_file is not None else os.path.splitext(log_file)[0] + '.json'
         self.lock = threading.Lock()
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self._closed = False
         self.ensure_log_file()
+        self._writer = threading.Thread(target=self._write_loop, name="LoggerWriter", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def ensure_log_file(self):
         """
-        Создаёт лог-файл, если он не существует.
+        Создаёт лог-файл, если он не существует, и переносит записи из лога
+        старого формата (массива JSON).
         """
-        if not os.path.exists(self.log_file):
-            with open(self.log_file, 'w') as file:
-                json.dump([], file)
+        if self.legacy_file != self.log_file and is_json_array_log(self.legacy_file):
+            migrate_json_array_log(self.legacy_file, self.log_file)
+        if is_json_array_log(self.log_file):
+            migrate_json_array_log(self.log_file, self.log_file)
+        self._file = open(self.log_file, 'a', encoding='utf-8')
 
     def log_results(self, data):
         """
         Логирует данные в файл.
 
+        Запись ставится в очередь и сохраняется фоновым потоком.
+
         :param data: Словарь с данными для логирования.
         """
-        with self.lock:
-            try:
-                with open(self.log_file, 'r') as file:
-                    logs = json.load(file)
-            except json.JSONDecodeError:
-                logs = []
-            logs.append(data)
-            with open(self.log_file, 'w') as file:
-                json.dump(logs, file, indent=4)
+        if self._closed:
+            raise RuntimeError("Логгер закрыт.")
+        self._queue.put(data)
 
     def log_successful_attempts(self, attempts):
         """
@@ -58,3 +167,128 @@ class Logger:
         :param attempts: Количество неудачных попыток.
         """
         self.log_results({"failed_attempts": attempts})
+
+    def flush(self):
+        """
+        Ожидает, пока все поставленные в очередь записи будут записаны в файл.
+        """
+        if self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """
+        Записывает оставшиеся записи, останавливает поток записи и закрывает файл.
+        """
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        self._writer.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def iter_logs(self, include_rotated=True):
+        """
+        Последовательно читает записи лога, начиная с самых старых.
+
+        :param include_rotated: Читать также ротированные файлы.
+        :return: Итератор словарей.
+        """
+        if not self._closed:
+            self.flush()
+        paths = [f"{self.log_file}.{index}" for index in range(self.backup_count, 0, -1)] if include_rotated else []
+        paths.append(self.log_file)
+        for path in paths:
+            yield from iter_log_file(path)
+
+    def _write_loop(self):
+        """
+        Цикл фонового потока: забирает записи партиями и дописывает их в файл.
+        """
+        stopping = False
+        while not stopping:
+            try:
+                # Данные, ещё не синхронизированные по политике 'interval', синхронизируются в простое
+                batch = [self._queue.get(timeout=self.fsync_interval if self._unsynced else None)]
+            except queue.Empty:
+                self._sync()
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not _STOP]
+            stopping = len(records) != len(batch)
+            try:
+                if records:
+                    self._write_batch(records)
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Не удалось записать лог {self.log_file}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        if self._unsynced:
+            self._sync()
+
+    def _write_batch(self, records):
+        """
+        Дописывает партию записей, синхронизирует файл и при необходимости ротирует его.
+
+        :param records: Список словарей.
+        """
+        lines = []
+        for record in records:
+            try:
+                lines.append(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            except (TypeError, ValueError) as e:
+                self.errors += 1
+                logging.error(f"Запись лога не сериализуется в JSON: {e}")
+        self._file.write(''.join(lines))
+        self._file.flush()
+        if self.fsync == 'always' or (self.fsync == 'interval'
+                                      and time.monotonic() - self._last_fsync >= self.fsync_interval):
+            self._sync()
+        else:
+            self._unsynced = self.fsync == 'interval'
+        if self.max_bytes is not None and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _sync(self):
+        """
+        Синхронизирует файл лога с диском.
+        """
+        try:
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            self.errors += 1
+            logging.error(f"Не удалось синхронизировать лог {self.log_file}: {e}")
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    def _rotate(self):
+        """
+        Переименовывает текущий файл в log_file.1, сдвигая старые копии, и открывает новый.
+
+        Файл открывается заново и при ошибке переименования (например, в
+        Windows, пока файл открыт для чтения): запись продолжается в текущий
+        файл, а ротация повторяется после следующей партии.
+        """
+        if self._unsynced:
+            self._sync()
+        self._file.close()
+        try:
+            if self.backup_count > 0:
+                for index in range(self.backup_count - 1, 0, -1):
+                    source = f"{self.log_file}.{index}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.log_file}.{index + 1}")
+                os.replace(self.log_file, f"{self.log_file}.1")
+            else:
+                os.remove(self.log_file)
+        finally:
+            self._file = open(self.log_file, 'a', encoding='utf-8')
@@ -1,66 +1,337 @@
 # utils/queue_manager.py
-import queue
+import bisect
+import json
 import threading
+from collections import Counter
 from utils.database import Database
+from utils.logger import Logger
+from utils.result_store import ResultStore
+from utils.attack_pipeline import CancelToken, JobCancelled, job_resources, run_attack_pipeline, validate_spec
+
+# Статусы заданий
+QUEUED = "Queued"
+RUNNING = "Running"
+COMPLETED = "Completed"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+FINAL_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+
+class Job:
+    """
+    Задание очереди: параметры конвейера, приоритет, статус и признак отмены.
+    """
+
+    def __init__(self, job_id, task, spec, priority=0):
+        """
+        Инициализирует задание.
+
+        :param job_id: Идентификатор задания (строки таблицы attacks).
+        :param task: Описание задачи.
+        :param spec: Словарь параметров конвейера.
+        :param priority: Приоритет (больше — раньше).
+        """
+        self.id = job_id
+        self.task = task
+        self.spec = spec
+        self.priority = priority
+        self.status = QUEUED
+        self.result = None
+        self.progress = None
+        self.resources = job_resources(spec)
+        self.token = CancelToken()
+
+    @property
+    def sort_key(self):
+        """
+        Ключ порядка в очереди: по убыванию приоритета, затем по времени добавления.
+        """
+        return -self.priority, self.id
+
+    def to_dict(self):
+        """
+        Возвращает состояние задания в виде словаря.
+
+        :return: Словарь с полями id, task, status, priority, result, progress.
+        """
+        return {
+            "id": self.id,
+            "task": self.task,
+            "status": self.status,
+            "priority": self.priority,
+            "result": self.result,
+            "progress": self.progress,
+        }
 
 
 class QueueManager:
     """
     Класс для управления очередью задач и результатами.
+
+    Задания выполняются пулом рабочих потоков в порядке приоритета. Каждое
+    задание занимает ресурсы (устройства Hashcat, см. job_resources);
+    количество одновременно занятых единиц ресурса ограничено
+    resource_limits (по умолчанию — одно задание Hashcat на устройство), и
+    задание, ресурсы которого заняты, пропускается в пользу следующего.
+    Состояние заданий хранится в таблице attacks, поэтому после перезапуска
+    незавершённые задания снова ставятся в очередь. Текущее состояние,
+    прогресс и результаты заданий публикуются в хранилище results
+    (ResultStore); завершённые задания удаляются из памяти менеджера.
     """
 
-    def __init__(self, db):
+    def __init__(self, db, num_workers=2, resource_limits=None, logger=None, pipeline=None, resume=True,
+                 result_retention=1000, result_ttl=3600.0):
         """
-        Инициализирует QueueManager.
+        Инициализирует QueueManager и запускает рабочие потоки.
 
         :param db: Экземпляр Database для взаимодействия с базой данных.
+        :param num_workers: Количество рабочих потоков.
+        :param resource_limits: Словарь {ресурс или класс ресурса: лимит}; по умолчанию {'hashcat': 1}.
+        :param logger: Экземпляр Logger для конвейеров атак или None — создаётся новый.
+        :param pipeline: Функция выполнения задания (job_id, spec, token, progress_callback) -> результат;
+                         по умолчанию — run_attack_pipeline.
+        :param resume: Поставить в очередь задания, не завершённые при прошлом запуске.
+        :param result_retention: Количество завершённых заданий, хранимых в results.
+        :param result_ttl: Время хранения завершённого задания в results в секундах.
         """
-        self.task_queue = queue.Queue()
-        self.result_queue = queue.Queue()
+        self.task_queue = []
+        # Ключи порядка заданий task_queue (Job.sort_key) в том же порядке — для двоичного поиска
+        self._queue_keys = []
+        self.results = ResultStore(result_retention, result_ttl)
         self.db = db
-        self.worker_thread = threading.Thread(target=self.worker)
-        self.worker_thread.daemon = True
-        self.worker_thread.start()
+        self.resource_limits = {'hashcat': 1, **(resource_limits or {})}
+        self.logger = logger if logger is not None else Logger()
+        self.pipeline = pipeline or self._run_pipeline
+        self.jobs = {}
+        self.condition = threading.Condition()
+        self._in_use = Counter()
+        self._stopping = False
+        if resume:
+            self.resume_jobs()
+        self.workers = []
+        for index in range(num_workers):
+            worker_thread = threading.Thread(target=self.worker, name=f"QueueWorker-{index}")
+            worker_thread.daemon = True
+            worker_thread.start()
+            self.workers.append(worker_thread)
 
-    def add_task(self, task):
+    def add_task(self, task, spec=None, priority=0):
         """
         Добавляет новую задачу в очередь и базу данных.
 
         :param task: Описание задачи.
+        :param spec: Словарь параметров конвейера (см. run_attack_pipeline).
+        :param priority: Приоритет задания (больше — раньше).
+        :return: Идентификатор задания.
         """
-        self.db.add_attack(task)
-        self.task_queue.put(task)
+        spec = dict(spec or {})
+        validate_spec(spec)
+        job_id = self.db.add_job(task, json.dumps(spec), priority)
+        self._enqueue(Job(job_id, task, spec, priority))
+        return job_id
 
-    def get_result(self):
+    def resume_jobs(self):
         """
-        Получает результат из очереди результатов.
+        Ставит в очередь задания из базы данных, не завершённые при прошлом запуске.
 
-        :return: Результат задачи или None, если нет доступных результатов.
+        Прерванные выполняющиеся задания запускаются заново.
+
+        :return: Количество восстановленных заданий.
         """
-        try:
-            return self.result_queue.get_nowait()
-        except queue.Empty:
-            return None
+        rows = self.db.list_jobs_by_status([QUEUED, RUNNING])
+        for job_id, task, status, spec, priority in rows:
+            if status == RUNNING:
+                self.db.update_job_status(job_id, QUEUED)
+            self._enqueue(Job(job_id, task, json.loads(spec), priority))
+        return len(rows)
+
+    def _enqueue(self, job):
+        """
+        Помещает задание в очередь с учётом приоритета.
+
+        :param job: Экземпляр Job.
+        """
+        with self.condition:
+            self.jobs[job.id] = job
+            index = bisect.bisect(self._queue_keys, job.sort_key)
+            self._queue_keys.insert(index, job.sort_key)
+            self.task_queue.insert(index, job)
+            self.results.update(job.id, **job.to_dict())
+            self.condition.notify_all()
+
+    def cancel(self, job_id):
+        """
+        Отменяет задание: ожидающее удаляется из очереди, у выполняющегося
+        завершается процесс Hashcat и прерывается конвейер.
+
+        :param job_id: Идентификатор задания.
+        :return: True, если задание было отменено; False, если оно не найдено или уже завершено.
+        """
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in FINAL_STATUSES:
+                return False
+            if job.status == RUNNING:
+                job.token.cancel()
+                return True
+            self._dequeue(bisect.bisect_left(self._queue_keys, job.sort_key))
+            job.status = CANCELLED
+        self._finish(job, CANCELLED, None)
+        return True
+
+    def get_job(self, job_id):
+        """
+        Возвращает последний снимок состояния задания из хранилища результатов.
+
+        :param job_id: Идентификатор задания.
+        :return: Словарь состояния или None, если задание неизвестно или уже удалено из хранилища.
+        """
+        return self.results.get(job_id)
+
+    def shutdown(self, cancel_running=False):
+        """
+        Останавливает рабочие потоки после завершения текущих заданий.
+
+        Ожидающие задания остаются в базе данных и восстанавливаются при следующем запуске.
+
+        :param cancel_running: Отменить выполняющиеся задания.
+        """
+        with self.condition:
+            self._stopping = True
+            running = [job for job in self.jobs.values() if job.status == RUNNING]
+            self.condition.notify_all()
+        if cancel_running:
+            for job in running:
+                job.token.cancel()
+        for worker_thread in self.workers:
+            worker_thread.join()
+
+    def _limit(self, resource):
+        """
+        Возвращает лимит ресурса: заданный для ресурса или для его класса.
+
+        :param resource: Имя ресурса вида 'класс:имя'.
+        :return: Лимит или None (без ограничения).
+        """
+        if resource in self.resource_limits:
+            return self.resource_limits[resource]
+        return self.resource_limits.get(resource.partition(':')[0])
+
+    def _available(self, resources):
+        """
+        Проверяет, можно ли занять ресурсы. Ресурс 'класс:*' (все устройства
+        класса) конфликтует с любым ресурсом того же класса.
+
+        :param resources: Список имён ресурсов.
+        :return: True, если все ресурсы свободны в пределах лимитов.
+        """
+        for resource in resources:
+            limit = self._limit(resource)
+            if limit is None:
+                continue
+            kind, _, name = resource.partition(':')
+            if name == '*':
+                busy = sum(count for key, count in self._in_use.items() if key.partition(':')[0] == kind)
+            else:
+                busy = self._in_use[resource] + self._in_use[f"{kind}:*"]
+            if busy >= limit:
+                return False
+        return True
+
+    def _next_job(self):
+        """
+        Забирает из очереди первое по приоритету задание со свободными ресурсами
+        (вызывается под self.condition).
+
+        :return: Экземпляр Job или None.
+        """
+        for index, job in enumerate(self.task_queue):
+            if self._available(job.resources):
+                self._dequeue(index)
+                self._in_use.update(job.resources)
+                job.status = RUNNING
+                self.results.update(job.id, status=RUNNING)
+                return job
+        return None
+
+    def _dequeue(self, index):
+        """
+        Удаляет задание из очереди по позиции (вызывается под self.condition).
+
+        :param index: Позиция задания в task_queue.
+        """
+        del self.task_queue[index]
+        del self._queue_keys[index]
 
     def worker(self):
         """
         Рабочий поток для обработки задач из очереди.
         """
         while True:
-            task = self.task_queue.get()
-            # Обработать задачу (реализуйте логику обработки)
-            result = self.process_task(task)
-            self.result_queue.put(result)
-            self.task_queue.task_done()
+            with self.condition:
+                job = None
+                while not self._stopping:
+                    job = self._next_job()
+                    if job is not None:
+                        break
+                    self.condition.wait()
+                if job is None:
+                    return
+            status, result = FAILED, None
+            try:
+                self.db.update_job_status(job.id, RUNNING)
+                status, result = self.process_task(job)
+            finally:
+                try:
+                    self._finish(job, status, result)
+                finally:
+                    with self.condition:
+                        self._in_use.subtract(job.resources)
+                        self.condition.notify_all()
 
-    def process_task(self, task):
+    def process_task(self, job):
         """
         Обрабатывает задачу и возвращает результат.
 
-        :param task: Задача для обработки.
-        :return: Результат обработки задачи.
+        :param job: Экземпляр Job.
+        :return: Кортеж (статус, результат).
+        """
+        def progress_callback(status):
+            job.progress = status.to_dict() if hasattr(status, 'to_dict') else status
+            self.results.update(job.id, progress=job.progress)
+
+        try:
+            return COMPLETED, self.pipeline(job.id, job.spec, job.token, progress_callback)
+        except JobCancelled:
+            return CANCELLED, None
+        except Exception as e:
+            if job.token.cancelled:
+                return CANCELLED, None
+            return FAILED, {"error": str(e)}
+
+    def _finish(self, job, status, result):
+        """
+        Фиксирует итог задания в базе данных и хранилище результатов.
+
+        Вызывается без self.condition: запись в базу данных ждёт потока
+        записи, и удержание блокировки остановило бы cancel, add_task и
+        рабочие потоки.
+
+        :param job: Экземпляр Job.
+        :param status: Итоговый статус.
+        :param result: Результат или None.
+        """
+        try:
+            self.db.update_job_status(job.id, status, json.dumps(result) if result is not None else None)
+        finally:
+            with self.condition:
+                job.status = status
+                job.result = result
+                self.jobs.pop(job.id, None)
+            self.results.update(job.id, status=status, result=result, finished=True)
+
+    def _run_pipeline(self, job_id, spec, token, progress_callback):
+        """
+        Выполняет конвейер атаки с базой данных и логгером менеджера.
         """
-        # Реализуйте логику обработки задачи
-        # Пример:
-        result = {"task": task, "status": "Completed"}
-        return result
+        return run_attack_pipeline(job_id, spec, self.db, self.logger, token, progress_callback)
@@ -0,0 +1,136 @@
+# utils/result_store.py
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class ResultStore:
+    """
+    Хранилище состояния и результатов заданий.
+
+    Для каждого задания хранится последний снимок состояния (словарь) с
+    номером версии; поиск по идентификатору выполняется за O(1). Каждое
+    изменение также записывается в ограниченный журнал событий с
+    порядковым номером, по которому клиенты получают изменения (длинный
+    опрос, Server-Sent Events). Завершённые задания удаляются по истечении
+    ttl секунд или при превышении max_jobs; выполняющиеся задания не
+    удаляются.
+    """
+
+    def __init__(self, max_jobs=1000, ttl=3600.0, max_events=10000):
+        """
+        Инициализирует хранилище.
+
+        :param max_jobs: Максимальное количество хранимых завершённых заданий.
+        :param ttl: Время хранения завершённого задания в секундах или None.
+        :param max_events: Количество хранимых событий журнала.
+        """
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.condition = threading.Condition()
+        self._records = OrderedDict()
+        # Завершённые задания в порядке завершения: {идентификатор: время завершения}
+        self._finished = OrderedDict()
+        self._events = deque(maxlen=max_events)
+        self._sequence = 0
+
+    @property
+    def sequence(self):
+        """
+        Номер последнего события.
+        """
+        with self.condition:
+            return self._sequence
+
+    def update(self, job_id, **fields):
+        """
+        Обновляет состояние задания и оповещает ожидающих клиентов.
+
+        Снимки неизменяемы: каждое обновление создаёт новый словарь.
+
+        :param job_id: Идентификатор задания.
+        :param fields: Изменяемые поля (например, status, progress, result, finished).
+        :return: Новый снимок состояния.
+        """
+        with self.condition:
+            previous = self._records.pop(job_id, None) or {"id": job_id, "version": 0, "finished": False}
+            record = {**previous, **fields, "version": previous["version"] + 1, "updated_at": time.time()}
+            self._records[job_id] = record
+            self._finished.pop(job_id, None)
+            if record["finished"]:
+                self._finished[job_id] = record["updated_at"]
+            self._sequence += 1
+            self._events.append((self._sequence, record))
+            self._evict(record["updated_at"])
+            self.condition.notify_all()
+            return record
+
+    def get(self, job_id):
+        """
+        Возвращает последний снимок состояния задания.
+
+        :param job_id: Идентификатор задания.
+        :return: Словарь или None.
+        """
+        with self.condition:
+            return self._records.get(job_id)
+
+    def wait(self, job_id, version=0, timeout=30.0):
+        """
+        Ожидает появления версии состояния задания новее version (длинный опрос).
+
+        :param job_id: Идентификатор задания.
+        :param version: Последняя известная клиенту версия.
+        :param timeout: Максимальное время ожидания в секундах.
+        :return: Снимок состояния (возможно, прежней версии по истечении времени) или None.
+        """
+        def changed():
+            record = self._records.get(job_id)
+            return record is None or record["version"] > version
+
+        with self.condition:
+            self.condition.wait_for(changed, timeout)
+            return self._records.get(job_id)
+
+    def events_after(self, sequence, timeout=15.0):
+        """
+        Возвращает события с номерами больше sequence, ожидая их появления.
+
+        Если часть событий уже вытеснена из журнала, возвращаются все хранимые.
+
+        :param sequence: Номер последнего полученного клиентом события.
+        :param timeout: Максимальное время ожидания в секундах.
+        :return: Список кортежей (номер события, снимок состояния).
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self._sequence > sequence, timeout)
+            return [(number, record) for number, record in self._events if number > sequence]
+
+    def list(self, finished=None):
+        """
+        Возвращает снимки состояния заданий в порядке последнего обновления.
+
+        :param finished: True — только завершённые, False — только незавершённые, None — все.
+        :return: Список словарей.
+        """
+        with self.condition:
+            return [record for record in self._records.values()
+                    if finished is None or record["finished"] == finished]
+
+    def _evict(self, now):
+        """
+        Удаляет устаревшие и лишние завершённые задания (вызывается под self.condition).
+
+        Завершённые задания упорядочены по времени завершения, поэтому
+        удаляются с начала очереди, и стоимость вызова не зависит от общего
+        количества заданий.
+
+        :param now: Текущее время.
+        """
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            expired = self.ttl is not None and now - finished_at > self.ttl
+            if len(self._finished) <= self.max_jobs and not expired:
+                break
+            self._finished.popitem(last=False)
+            del self._records[job_id]
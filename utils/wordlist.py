@@ -0,0 +1,142 @@
+# utils/wordlist.py
+import os
+import time
+
+
+def iter_wordlist_chunks(file_path, chunk_bytes=1 << 20, start=0, end=None, encoding='utf-8', errors='ignore'):
+    """
+    Построчно читает словарь кусками ограниченного размера.
+
+    Файл читается в бинарном режиме через буфер, поэтому в памяти находится
+    не больше одного куска. При указании диапазона байтов [start, end)
+    строка относится к диапазону, если её начало лежит внутри него, — так
+    соседние диапазоны не пересекаются и не теряют строк.
+
+    :param file_path: Путь к файлу словаря.
+    :param chunk_bytes: Примерный размер куска в байтах.
+    :param start: Смещение начала диапазона.
+    :param end: Смещение конца диапазона (не включительно); None — до конца файла.
+    :param encoding: Кодировка файла.
+    :param errors: Обработка ошибок декодирования.
+    :return: Итератор кортежей (список паролей, количество прочитанных байтов).
+    """
+    with open(file_path, 'rb') as f:
+        if start > 0:
+            # Дочитываем строку, начавшуюся до диапазона: она принадлежит предыдущему
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while end is None or position < end:
+            lines = f.readlines(chunk_bytes)
+            if not lines:
+                break
+            consumed = 0
+            if end is not None:
+                kept = 0
+                for line in lines:
+                    if position + consumed >= end:
+                        break
+                    consumed += len(line)
+                    kept += 1
+                lines = lines[:kept]
+            else:
+                consumed = sum(len(line) for line in lines)
+            position += consumed
+            yield [line.decode(encoding, errors).rstrip('\r\n') for line in lines], consumed
+
+
+def count_lines(file_path, chunk_bytes=1 << 20):
+    """
+    Подсчитывает строки файла, читая его блоками в бинарном режиме.
+
+    :param file_path: Путь к файлу.
+    :param chunk_bytes: Размер читаемого блока в байтах.
+    :return: Количество строк (последняя строка без перевода строки учитывается).
+    """
+    lines = 0
+    last = b'\n'
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return lines + (last != b'\n')
+
+
+class WordlistProgress:
+    """
+    Учёт прогресса чтения словаря с ограничением частоты отчётов.
+    """
+
+    def __init__(self, total_bytes, callback=None, interval=1.0):
+        """
+        Инициализирует учёт прогресса.
+
+        :param total_bytes: Общий размер обрабатываемых данных в байтах.
+        :param callback: Функция, принимающая словарь со статистикой.
+        :param interval: Минимальный интервал между отчётами в секундах.
+        """
+        self.total_bytes = total_bytes
+        self.callback = callback
+        self.interval = interval
+        self.bytes_read = 0
+        self.lines = 0
+        self.started = time.monotonic()
+        self.last_report = 0.0
+
+    @classmethod
+    def for_file(cls, file_path, callback=None, interval=1.0):
+        """
+        Создаёт учёт прогресса для файла.
+
+        :param file_path: Путь к файлу.
+        :param callback: Функция, принимающая словарь со статистикой.
+        :param interval: Минимальный интервал между отчётами в секундах.
+        :return: Экземпляр WordlistProgress.
+        """
+        return cls(os.path.getsize(file_path), callback, interval)
+
+    def update(self, lines, bytes_read):
+        """
+        Учитывает обработанный кусок и при необходимости сообщает о прогрессе.
+
+        :param lines: Количество обработанных строк.
+        :param bytes_read: Количество обработанных байтов.
+        """
+        self.lines += lines
+        self.bytes_read += bytes_read
+        now = time.monotonic()
+        if self.callback and now - self.last_report >= self.interval:
+            self.last_report = now
+            self.callback(self.stats())
+
+    def finish(self):
+        """
+        Сообщает итоговую статистику.
+
+        :return: Словарь со статистикой.
+        """
+        stats = self.stats()
+        if self.callback:
+            self.callback(stats)
+        return stats
+
+    def stats(self):
+        """
+        Возвращает текущую статистику.
+
+        :return: Словарь с ключами bytes_read, total_bytes, lines, elapsed,
+                 lines_per_second, megabytes_per_second и percent.
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'bytes_read': self.bytes_read,
+            'total_bytes': self.total_bytes,
+            'lines': self.lines,
+            'elapsed': elapsed,
+            'lines_per_second': self.lines / elapsed,
+            'megabytes_per_second': self.bytes_read / elapsed / (1 << 20),
+            'percent': 100.0 * self.bytes_read / self.total_bytes if self.total_bytes else 100.0,
+        }
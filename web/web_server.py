@@ -5,14 +5,107 @@ import os
 # Добавляем корневую директорию проекта в sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, jsonify, request
-from utils.database import Database
+from datetime import datetime, timezone
+from flask import Flask, Response, jsonify, request, stream_with_context
+from utils.database import Database, ATTACK_COLUMNS, MODEL_COLUMNS
 from utils.queue_manager import QueueManager
+from utils.logger import Logger
+import json
 import threading
 
 app = Flask(__name__)
 db = Database()
-queue_manager = QueueManager(db)
+logger = Logger()
+queue_manager = QueueManager(db, logger=logger)
+
+# Размер страницы списков по умолчанию и максимальный
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Размер страниц, которыми база читается при выгрузке NDJSON
+EXPORT_BATCH_SIZE = 1000
+# Максимальное время длинного опроса и период комментариев-пульса в потоке событий, секунды
+MAX_WAIT = 60.0
+HEARTBEAT_INTERVAL = 15.0
+
+
+def parse_timestamp(value):
+    """
+    Приводит время из параметра запроса (ISO 8601) к формату SQLite в UTC.
+
+    :param value: Строка времени или None.
+    :return: Строка 'ГГГГ-ММ-ДД ЧЧ:ММ:СС' или None.
+    """
+    if value is None:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_listing_args(columns, paged=True):
+    """
+    Разбирает общие параметры списков: limit, after, since, until, fields.
+
+    :param columns: Допустимые поля.
+    :param paged: Разбирать параметры страницы (limit, after).
+    :return: Словарь параметров для методов Database.
+    """
+    args = request.args
+    params = {
+        'since': parse_timestamp(args.get('since')),
+        'until': parse_timestamp(args.get('until')),
+        'fields': None,
+    }
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        params['fields'] = list(dict.fromkeys(fields))
+    if paged:
+        try:
+            params['limit'] = int(args.get('limit', DEFAULT_PAGE_SIZE))
+            params['after'] = int(args['after']) if args.get('after') else None
+        except ValueError:
+            raise ValueError("limit and after must be integers")
+        if not 1 <= params['limit'] <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return params
+
+
+def page_response(key, columns, rows, fields, limit):
+    """
+    Формирует ответ со страницей списка и ключом следующей страницы.
+
+    :param key: Имя списка в ответе.
+    :param columns: Поля, выбранные из базы (включают id).
+    :param rows: Строки страницы.
+    :param fields: Поля, запрошенные клиентом.
+    :param limit: Размер страницы.
+    :return: Ответ Flask.
+    """
+    items = [{field: value for field, value in zip(columns, row) if field in fields} for row in rows]
+    next_after = rows[-1][columns.index('id')] if len(rows) == limit else None
+    return jsonify({key: items, "next_after": next_after}), 200
+
+
+def ndjson_response(rows, fields):
+    """
+    Формирует потоковый ответ NDJSON (один объект JSON на строку).
+
+    :param rows: Итератор строк.
+    :param fields: Поля строк.
+    :return: Ответ Flask.
+    """
+    def generate():
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row)), ensure_ascii=False, default=str) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 
 @app.route('/', methods=['GET'])
@@ -25,63 +118,201 @@ def start_attack():
     """
     Эндпоинт для добавления новой задачи атаки.
 
-    Ожидает JSON с ключом 'task'.
+    Ожидает JSON с ключом 'task' (описание), параметрами конвейера
+    (model_file, hash_file, model_type, length, batch_size, rounds,
+    hashcat_options, hash_mode, device, stream, dedup) и
+    необязательным приоритетом 'priority'.
     """
-    data = request.json
+    data = request.get_json(silent=True) or {}
     task = data.get('task')
     if not task:
         return jsonify({"status": "error", "message": "Task not provided"}), 400
-    queue_manager.add_task(task)
-    return jsonify({"status": "Task added to queue", "task": task}), 200
+    spec = {key: value for key, value in data.items() if key not in ('task', 'priority')}
+    try:
+        priority = int(data.get('priority', 0))
+        job_id = queue_manager.add_task(task, spec, priority)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "Task added to queue", "task": task, "job_id": job_id}), 200
+
+
+@app.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Эндпоинт для отмены задания.
+
+    :param job_id: Идентификатор задания.
+    """
+    if not queue_manager.cancel(job_id):
+        return jsonify({"status": "error", "message": "Job not found or already finished"}), 404
+    return jsonify({"status": "Cancellation requested", "job_id": job_id}), 200
 
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """
     Эндпоинт для получения статуса задач.
+
+    Возвращает состояние заданий из хранилища результатов, не изменяя его:
+    общий статус ("In Progress", если есть незавершённые задания, иначе
+    "Idle"), количество заданий по статусам и их последние снимки.
     """
-    results = []
-    while True:
-        result = queue_manager.get_result()
-        if not result:
-            break
-        results.append(result)
-    return jsonify({"status": "In Progress", "results": results}), 200
+    results = queue_manager.results.list()
+    counts = {}
+    for record in results:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    active = any(not record["finished"] for record in results)
+    return jsonify({"status": "In Progress" if active else "Idle", "counts": counts, "results": results,
+                    "sequence": queue_manager.results.sequence}), 200
+
+
+def stored_job(job_id):
+    """
+    Возвращает состояние задания из базы данных (для заданий, уже удалённых
+    из хранилища результатов или выполненных до перезапуска).
+
+    :param job_id: Идентификатор задания.
+    :return: Словарь состояния или None.
+    """
+    row = db.get_attack(job_id)
+    if row is None:
+        return None
+    job = dict(zip(ATTACK_COLUMNS, row))
+    try:
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+    except ValueError:
+        pass
+    job["finished"] = job["status"] not in ("Queued", "Running", "In Progress")
+    return job
+
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Эндпоинт для получения состояния задания.
+
+    С параметром wait (секунды, не более MAX_WAIT) выполняется длинный
+    опрос: ответ возвращается, как только версия состояния станет больше
+    параметра version, либо по истечении времени ожидания.
+
+    :param job_id: Идентификатор задания.
+    """
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0.0), MAX_WAIT)
+        version = int(request.args.get('version', 0))
+    except ValueError:
+        return jsonify({"status": "error", "message": "wait and version must be numbers"}), 400
+    job = queue_manager.results.wait(job_id, version, wait) if wait else queue_manager.get_job(job_id)
+    if job is None:
+        job = stored_job(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Job not found"}), 404
+    return jsonify({"job": job}), 200
+
+
+@app.route('/api/events', methods=['GET'])
+def job_events():
+    """
+    Эндпоинт для подписки на изменения заданий (Server-Sent Events).
+
+    Каждое событие содержит снимок состояния задания; идентификатор события
+    — его порядковый номер, поэтому после переподключения клиент получает
+    пропущенные события по заголовку Last-Event-ID (или параметру
+    last_event_id). Параметр job_id ограничивает поток одним заданием.
+    """
+    try:
+        sequence = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+                       or queue_manager.results.sequence)
+        job_id = int(request.args['job_id']) if request.args.get('job_id') else None
+    except ValueError:
+        return jsonify({"status": "error", "message": "last_event_id and job_id must be integers"}), 400
+
+    def generate():
+        last = sequence
+        while True:
+            events = queue_manager.results.events_after(last, HEARTBEAT_INTERVAL)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for number, record in events:
+                last = number
+                if job_id is None or record["id"] == job_id:
+                    data = json.dumps(record, ensure_ascii=False, default=str)
+                    yield f"id: {number}\nevent: job\ndata: {data}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.route('/api/attacks', methods=['GET'])
 def list_attacks():
     """
-    Эндпоинт для получения списка всех атак.
+    Эндпоинт для получения страницы списка атак.
+
+    Параметры запроса: limit, after (id последней атаки предыдущей
+    страницы), status, since, until (время создания, ISO 8601), fields
+    (поля через запятую). Ответ содержит next_after для следующей страницы.
+    """
+    try:
+        params = parse_listing_args(ATTACK_COLUMNS)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    fields = params.pop('fields') or list(ATTACK_COLUMNS)
+    columns = fields if 'id' in fields else ['id'] + fields
+    rows = db.list_attacks_page(status=request.args.get('status'), fields=columns, **params)
+    return page_response("attacks", columns, rows, fields, params['limit'])
+
+
+@app.route('/api/attacks/export', methods=['GET'])
+def export_attacks():
+    """
+    Эндпоинт для выгрузки атак потоком NDJSON.
+
+    Параметры запроса: status, since, until, fields (как у /api/attacks).
     """
-    attacks = db.list_attacks()
-    attacks_list = []
-    for attack in attacks:
-        attacks_list.append({
-            "id": attack[0],
-            "task": attack[1],
-            "status": attack[2],
-            "result": attack[3]
-        })
-    return jsonify({"attacks": attacks_list}), 200
+    try:
+        params = parse_listing_args(ATTACK_COLUMNS, paged=False)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    fields = params.pop('fields') or list(ATTACK_COLUMNS)
+    rows = db.iter_attacks(status=request.args.get('status'), fields=fields, batch_size=EXPORT_BATCH_SIZE, **params)
+    return ndjson_response(rows, fields)
 
 
 @app.route('/api/models', methods=['GET'])
 def list_models():
     """
-    Эндпоинт для получения списка всех сохранённых моделей.
-    """
-    models = db.list_models()
-    models_list = []
-    for model in models:
-        models_list.append({
-            "id": model[0],
-            "model_type": model[1],
-            "file_path": model[2],
-            "version": model[3],
-            "saved_at": model[4]
-        })
-    return jsonify({"models": models_list}), 200
+    Эндпоинт для получения страницы списка сохранённых моделей.
+
+    Параметры запроса: limit, after, model_type, since, until (время
+    сохранения, ISO 8601), fields. Ответ содержит next_after для следующей
+    страницы.
+    """
+    try:
+        params = parse_listing_args(MODEL_COLUMNS)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    fields = params.pop('fields') or list(MODEL_COLUMNS)
+    columns = fields if 'id' in fields else ['id'] + fields
+    rows = db.list_models_page(model_type=request.args.get('model_type'), fields=columns, **params)
+    return page_response("models", columns, rows, fields, params['limit'])
+
+
+@app.route('/api/models/export', methods=['GET'])
+def export_models():
+    """
+    Эндпоинт для выгрузки сохранённых моделей потоком NDJSON.
+
+    Параметры запроса: model_type, since, until, fields (как у /api/models).
+    """
+    try:
+        params = parse_listing_args(MODEL_COLUMNS, paged=False)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    fields = params.pop('fields') or list(MODEL_COLUMNS)
+    rows = db.iter_models(model_type=request.args.get('model_type'), fields=fields, batch_size=EXPORT_BATCH_SIZE,
+                          **params)
+    return ndjson_response(rows, fields)
 
 
 @app.route('/api/models/<int:model_id>', methods=['GET'])